@@ -0,0 +1,54 @@
+"""
+ArcFace throughput (embeddings/s) across ONNX Runtime session settings.
+
+Sweeps intra-op threads, graph optimization level and the CPU memory arena
+and reports embeddings/s at batch sizes 1, 4 and 16 (random 112x112 input,
+so only the session settings matter). Use the best row to fill in
+config/arcface.json.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_arcface --threads 1 2 4 0 --iters 20
+"""
+import argparse
+import itertools
+import time
+import numpy as np
+
+from src.arcface_engine import GRAPH_OPT_LEVELS, create_session, load_arcface_config
+
+BATCH_SIZES = (1, 4, 16)
+
+
+def throughput(session, batch, iters):
+    input_name = session.get_inputs()[0].name
+    x = np.random.default_rng(0).uniform(-1, 1, (batch, 3, 112, 112)).astype(np.float32)
+    session.run(None, {input_name: x})  # warm-up
+    t0 = time.perf_counter()
+    for _ in range(iters):
+        session.run(None, {input_name: x})
+    return batch * iters / (time.perf_counter() - t0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 0], help="intra-op threads (0 = default)")
+    parser.add_argument("--opt", nargs="+", default=["basic", "all"], choices=GRAPH_OPT_LEVELS)
+    parser.add_argument("--arena", nargs="+", default=["on", "off"], choices=["on", "off"])
+    parser.add_argument("--iters", type=int, default=20)
+    args = parser.parse_args()
+
+    base = load_arcface_config()
+    header = f"{'threads':>7} {'opt':>9} {'arena':>5} {'load s':>7}"
+    print(header + "".join(f" {'b=' + str(b) + ' emb/s':>12}" for b in BATCH_SIZES))
+    for threads, opt, arena in itertools.product(args.threads, args.opt, args.arena):
+        config = base.replace(intra_op_threads=threads, graph_optimization=opt,
+                              enable_cpu_mem_arena=arena == "on", optimized_model_path="")
+        t0 = time.perf_counter()
+        session = create_session(config)
+        load_s = time.perf_counter() - t0
+        rates = [throughput(session, b, args.iters) for b in BATCH_SIZES]
+        print(f"{threads:>7} {opt:>9} {arena:>5} {load_s:>7.2f}" + "".join(f" {r:>12.1f}" for r in rates))
+
+
+if __name__ == "__main__":
+    main()
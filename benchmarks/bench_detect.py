@@ -0,0 +1,74 @@
+"""
+Face detection fps vs detector input size, downscaling and ROI.
+
+Runs src.detect_faces.detect() over recorded frames (a video file or a
+folder of images) for every combination of --imgsz and mode:
+  full       the full-resolution frame goes to YOLO (letterboxed to imgsz)
+  downscale  the frame is first resized to imgsz on its longest side
+  roi        like downscale, on the --roi part of the frame only
+faces = average detections per frame (to spot recall loss at small sizes).
+
+Usage (from the repo root):
+    python -m benchmarks.bench_detect --source data/recordings/door.mp4 --frames 200
+"""
+import argparse
+import glob
+import os
+import time
+import cv2
+
+from src.detect_faces import detect, get_detector
+
+
+def load_frames(source, limit):
+    if os.path.isdir(source):
+        paths = sorted(glob.glob(os.path.join(source, "*.jpg")) + glob.glob(os.path.join(source, "*.png")))
+        frames = [cv2.imread(p) for p in paths[:limit]]
+        return [f for f in frames if f is not None]
+    cap = cv2.VideoCapture(source)
+    frames = []
+    while len(frames) < limit:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", required=True, help="video file or folder of frames")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--imgsz", type=int, nargs="+", default=[320, 480, 640])
+    parser.add_argument("--roi", type=float, nargs=4, default=[0.25, 0.0, 0.75, 1.0],
+                        metavar=("X1", "Y1", "X2", "Y2"), help="ROI as fractions of the frame")
+    args = parser.parse_args()
+
+    frames = load_frames(args.source, args.frames)
+    if not frames:
+        raise SystemExit(f"[ERROR] No frames read from {args.source}")
+    h, w = frames[0].shape[:2]
+    print(f"[INFO] {len(frames)} frames of {w}x{h} from {args.source}")
+    get_detector()
+
+    modes = {
+        "full": lambda f, s: detect(f, imgsz=s, roi=None, max_side=None),
+        "downscale": lambda f, s: detect(f, imgsz=s, roi=None, max_side=s),
+        "roi": lambda f, s: detect(f, imgsz=s, roi=args.roi, max_side=s),
+    }
+    print(f"{'imgsz':>5} {'mode':>10} {'fps':>8} {'ms/frame':>9} {'faces':>6}")
+    for size in args.imgsz:
+        for mode, fn in modes.items():
+            fn(frames[0], size)  # warm-up
+            n_faces = 0
+            t0 = time.perf_counter()
+            for frame in frames:
+                n_faces += len(fn(frame, size)[0])
+            elapsed = time.perf_counter() - t0
+            print(f"{size:>5} {mode:>10} {len(frames) / elapsed:>8.1f} "
+                  f"{elapsed * 1000 / len(frames):>9.2f} {n_faces / len(frames):>6.2f}")
+
+
+if __name__ == "__main__":
+    main()
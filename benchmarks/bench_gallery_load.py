@@ -0,0 +1,59 @@
+"""
+Gallery load time: legacy pretty-printed JSON vs the binary embedding store.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_gallery_load --size 10000
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+import numpy as np
+
+from src.embedding_store import EmbeddingStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    embs = rng.standard_normal((args.size, 512), dtype=np.float32)
+    info = {"name": "Synthetic", "department": "Bench", "position": "Tester"}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "employees.json")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump({str(i): dict(info, embedding=e.tolist()) for i, e in enumerate(embs)}, f, indent=4)
+
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            with open(json_path, "r", encoding="utf-8") as f:
+                db = json.load(f)
+            np.asarray([d["embedding"] for d in db.values()], dtype=np.float32)
+        json_ms = (time.perf_counter() - t0) * 1000 / args.repeat
+
+        store = EmbeddingStore(os.path.join(tmp, "store.json"))
+        store.upsert_many((str(i), info, e) for i, e in enumerate(embs))
+        t0 = time.perf_counter()
+        for _ in range(args.repeat):
+            _, _, _, matrix = store.snapshot()
+            float(matrix[-1, 0])  # touch the map
+        store_ms = (time.perf_counter() - t0) * 1000 / args.repeat
+
+        t0 = time.perf_counter()
+        store.upsert("0", info, embs[0])
+        upsert_ms = (time.perf_counter() - t0) * 1000
+
+        print(f"identities:        {args.size}")
+        print(f"JSON file:         {os.path.getsize(json_path) / 1e6:8.1f} MB, load {json_ms:8.1f} ms")
+        print(f"binary store:      {(os.path.getsize(store.emb_path) + os.path.getsize(store.meta_path)) / 1e6:8.1f} MB, "
+              f"load {store_ms:8.1f} ms")
+        print(f"single upsert:     {upsert_ms:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Recall@1 vs latency of the gallery index backends on synthetic galleries.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_index
+    python -m benchmarks.bench_index --sizes 1000 10000 --queries 500
+"""
+import argparse
+import time
+import numpy as np
+
+from src.face_index import make_index
+
+DIM = 512
+
+
+def synthetic_gallery(n, dim=DIM, seed=0):
+    rng = np.random.default_rng(seed)
+    x = rng.standard_normal((n, dim), dtype=np.float32)
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+def noisy_queries(gallery, n_queries, noise=0.06, seed=1):
+    """Probe embeddings: enrolled vectors plus noise, like a new capture of the same person."""
+    rng = np.random.default_rng(seed)
+    truth = rng.choice(len(gallery), n_queries, replace=False)
+    q = gallery[truth] + noise * rng.standard_normal((n_queries, gallery.shape[1]), dtype=np.float32)
+    return q / np.linalg.norm(q, axis=1, keepdims=True), truth
+
+
+def run(index, queries):
+    """Return (top-1 ids, mean ms per single-query search)."""
+    top1 = np.empty(len(queries), dtype=np.int64)
+    start = time.perf_counter()
+    for i, q in enumerate(queries):
+        idx, _ = index.search(q, 1)
+        top1[i] = idx[0, 0]
+    return top1, (time.perf_counter() - start) * 1000 / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 16, 64, 256])
+    args = parser.parse_args()
+
+    print(f"{'size':>8} {'backend':>14} {'build s':>8} {'ms/query':>9} {'recall@1':>9}")
+    for n in args.sizes:
+        gallery = synthetic_gallery(n)
+        queries, truth = noisy_queries(gallery, min(args.queries, n))
+
+        t0 = time.perf_counter()
+        exact = make_index("exact").build(gallery)
+        build = time.perf_counter() - t0
+        exact_top1, ms = run(exact, queries)
+        print(f"{n:>8} {'exact':>14} {build:>8.2f} {ms:>9.3f} {np.mean(exact_top1 == truth):>9.3f}")
+
+        t0 = time.perf_counter()
+        ivf = make_index("ivf").build(gallery)
+        build = time.perf_counter() - t0
+        for nprobe in args.nprobe:
+            ivf.nprobe = nprobe
+            top1, ms = run(ivf, queries)
+            # recall measured against exact search, the best any index can do
+            recall = np.mean(top1 == exact_top1)
+            print(f"{n:>8} {f'ivf nprobe={nprobe}':>14} {build:>8.2f} {ms:>9.3f} {recall:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+"""
+Offline replay of the full pipeline (no webcam needed).
+
+Frames from recorded videos, image folders or single images go through
+detection -> liveness -> embedding -> matching -> logging exactly like the
+realtime loop (one frame at a time). Reported per stage: latency histogram
+and p50 / p90 / p99 / max, plus end-to-end fps and memory (RSS). Attendance
+is logged to a throw-away SQLite store so the real logs are not touched.
+
+--output writes the report as JSON; --compare checks it against an older
+report and exits with status 1 if any stage p50 / p99 or the end-to-end
+fps got worse by more than --tolerance (for release comparisons / CI).
+
+Usage (from the repo root):
+    python -m benchmarks.bench_pipeline --source data/employees/* --output bench/pipeline.json
+    python -m benchmarks.bench_pipeline --source data/recordings/door.mp4 --compare bench/pipeline.json
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+from src import metrics, model_registry
+from src.antispoof import check_liveness_batch, is_live
+from src.attendance_store import AttendanceStore
+from src.detect_faces import crop_faces, detect
+from src.extract_embeddings import get_embeddings
+from src.gallery import get_gallery
+
+STAGES = ("detection", "crop_align", "liveness", "embedding", "matching", "logging")
+HIST_BUCKETS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, float("inf"))
+IMAGE_EXTS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+def iter_frames(sources, limit):
+    """Frames of every source: video file, image file or folder of images."""
+    count = 0
+    for source in sources:
+        if os.path.isdir(source):
+            paths = sorted(p for p in glob.glob(os.path.join(source, "*")) if p.lower().endswith(IMAGE_EXTS))
+        elif source.lower().endswith(IMAGE_EXTS):
+            paths = [source]
+        else:
+            paths = None
+
+        if paths is not None:
+            for path in paths:
+                frame = cv2.imread(path)
+                if frame is None:
+                    continue
+                yield frame
+                count += 1
+                if count >= limit:
+                    return
+            continue
+
+        cap = cv2.VideoCapture(source)
+        while count < limit:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield frame
+            count += 1
+        cap.release()
+        if count >= limit:
+            return
+
+
+def rss_mb():
+    """Current resident set size in MB (Linux /proc, falls back to peak RSS)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return peak_rss_mb()
+
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+def summarize(samples_ms):
+    a = np.asarray(samples_ms, dtype=np.float64)
+    if a.size == 0:
+        return {"count": 0}
+    edges = np.array(HIST_BUCKETS_MS)
+    counts = np.bincount(np.searchsorted(edges, a), minlength=len(edges))[:len(edges)]
+    return {
+        "count": int(a.size),
+        "mean_ms": round(float(a.mean()), 3),
+        "p50_ms": round(float(np.percentile(a, 50)), 3),
+        "p90_ms": round(float(np.percentile(a, 90)), 3),
+        "p99_ms": round(float(np.percentile(a, 99)), 3),
+        "max_ms": round(float(a.max()), 3),
+        "histogram": {f"<={b:g}ms" if np.isfinite(b) else f">{HIST_BUCKETS_MS[-2]:g}ms": int(c)
+                      for b, c in zip(HIST_BUCKETS_MS, counts)},
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def replay(sources, limit, db_path, threshold):
+    rss_start = rss_mb()
+    t0 = time.perf_counter()
+    model_registry.warmup()
+    gallery = get_gallery(db_path)
+    gallery.refresh()
+    load_s = time.perf_counter() - t0
+    rss_models = rss_mb()
+
+    times = {stage: [] for stage in STAGES}
+    e2e = []
+    counts = {"frames": 0, "faces": 0, "live": 0, "matched": 0, "logged": 0}
+    with tempfile.TemporaryDirectory(prefix="hrms-bench-") as tmp:
+        store = AttendanceStore(os.path.join(tmp, "attendance.db"))
+
+        def timed(stage, fn, *args):
+            start = time.perf_counter()
+            out = fn(*args)
+            times[stage].append((time.perf_counter() - start) * 1000)
+            return out
+
+        start_all = time.perf_counter()
+        for frame in iter_frames(sources, limit):
+            start = time.perf_counter()
+            detections = timed("detection", detect, frame)
+            faces, boxes, chips = timed("crop_align", crop_faces, frame, *detections)
+            counts["frames"] += 1
+            counts["faces"] += len(faces)
+            if faces:
+                liveness = timed("liveness", check_liveness_batch, faces)
+                live = [i for i, (label, conf) in enumerate(liveness) if is_live(label, conf)]
+                counts["live"] += len(live)
+                if live:
+                    embs = timed("embedding", get_embeddings, [chips[i] for i in live])
+                    if embs is not None:
+                        matches = timed("matching", lambda: [gallery.match(e) for e in embs])
+                        hits = [(emp_id, name) for emp_id, name, score in matches if emp_id and score >= threshold]
+                        counts["matched"] += len(hits)
+                        if hits:
+                            now = datetime.now()
+                            timed("logging", lambda: [store.record(emp_id, name, "", "", now.strftime("%Y-%m-%d"),
+                                                                   now.strftime("%H:%M:%S")) for emp_id, name in hits])
+                            counts["logged"] += len(hits)
+            e2e.append((time.perf_counter() - start) * 1000)
+        elapsed = time.perf_counter() - start_all
+        store.close()
+
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "sources": list(sources),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "counts": counts,
+        "model_load_s": round(load_s, 3),
+        "elapsed_s": round(elapsed, 3),
+        "fps": round(counts["frames"] / elapsed, 2) if elapsed > 0 else 0.0,
+        "end_to_end": summarize(e2e),
+        "stages": {stage: summarize(times[stage]) for stage in STAGES},
+        "model_calls": metrics.snapshot()["counters"],
+        "memory_mb": {
+            "rss_start": round(rss_start, 1),
+            "rss_after_models": round(rss_models, 1),
+            "rss_end": round(rss_mb(), 1),
+            "peak_rss": round(peak_rss_mb(), 1),
+        },
+    }
+
+
+def compare(report, baseline, tolerance):
+    """Lines describing regressions of report vs baseline (empty = none)."""
+    problems = []
+    old_fps, new_fps = baseline.get("fps", 0), report.get("fps", 0)
+    if old_fps and new_fps < old_fps * (1 - tolerance):
+        problems.append(f"end-to-end fps {old_fps} -> {new_fps}")
+    for stage in STAGES:
+        old, new = baseline.get("stages", {}).get(stage, {}), report["stages"].get(stage, {})
+        for key in ("p50_ms", "p99_ms"):
+            if key in old and key in new and old[key] > 0 and new[key] > old[key] * (1 + tolerance):
+                problems.append(f"{stage} {key} {old[key]} -> {new[key]}")
+    return problems
+
+
+def print_report(report):
+    print(f"[INFO] {report['counts']['frames']} frames, {report['counts']['faces']} faces in "
+          f"{report['elapsed_s']}s -> {report['fps']} fps (models loaded in {report['model_load_s']}s)")
+    print(f"{'stage':>11} {'count':>6} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for name, s in list(report["stages"].items()) + [("end_to_end", report["end_to_end"])]:
+        if s.get("count"):
+            print(f"{name:>11} {s['count']:>6} {s['p50_ms']:>8.2f} {s['p90_ms']:>8.2f} "
+                  f"{s['p99_ms']:>8.2f} {s['max_ms']:>8.2f}")
+    print(f"[INFO] Memory (MB): {report['memory_mb']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", nargs="+", required=True, help="video files, image files or image folders")
+    parser.add_argument("--frames", type=int, default=1000, help="maximum frames to replay")
+    parser.add_argument("--db", default="db/employees.json", help="gallery used for matching")
+    parser.add_argument("--threshold", type=float, default=0.5)
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--compare", help="older JSON report to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed relative slowdown")
+    args = parser.parse_args()
+
+    report = replay(args.source, args.frames, args.db, args.threshold)
+    print_report(report)
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"[INFO] Report written to {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            problems = compare(report, json.load(f), args.tolerance)
+        for line in problems:
+            print(f"[WARN] Regression: {line}")
+        if problems:
+            sys.exit(1)
+        print(f"[INFO] No regression against {args.compare} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+ArcFace preprocessing cost per face: legacy vs fused batch path.
+
+"legacy" is the original preprocess_face (resize, cvtColor, float64 divide,
+cast, transpose, expand_dims, then np.concatenate for the batch).
+"fused" is preprocess_batch: resize into a reused scratch image, then one
+multiply over a strided BGR -> RGB / HWC -> CHW view that casts and scales
+straight into the reused NCHW float32 batch buffer, plus an in-place shift.
+Both produce the same tensors up to float32 rounding (checked before timing).
+
+Usage (from the repo root):
+    python -m benchmarks.bench_preprocess --iters 200
+"""
+import argparse
+import time
+import cv2
+import numpy as np
+
+from src.extract_embeddings import preprocess_batch
+
+
+def legacy_preprocess(face_img):
+    face = cv2.resize(face_img, (112, 112))
+    face = cv2.cvtColor(face, cv2.COLOR_BGR2RGB)
+    face = (face / 127.5 - 1.0).astype(np.float32)
+    face = np.transpose(face, (2, 0, 1))
+    return np.expand_dims(face, axis=0)
+
+
+def legacy_batch(faces):
+    return np.concatenate([legacy_preprocess(f) for f in faces], axis=0)
+
+
+def per_face_us(fn, faces, iters):
+    fn(faces)  # warm-up (allocates the reused buffers once)
+    t0 = time.perf_counter()
+    for _ in range(iters):
+        fn(faces)
+    return (time.perf_counter() - t0) * 1e6 / (iters * len(faces))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iters", type=int, default=200)
+    parser.add_argument("--crop", type=int, default=160, help="side of the synthetic face crops")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'batch':>5} {'legacy us/face':>15} {'fused us/face':>14} {'speedup':>8}")
+    for batch in (1, 4, 16):
+        faces = [rng.integers(0, 256, (args.crop, args.crop, 3), dtype=np.uint8) for _ in range(batch)]
+        assert np.allclose(legacy_batch(faces), preprocess_batch(faces), atol=1e-6)
+        old = per_face_us(legacy_batch, faces, args.iters)
+        new = per_face_us(preprocess_batch, faces, args.iters)
+        print(f"{batch:>5} {old:>15.1f} {new:>14.1f} {old / new:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Attendance report on a synthetic multi-million-row history.
+
+Builds a throw-away SQLite store with --employees people over --days days
+(~90% presence on workdays, random check-in / check-out times), then times
+report.period_summary for daily / weekly / monthly:
+
+  cold  = empty cache, every period computed (vectorized pandas)
+  warm  = closed periods read from the cache, only the current one computed
+
+Then the closed days are archived into day partitions (src/partitioned_log.py)
+(closed months rolled up by compaction), and loads of the full history /
+last month / one employee are timed from the SQLite store and from the
+partitions.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_report --employees 8000 --days 365
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from src import report
+from src.partitioned_log import archive_attendance, attendance_log
+from src.attendance_store import AttendanceStore
+
+
+def build_store(path, employees, days, departments, seed=0):
+    """Fill the attendance table directly (executemany) and return the row count."""
+    rng = np.random.default_rng(seed)
+    AttendanceStore(path).close()      # creates the schema + indexes
+    dates = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=days)
+    dept = np.array([f"Dept {i}" for i in range(departments)])[np.arange(employees) % departments]
+    ids = np.array([f"E{i:06d}" for i in range(employees)])
+    total = 0
+    with sqlite3.connect(path) as conn:
+        conn.execute("PRAGMA synchronous=OFF")
+        for day in dates:
+            present = rng.random(employees) < 0.9
+            n = int(present.sum())
+            check_in = 8 * 3600 + rng.normal(30 * 60, 15 * 60, n).astype(int)
+            check_out = check_in + rng.normal(8.5 * 3600, 1800, n).astype(int)
+            fmt = lambda s: [f"{v // 3600:02d}:{v // 60 % 60:02d}:{v % 60:02d}" for v in s]
+            day_str = day.strftime("%Y-%m-%d")
+            conn.executemany(
+                "INSERT INTO attendance (employee_id, full_name, department, position, date, check_in, check_out) "
+                "VALUES (?, '', ?, '', ?, ?, ?)",
+                zip(ids[present], dept[present], [day_str] * n, fmt(check_in), fmt(check_out)),
+            )
+            total += n
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--employees", type=int, default=8000)
+    parser.add_argument("--days", type=int, default=365, help="workdays of history")
+    parser.add_argument("--departments", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store_path = os.path.join(tmp, "attendance.db")
+        cache_dir = os.path.join(tmp, "cache")
+        start = time.perf_counter()
+        rows = build_store(store_path, args.employees, args.days, args.departments)
+        print(f"[INFO] Synthetic store: {rows:,} rows in {time.perf_counter() - start:.1f}s")
+
+        start = time.perf_counter()
+        df = report.load_attendance(store_path=store_path)
+        load_s = time.perf_counter() - start
+        start = time.perf_counter()
+        report.daily_records(df)
+        records_s = time.perf_counter() - start
+        print(f"[INFO] Full load {load_s:.2f}s, hours / late columns {records_s:.2f}s")
+
+        print(f"{'report':>8} {'periods':>8} {'cold s':>8} {'warm s':>8} {'speedup':>8}")
+        for name in report.PERIODS:
+            timings = []
+            for _ in range(2):
+                start = time.perf_counter()
+                summary = report.period_summary(name, cache_dir=cache_dir, store_path=store_path)
+                timings.append(time.perf_counter() - start)
+            cold, warm = timings
+            print(f"{name:>8} {summary['period'].nunique():>8} {cold:>8.2f} {warm:>8.2f} {cold / warm:>7.1f}x")
+
+        month_start = (pd.Timestamp.today() - pd.Timedelta(days=30)).strftime("%Y-%m-%d")
+        queries = {"full history": {}, "last 30 days": {"start": month_start}, "one employee": {"employees": ["E000042"]}}
+        parts_root = os.path.join(tmp, "parts")
+        sqlite_s = {}
+        for label, kwargs in queries.items():
+            start = time.perf_counter()
+            report.load_attendance(store_path=store_path, parts_root=parts_root, **kwargs)
+            sqlite_s[label] = time.perf_counter() - start
+
+        log = attendance_log(parts_root)
+        start = time.perf_counter()
+        moved = archive_attendance(store_path, log)
+        archive_s = time.perf_counter() - start
+        start = time.perf_counter()
+        log.compact()
+        print(f"[INFO] Archived {moved:,} rows in {archive_s:.1f}s, compacted in "
+              f"{time.perf_counter() - start:.1f}s: {log.stats()}")
+        print(f"{'query':>14} {'rows':>10} {'sqlite s':>9} {'parts s':>8}")
+        for label, kwargs in queries.items():
+            start = time.perf_counter()
+            df = report.load_attendance(store_path=store_path, parts_root=parts_root, **kwargs)
+            parts_s = time.perf_counter() - start
+            print(f"{label:>14} {len(df):>10,} {sqlite_s[label]:>9.3f} {parts_s:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Match latency vs number of templates per employee (K = 1..8), and how often
+the opt-in mean-template shortlist (Gallery(rerank_top=N)) misses.
+
+"full" (the gallery default) scores all R = N * K template rows and reduces
+them to N employee scores (max over templates). "shortlist" ranks employees
+by mean template first and re-ranks only the top --rerank-top on all their
+templates. agree = fraction of queries where both pick the same employee.
+
+The synthetic sweep (random base vector + per-pose noise) only measures
+latency: its templates are spread evenly around the mean, which real
+frontal / profile templates are not, so its agreement says little about
+recall. For that, point --db at an enrolled multi-template store
+(e.g. db/employees.json after bulk enrollment): every enrolled template is
+used as a probe, full scoring always finds its owner, and agree is the
+shortlist's recall@1 on real pose templates.
+
+Usage (from the repo root):
+    python -m benchmarks.bench_templates --size 10000
+    python -m benchmarks.bench_templates --db db/employees.json --rerank-top 64
+"""
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+
+from src.gallery import Gallery
+
+
+def time_matches(galleries, queries):
+    """Best employee id per query and ms/query for each labelled gallery."""
+    results = {}
+    for label, g in galleries.items():
+        g.match(queries[0])  # warm-up
+        t0 = time.perf_counter()
+        results[label] = np.array([g.match(q)[0] for q in queries], dtype=object)
+        results[label + "_ms"] = (time.perf_counter() - t0) * 1000 / len(queries)
+    return results
+
+
+def real_store(db_path, rerank_top, max_queries):
+    """Shortlist recall@1 on the enrolled templates of an existing store."""
+    full = Gallery(db_path, rerank_top=0)
+    shortlist = Gallery(db_path, rerank_top=rerank_top)
+    full.refresh()
+    shortlist.refresh()
+    state = full._state
+    if state.max_templates < 2 or rerank_top >= len(full):
+        print(f"[WARN] {db_path}: {len(full)} employees, up to {state.max_templates} templates each; "
+              f"the shortlist only applies with K > 1 and more than {rerank_top} employees")
+    rows = np.random.default_rng(0).permutation(len(state.matrix))[:max_queries]
+    queries = np.asarray(state.matrix[rows], dtype=np.float32)
+    truth = state.ids[state.owner[rows]]
+    results = time_matches({"full": full, "shortlist": shortlist}, queries)
+    print(f"{'employees':>9} {'rows':>8} {'probes':>7} {'full ms':>9} {'shortlist ms':>13} "
+          f"{'full recall':>11} {'shortlist recall':>16}")
+    print(f"{len(full):>9} {len(state.matrix):>8} {len(rows):>7} {results['full_ms']:>9.3f} "
+          f"{results['shortlist_ms']:>13.3f} {np.mean(results['full'] == truth):>11.3f} "
+          f"{np.mean(results['shortlist'] == truth):>16.3f}")
+
+
+def synthetic(size, max_k, n_queries, rerank_top):
+    rng = np.random.default_rng(0)
+    info = {"name": "Synthetic", "department": "Bench", "position": "Tester"}
+    print(f"{'K':>3} {'rows':>8} {'full ms':>9} {'shortlist ms':>13} {'agree':>6}")
+    for k in range(1, max_k + 1):
+        with tempfile.TemporaryDirectory() as tmp:
+            full = Gallery(os.path.join(tmp, "employees.json"))
+            shortlist = Gallery(os.path.join(tmp, "employees.json"), rerank_top=rerank_top)
+            # templates = a person's base vector plus per-pose variation
+            base = rng.standard_normal((size, 1, 512), dtype=np.float32)
+            templates = base + 0.5 * rng.standard_normal((size, k, 512), dtype=np.float32)
+            full.store.upsert_many((str(i), info, templates[i]) for i in range(size))
+            full.refresh()
+            shortlist.refresh()
+
+            # probes: one template of a random employee plus capture noise
+            who = rng.integers(0, size, n_queries)
+            queries = templates[who, rng.integers(0, k, n_queries)]
+            queries = queries + 0.5 * rng.standard_normal(queries.shape, dtype=np.float32)
+
+            results = time_matches({"full": full, "shortlist": shortlist}, queries)
+            agree = np.mean(results["full"] == results["shortlist"])
+            print(f"{k:>3} {len(full.matrix):>8} {results['full_ms']:>9.3f} "
+                  f"{results['shortlist_ms']:>13.3f} {agree:>6.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=10000, help="number of synthetic employees")
+    parser.add_argument("--max-k", type=int, default=8)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--rerank-top", type=int, default=64, help="shortlist size to compare")
+    parser.add_argument("--db", help="enrolled store to measure shortlist recall on (instead of synthetic data)")
+    args = parser.parse_args()
+
+    if args.db:
+        real_store(args.db, args.rerank_top, args.queries)
+    else:
+        synthetic(args.size, args.max_k, args.queries, args.rerank_top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Load test for the HTTP API (src/api.py).
+
+Sends --requests POSTs with --concurrency in flight and reports latency
+percentiles (p50 / p90 / p99), requests/s and images/s. Each request
+uploads --batch images (raw JPEG body when 1, multipart otherwise), taken
+round-robin from --images. The server's /health counters show how well
+concurrent requests were merged into model batches.
+
+Usage (from the repo root, server started with `python -m src.api`):
+    python -m benchmarks.load_test --images data/employees/1/*.jpg --concurrency 16 --requests 500
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import time
+
+import aiohttp
+import numpy as np
+
+
+async def one_request(session, url, payloads, batch):
+    if batch == 1:
+        data = next(payloads)
+        kwargs = {"data": data, "headers": {"Content-Type": "image/jpeg"}}
+    else:
+        form = aiohttp.FormData()
+        for i in range(batch):
+            form.add_field("image", next(payloads), filename=f"{i}.jpg", content_type="image/jpeg")
+        kwargs = {"data": form}
+    t0 = time.perf_counter()
+    async with session.post(url, **kwargs) as resp:
+        await resp.read()
+        ok = resp.status == 200
+    return time.perf_counter() - t0, ok
+
+
+async def run(args):
+    blobs = []
+    for path in args.images:
+        with open(path, "rb") as f:
+            blobs.append(f.read())
+    payloads = itertools.cycle(blobs)
+    url = args.url.rstrip("/") + "/" + args.endpoint.lstrip("/")
+    if args.params:
+        url += "?" + args.params
+
+    latencies, errors = [], 0
+    remaining = iter(range(args.requests))
+
+    async with aiohttp.ClientSession() as session:
+        async def worker():
+            nonlocal errors
+            for _ in remaining:
+                try:
+                    dt, ok = await one_request(session, url, payloads, args.batch)
+                except aiohttp.ClientError:
+                    dt, ok = 0.0, False
+                if ok:
+                    latencies.append(dt)
+                else:
+                    errors += 1
+
+        # a few warm-up requests so model loading is not measured
+        for _ in range(min(3, args.requests)):
+            await one_request(session, url, payloads, args.batch)
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - start
+
+        async with session.get(args.url.rstrip("/") + "/health") as resp:
+            health = await resp.json() if resp.status == 200 else {}
+
+    lat = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    report = {
+        "endpoint": args.endpoint,
+        "concurrency": args.concurrency,
+        "images_per_request": args.batch,
+        "requests": len(latencies),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "requests_per_s": round(len(latencies) / elapsed, 2),
+        "images_per_s": round(len(latencies) * args.batch / elapsed, 2),
+        "p50_ms": round(float(np.percentile(lat, 50)), 2),
+        "p90_ms": round(float(np.percentile(lat, 90)), 2),
+        "p99_ms": round(float(np.percentile(lat, 99)), 2),
+        "max_ms": round(float(lat.max()), 2),
+        "server_images_per_batch": health.get("images_per_batch"),
+    }
+    print(json.dumps(report, indent=2))
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--endpoint", default="recognize", choices=["recognize", "verify"])
+    parser.add_argument("--images", nargs="+", required=True, help="JPEG files to upload")
+    parser.add_argument("--params", default="", help="extra query string, e.g. employee_id=42")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--batch", type=int, default=1, help="images per request")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
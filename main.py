@@ -1,6 +1,5 @@
-from src import enroll
-from src import report
-from src import realtime_attendance
+# Modules are imported on demand so each menu option only pays for what it
+# uses (e.g. "Generate report" never imports ultralytics / onnxruntime).
 
 
 def main():
@@ -9,17 +8,24 @@ def main():
         print("1. Enroll new employee")
         print("2. Run realtime attendance")
         print("3. Generate report")
-        print("4. Exit")
+        print("4. Bulk enroll from data/employees folders")
+        print("5. Exit")
         choice = input("Choose option: ")
 
         if choice == "1":
+            from src import enroll
             emp_id = input("Enter Employee ID: ")
             enroll.enroll_employee(emp_id)
         elif choice == "2":
+            from src import realtime_attendance
             realtime_attendance.realtime_attendance()
         elif choice == "3":
+            from src import report
             report.generate_report()
         elif choice == "4":
+            from src import bulk_enroll
+            bulk_enroll.bulk_enroll()
+        elif choice == "5":
             print("Exiting...")
             break
         else:
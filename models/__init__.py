@@ -1,10 +1,16 @@
-from models.build import load_yolo_model, load_facenet_model, get_device
+# models/__init__.py
+# Importing this package loads nothing: `models.build` is imported by
+# src/model_registry.py, and the old module-level `yolo` / `facenet` /
+# `device` attributes resolve lazily to the registry's shared instances.
 
-device = get_device()
-print("Device:", device)
+_REGISTRY_NAMES = {"yolo": "yolo_face", "facenet": "facenet"}
 
-yolo = load_yolo_model()
-print("YOLO model loaded:", yolo)
 
-facenet = load_facenet_model(device)
-print("FaceNet model loaded:", facenet)
+def __getattr__(name):
+    if name == "device":
+        from models.build import get_device
+        return get_device()
+    if name in _REGISTRY_NAMES:
+        from src import model_registry
+        return model_registry.get(_REGISTRY_NAMES[name])
+    raise AttributeError(name)
@@ -1,15 +1,17 @@
 # models/build.py
-from ultralytics import YOLO
-from facenet_pytorch import InceptionResnetV1
-import torch
+# heavy imports happen inside the loaders, so importing this module is free
+
 
 def load_yolo_model():
+    from ultralytics import YOLO
     model = YOLO("models/yolov8n-face-lindevs.pt")
     return model
 
 def load_facenet_model(device="cpu"):
+    from facenet_pytorch import InceptionResnetV1
     model = InceptionResnetV1(pretrained="vggface2").eval().to(device)
     return model
 
 def get_device():
+    import torch
     return "cuda" if torch.cuda.is_available() else "cpu"
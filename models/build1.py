@@ -1,10 +1,19 @@
-# models/build.py
-import onnxruntime as ort
+# models/build1.py
 import numpy as np
 
 # === Load ArcFace model ===
-def load_arcface_model(model_path="models/arcface_w600k_r50.onnx"):
-    session = ort.InferenceSession(model_path, providers=["CPUExecutionProvider"])
+def load_arcface_model(model_path=None):
+    """
+    Shared ArcFace session from src/model_registry.py (config/arcface.json),
+    or a separate session for an explicit model_path.
+    """
+    from src import model_registry
+    from src.arcface_engine import create_session, load_arcface_config
+
+    if model_path is None:
+        session = model_registry.get("arcface")
+    else:
+        session = create_session(load_arcface_config().replace(model_path=model_path))
     print("[INFO] ArcFace model loaded successfully.")
     print("Inputs:", [i.name for i in session.get_inputs()])
     print("Outputs:", [o.name for o in session.get_outputs()])
@@ -21,7 +30,7 @@ def get_embedding(session, face_img):
     face = cv2.cvtColor(face, cv2.COLOR_BGR2RGB)
     face = (face / 127.5 - 1.0).astype(np.float32)
     face = np.expand_dims(np.transpose(face, (2, 0, 1)), axis=0)
-    emb = session.run(None, {"data": face})[0].flatten()
+    emb = session.run(None, {session.get_inputs()[0].name: face})[0].flatten()
     # Chuẩn hóa vector để dễ so sánh cosine similarity
     emb = emb / np.linalg.norm(emb)
     return emb
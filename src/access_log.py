@@ -0,0 +1,321 @@
+import atexit
+import glob
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:     # Windows: no inter-process lock, one writing process assumed
+    fcntl = None
+
+# ======================
+# Access Log Configuration
+# ======================
+ACCESS_LOG = "db/access_logs.csv"
+HEADER = "Date,Time,Employee ID,Name,Status,Liveness,Count\n"
+FLUSH_INTERVAL = 1.0        # seconds a decision may wait in memory
+FLUSH_ROWS = 256            # flush earlier when this many rows are buffered
+FSYNC_POLICY = "interval"   # "never" (OS decides) | "flush" (every flush) | "interval"
+FSYNC_INTERVAL = 5.0        # seconds between fsyncs for the "interval" policy
+ROTATE_BYTES = 32 * 2**20   # start a new segment past this size (0 = never)
+ROTATE_DAILY = True         # start a new segment when the date changes
+DEDUPE_WINDOW = 5.0         # identical consecutive denials within this many seconds -> one row
+
+FSYNC_POLICIES = ("never", "flush", "interval")
+
+
+def rotated_segments(path=ACCESS_LOG):
+    """Closed segments of a log (access_logs.<date>.<n>.csv), oldest first."""
+    base, ext = os.path.splitext(path)
+    return sorted(glob.glob(f"{glob.escape(base)}.????-??-??.*{ext}"))
+
+
+def _field(value):
+    text = str(value)
+    return f'"{text.replace(chr(34), chr(34) * 2)}"' if any(c in text for c in ',"\n') else text
+
+
+class AccessLogWriter:
+    """
+    Long-lived buffered writer for access decisions.
+
+    The file stays open; rows are buffered in memory and written in one go
+    every FLUSH_INTERVAL seconds (background thread) or once FLUSH_ROWS are
+    waiting. fsync follows FSYNC_POLICY. The live file is rotated to
+    access_logs.<date>.<n>.csv when the date changes or it grows past
+    ROTATE_BYTES; rotated segments never change again and are what
+    src/partitioned_log.py ingests. If a write fails the rows that did not
+    reach the file go back to the buffer and are retried on the next flush.
+
+    Several processes (verify, the API) may log to the same file: every
+    flush and rotation holds an flock on <path>.lock, and a writer whose
+    open file was rotated away by another process reopens the live file
+    before writing, so nothing is appended to a closed segment.
+
+    A denial identical to the previous one (same person, status, liveness)
+    within DEDUPE_WINDOW seconds is not written on its own: repeats are
+    counted and written as one row with Count = repeats when the run ends or
+    the window expires. A spoof held up to the camera for a minute is a
+    dozen rows, not one write per frame.
+    """
+
+    def __init__(self, path=ACCESS_LOG, flush_interval=FLUSH_INTERVAL, flush_rows=FLUSH_ROWS,
+                 fsync=FSYNC_POLICY, fsync_interval=FSYNC_INTERVAL, rotate_bytes=ROTATE_BYTES,
+                 rotate_daily=ROTATE_DAILY, dedupe_window=DEDUPE_WINDOW):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}, got {fsync!r}")
+        self.path = path
+        self.flush_interval = flush_interval
+        self.flush_rows = flush_rows
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.rotate_bytes = rotate_bytes
+        self.rotate_daily = rotate_daily
+        self.dedupe_window = dedupe_window
+
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._file = None       # unbuffered binary file: one write() per segment and flush
+        self._file_date = None
+        self._size = 0
+        self._dirty = False     # flushed but not fsynced
+        self._last_fsync = time.monotonic()
+        self._run = None        # [key, first_ts, last_ts, last (date, time), suppressed]
+        self._counters = {"rows": 0, "written": 0, "suppressed": 0, "flushes": 0, "fsyncs": 0, "rotations": 0}
+        self._closed = False
+        self._wake = threading.Event()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._thread = threading.Thread(target=self._flush_loop, name="hrms-access-log", daemon=True)
+        self._thread.start()
+
+    # ===== Public =====
+    def write(self, emp_id, name, status, liveness="Unknown", now=None):
+        """Record one decision (never blocks on disk unless the buffer is full)."""
+        now = now or datetime.now()
+        ts = now.timestamp()
+        stamp = (now.strftime("%Y-%m-%d"), now.strftime("%H:%M:%S"))
+        key = (str(emp_id), str(name), status, liveness)
+        with self._lock:
+            if self._closed:
+                return
+            self._counters["rows"] += 1
+            run = self._run
+            if run is not None and run[0] == key and ts - run[1] <= self.dedupe_window:
+                run[2], run[3] = ts, stamp
+                run[4] += 1
+                self._counters["suppressed"] += 1
+                return
+            self._end_run()
+            self._buffer.append((stamp, key, 1))
+            if status == "Denied":
+                self._run = [key, ts, ts, stamp, 0]
+            full = len(self._buffer) >= self.flush_rows
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Write buffered rows (and expired repeat runs) to the current segment."""
+        with self._lock:
+            self._flush_locked()
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._end_run()
+            self._flush_locked(force_fsync=True)
+            if self._file is not None:
+                self._close_file()
+        self._wake.set()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats["buffered"] = len(self._buffer)
+        return stats
+
+    # ===== Internals (called with the lock held) =====
+    def _end_run(self):
+        """Emit the suppressed repeats of the current denial run, if any."""
+        run, self._run = self._run, None
+        if run is not None and run[4]:
+            self._buffer.append((run[3], run[0], run[4]))
+
+    def _flush_locked(self, force_fsync=False):
+        if self._run is not None and time.time() - self._run[1] > self.dedupe_window:
+            self._end_run()
+        if not self._buffer:
+            if force_fsync and self._dirty:
+                self._fsync()
+            return
+        rows, self._buffer = self._buffer, []
+        done = 0    # rows known to be in the file
+        try:
+            with self._file_lock():
+                self._check_live()
+                chunk, pending = [], 0
+                for (date_str, time_str), key, count in rows:
+                    if self._needs_new_file(date_str, pending):
+                        done += self._write(chunk)
+                        chunk, pending = [], 0
+                        self._ensure_file(date_str)
+                    line = (",".join(_field(v) for v in (date_str, time_str, *key, count)) + "\n").encode("utf-8")
+                    chunk.append(line)
+                    pending += len(line)
+                done += self._write(chunk)
+        except OSError as e:
+            # keep only what did not reach the file for the next flush
+            done += getattr(e, "lines_written", 0)
+            self._buffer[:0] = rows[done:]
+            self._counters["written"] += done
+            raise
+        self._counters["written"] += len(rows)
+        self._counters["flushes"] += 1
+
+        if force_fsync or self.fsync == "flush" or \
+                (self.fsync == "interval" and time.monotonic() - self._last_fsync >= self.fsync_interval):
+            self._fsync()
+
+    def _write_bytes(self, data):
+        """write() until data is in the file; _size follows what each call returned.
+        Output: (bytes written, OSError or None)"""
+        view, written, error = memoryview(data), 0, None
+        while written < len(view):
+            try:
+                n = self._file.write(view[written:])
+            except OSError as e:
+                error = e
+                break
+            written += n
+            self._size += n
+        if written:
+            self._dirty = True
+        return written, error
+
+    def _write(self, chunk):
+        """
+        Write whole lines. Output: number of lines written. If a write fails,
+        a partly written line is cut off again (a retry must not follow half a
+        row) and the error is raised with lines_written = complete lines.
+        """
+        written, error = self._write_bytes(b"".join(chunk))
+        if error is None:
+            return len(chunk)
+        lines = end = 0
+        for line in chunk:
+            if end + len(line) > written:
+                break
+            end += len(line)
+            lines += 1
+        if end < written:
+            try:
+                self._file.truncate(self._size - (written - end))
+                self._size -= written - end
+            except OSError:
+                pass
+        error.lines_written = lines
+        raise error
+
+    def _fsync(self):
+        os.fsync(self._file.fileno())
+        self._dirty = False
+        self._last_fsync = time.monotonic()
+        self._counters["fsyncs"] += 1
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive against other processes writing / rotating the same log."""
+        if fcntl is None:
+            yield
+            return
+        with open(self.path + ".lock", "a") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def _check_live(self):
+        """Drop the open file if another process rotated it away; else pick up its current size."""
+        if self._file is None:
+            return
+        fst = os.fstat(self._file.fileno())
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            st = None
+        if st is None or (st.st_ino, st.st_dev) != (fst.st_ino, fst.st_dev):
+            self._close_file()
+        else:
+            self._size = fst.st_size
+
+    def _needs_new_file(self, date_str, pending=0):
+        """pending: bytes of the rows not written yet that go to the current file."""
+        return self._file is None or (self.rotate_daily and date_str != self._file_date) or \
+            bool(self.rotate_bytes and self._size + pending >= self.rotate_bytes)
+
+    def _close_file(self):
+        if self._dirty and self.fsync != "never":
+            self._fsync()
+        self._file.close()
+        self._file = None
+        self._dirty = False
+
+    def _ensure_file(self, date_str):
+        """Open the live file, rotating it first on a date change / size limit / old format."""
+        if self._file is not None:
+            self._close_file()
+            self._rotate(self._file_date)
+
+        if os.path.exists(self.path):
+            with open(self.path, "r", encoding="utf-8") as f:
+                header, first = f.readline(), f.readline()
+            file_date = first.split(",", 1)[0] if first else date_str
+            if header != HEADER or (self.rotate_daily and file_date != date_str):
+                self._rotate(file_date if first else date_str)
+        self._file = open(self.path, "ab", buffering=0)
+        self._size = os.fstat(self._file.fileno()).st_size
+        if self._size == 0:
+            _, error = self._write_bytes(HEADER.encode("utf-8"))
+            if error is not None:
+                raise error
+        self._file_date = date_str
+
+    def _rotate(self, date_str):
+        base, ext = os.path.splitext(self.path)
+        n = 1
+        while os.path.exists(f"{base}.{date_str}.{n:03d}{ext}"):
+            n += 1
+        try:
+            os.replace(self.path, f"{base}.{date_str}.{n:03d}{ext}")
+            self._counters["rotations"] += 1
+        except FileNotFoundError:
+            pass
+
+    def _flush_loop(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            if self._closed:
+                break
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"[WARN] Access log flush failed: {e}")
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def get_access_log(path=ACCESS_LOG):
+    """Process-wide writer for `path` (closed automatically at exit)."""
+    with _writers_lock:
+        writer = _writers.get(path)
+        if writer is None or writer._closed:
+            writer = _writers[path] = AccessLogWriter(path)
+            atexit.register(writer.close)
+        return writer
@@ -0,0 +1,73 @@
+import cv2
+import numpy as np
+
+# === Alignment Configuration ===
+ALIGN_FACES = True          # warp faces with 5 keypoints to the ArcFace template
+MIN_KEYPOINT_CONF = 0.5     # every keypoint must be at least this confident
+CHIP_SIZE = 112
+
+# Canonical ArcFace (insightface) 5-point template for 112x112 chips:
+# left eye, right eye, nose tip, left mouth corner, right mouth corner
+ARCFACE_TEMPLATE = np.array([
+    [38.2946, 51.6963],
+    [73.5318, 51.5014],
+    [56.0252, 71.7366],
+    [41.5493, 92.3655],
+    [70.7299, 92.2041],
+], dtype=np.float32)
+
+
+def similarity_transforms(src, dst=ARCFACE_TEMPLATE):
+    """
+    Least-squares similarity transforms (rotation + uniform scale + translation,
+    Umeyama) mapping each set of source points onto dst.
+    Input: src (N, 5, 2) keypoints, dst (5, 2)
+    Output: (N, 2, 3) float32 affine matrices for cv2.warpAffine
+    """
+    src = np.asarray(src, dtype=np.float64)
+    dst = np.asarray(dst, dtype=np.float64)
+    mu_s = src.mean(axis=1, keepdims=True)          # (N, 1, 2)
+    mu_d = dst.mean(axis=0)                         # (2,)
+    s0, d0 = src - mu_s, dst - mu_d
+    cov = np.einsum("pi,npj->nij", d0, s0) / src.shape[1]
+    u, sig, vt = np.linalg.svd(cov)
+    # keep a proper rotation (no reflection)
+    sign = np.sign(np.linalg.det(u) * np.linalg.det(vt))
+    sign[sign == 0] = 1.0
+    d = np.stack([np.ones_like(sign), sign], axis=1)  # (N, 2)
+    rot = (u * d[:, None, :]) @ vt
+    var_s = (s0 ** 2).sum(axis=(1, 2)) / src.shape[1]
+    scale = (sig * d).sum(axis=1) / np.maximum(var_s, 1e-12)
+    t = mu_d - scale[:, None] * np.einsum("nij,nj->ni", rot, mu_s[:, 0])
+    m = np.concatenate([scale[:, None, None] * rot, t[:, :, None]], axis=2)
+    return m.astype(np.float32)
+
+
+def align_faces(frame, keypoints, size=CHIP_SIZE):
+    """
+    Warp every face of one frame to the canonical template (one warpAffine each).
+    Input: frame (BGR), keypoints (N, 5, 2) in frame pixels
+    Output: list of (size, size, 3) aligned face chips
+    """
+    if len(keypoints) == 0:
+        return []
+    dst = ARCFACE_TEMPLATE * (size / CHIP_SIZE)
+    return [cv2.warpAffine(frame, m, (size, size), flags=cv2.INTER_LINEAR, borderValue=0)
+            for m in similarity_transforms(keypoints, dst)]
+
+
+def result_keypoints(result):
+    """
+    5-point keypoints of a YOLO result as (N, 5, 2) plus a (N,) usable mask,
+    or (None, None) if the detector has no keypoint head.
+    """
+    kps = getattr(result, "keypoints", None)
+    if kps is None or kps.xy is None:
+        return None, None
+    xy = kps.xy.cpu().numpy()
+    if xy.ndim != 3 or xy.shape[1] != 5:
+        return None, None
+    usable = np.isfinite(xy).all(axis=(1, 2)) & (xy > 0).all(axis=(1, 2))
+    if kps.conf is not None:
+        usable &= (kps.conf.cpu().numpy() >= MIN_KEYPOINT_CONF).all(axis=1)
+    return xy, usable
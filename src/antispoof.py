@@ -1,12 +1,18 @@
 # ...existing code...
-from ultralytics import YOLO
+import contextlib
+import threading
 import cv2
-import numpy as np
-from PIL import Image
+from src import metrics, model_registry
+
+# ultralytics models are not thread-safe; serialize predict calls on the shared model
+# (threads that must predict in parallel load a private instance instead)
+_predict_lock = threading.Lock()
+
 
 # Load YOLOv8 anti-spoofing model (real / fake)
 def load_antispoof_model():
     try:
+        from ultralytics import YOLO
         model = YOLO("models/anticheking.pt")
         print("[INFO] Anti-spoofing YOLO model loaded successfully.")
         return model
@@ -15,38 +21,66 @@ def load_antispoof_model():
         return None
 
 
-# Check if a face is real or fake
-def check_liveness(face_img, threshold=0.5):
+def get_antispoof_model():
+    """Return the shared anti-spoof model, loading it once per process (model_registry)."""
+    return model_registry.get("antispoof")
+
+
+def is_live(label, conf, threshold=0.5):
+    """Decision rule shared by all callers: only a confident 'fake' is rejected."""
+    return not (label == "fake" and conf > threshold)
+
+
+# Check a whole frame worth of faces in one predict call
+def check_liveness_batch(faces, model=None):
     """
-    Input: face_img (numpy array, BGR from OpenCV)
-    Output: True if real, False if fake
+    Input: faces (list of numpy arrays, BGR from OpenCV),
+           model: private anti-spoof instance owned by the calling thread
+           (default: the shared model, one predict call at a time)
+    Output: list of (label, confidence) per face, label is "real" / "fake",
+            or "unknown" with confidence 0.0 when nothing was detected
     """
-    model = load_antispoof_model()
+    if len(faces) == 0:
+        return []
+
+    shared = model is None
+    if shared:
+        model = get_antispoof_model()
     if model is None:
         print("[WARN] Anti-spoof disabled (model not loaded).")
-        return True  # fallback: allow if model not loaded
+        return [("unknown", 0.0)] * len(faces)  # fallback: allow if model not loaded
 
     try:
         # Convert to RGB because YOLO expects RGB input
-        img_rgb = cv2.cvtColor(face_img, cv2.COLOR_BGR2RGB)
-        results = model.predict(source=img_rgb, verbose=False)
+        imgs_rgb = [cv2.cvtColor(face, cv2.COLOR_BGR2RGB) for face in faces]
+        with _predict_lock if shared else contextlib.nullcontext(), metrics.timer("liveness"):
+            results = model.predict(source=imgs_rgb, verbose=False)
+        metrics.count_model_call("antispoof", len(imgs_rgb))
 
-        # Get label & confidence
-        names = results[0].names
-        boxes = results[0].boxes
+        out = []
+        for res in results:
+            names = res.names
+            boxes = res.boxes
+            if len(boxes) == 0:
+                out.append(("unknown", 0.0))  # if nothing detected, allow
+                continue
 
-        if len(boxes) == 0:
-            return True  # if nothing detected, allow
-
-        conf = boxes.conf.cpu().numpy()[0]
-        cls = int(boxes.cls.cpu().numpy()[0])
-        label = names[cls].lower()
-
-        if label == "fake" and conf > threshold:
-            return False
-        return True
+            conf = float(boxes.conf.cpu().numpy()[0])
+            cls = int(boxes.cls.cpu().numpy()[0])
+            out.append((names[cls].lower(), conf))
+        return out
 
     except Exception as e:
         print(f"[ERROR] Liveness check failed: {e}")
-        return True  # fallback: allow on unexpected error
+        return [("unknown", 0.0)] * len(faces)  # fallback: allow on unexpected error
+
+
+# Check if a face is real or fake
+def check_liveness(face_img, threshold=0.5):
+    """
+    Input: face_img (numpy array, BGR from OpenCV)
+    Output: True if real, False if fake
+    """
+    label, conf = check_liveness_batch([face_img])[0]
+    return is_live(label, conf, threshold)
 # ...existing code...
@@ -0,0 +1,280 @@
+import argparse
+import asyncio
+import hmac
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web
+
+from src import metrics
+from src.engine import EmbeddingError, FaceEngine, RECOGNIZE_THRESHOLD, VERIFY_THRESHOLD, decode_image
+from src.face_index import BACKENDS
+from src.gallery import BACKEND_ENV
+
+# ======================
+# Server Configuration
+# ======================
+HOST = "127.0.0.1"         # local only; put a reverse proxy (TLS, auth) in front to expose it
+PORT = 8000
+MAX_BATCH_IMAGES = 16       # images merged into one model call
+MAX_WAIT_MS = 5             # how long the first image of a batch waits for company
+ENGINE_WORKERS = 2          # batches processed concurrently (model stages overlap)
+MAX_UPLOAD_MB = 20
+ENROLL_TOKEN_ENV = "HRMS_API_ENROLL_TOKEN"  # /enroll requires "Authorization: Bearer <token>";
+                                           # unset = /enroll disabled
+
+
+class MicroBatcher:
+    """
+    Merge images from concurrent requests into one FaceEngine.analyze call.
+
+    A batch is dispatched when it reaches MAX_BATCH_IMAGES or when its first
+    image has waited MAX_WAIT_MS. Batches run on a small thread pool so the
+    event loop keeps accepting requests while the models work.
+    """
+
+    def __init__(self, engine, max_batch=MAX_BATCH_IMAGES, max_wait_ms=MAX_WAIT_MS, workers=ENGINE_WORKERS):
+        self.engine = engine
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hrms-engine")
+        self._queue = None
+        self._task = None
+        self._slots = None
+        self.batches = 0
+        self.images = 0
+
+    def start(self):
+        self._queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(self.workers)
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+        self._executor.shutdown(wait=True)
+
+    async def analyze(self, images):
+        """Analyze the images of one request (see FaceEngine.analyze)."""
+        loop = asyncio.get_running_loop()
+        futures = []
+        for img in images:
+            fut = loop.create_future()
+            self._queue.put_nowait((img, fut))
+            futures.append(fut)
+        return list(await asyncio.gather(*futures))
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._slots.acquire()
+            loop.create_task(self._dispatch(batch))
+
+    async def _dispatch(self, batch):
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self._executor, self.engine.analyze, [img for img, _ in batch])
+            self.batches += 1
+            self.images += len(batch)
+            for (_, fut), res in zip(batch, results):
+                if not fut.done():
+                    fut.set_result(res)
+        except Exception as e:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+        finally:
+            self._slots.release()
+
+
+# === App keys ===
+ENGINE_KEY = web.AppKey("engine", FaceEngine)
+BATCHER_KEY = web.AppKey("batcher", MicroBatcher)
+ENROLL_TOKEN_KEY = web.AppKey("enroll_token", str)
+
+
+# ===== Request helpers =====
+async def read_images(request):
+    """
+    Images of a request: a raw image body (Content-Type image/*) or a
+    multipart/form-data upload with one or more files. Form text fields are
+    returned as well.
+    """
+    images, fields = [], {}
+    if request.content_type.startswith("multipart/"):
+        reader = await request.multipart()
+        async for part in reader:
+            data = await part.read()
+            if part.filename is not None or (part.headers.get("Content-Type", "").startswith("image/")):
+                images.append(decode_image(data))
+            else:
+                fields[part.name] = data.decode("utf-8", errors="replace")
+    else:
+        images.append(decode_image(await request.read()))
+    return images, fields
+
+
+def param(request, fields, name, default=None):
+    return request.query.get(name, fields.get(name, default))
+
+
+def flag(value):
+    return str(value).lower() in ("1", "true", "yes", "on")
+
+
+def error(status, message):
+    return web.json_response({"error": message}, status=status)
+
+
+def threshold_param(request, fields, configured):
+    """
+    Optional client threshold; it may only be stricter than the configured one.
+    Output: (threshold, None) or (None, 400 response)
+    """
+    raw = param(request, fields, "threshold")
+    if raw is None:
+        return configured, None
+    try:
+        value = float(raw)
+    except ValueError:
+        return None, error(400, "threshold must be a number")
+    if not configured <= value <= 1.0:
+        return None, error(400, f"threshold must be between {configured} and 1.0")
+    return value, None
+
+
+async def analyze(request, images):
+    """Batched FaceEngine.analyze; Output: (analyzed, None) or (None, 503 response)"""
+    try:
+        return await request.app[BATCHER_KEY].analyze(images), None
+    except EmbeddingError as e:
+        print(f"[ERROR] {e}")
+        return None, error(503, "face embedding failed, please retry")
+
+
+def authorized(request, token):
+    header = request.headers.get("Authorization", "")
+    return header.startswith("Bearer ") and hmac.compare_digest(header[7:].encode(), token.encode())
+
+
+# ===== Handlers =====
+async def handle_recognize(request):
+    start = time.perf_counter()
+    images, fields = await read_images(request)
+    if not images or all(img is None for img in images):
+        return error(400, "no decodable image in request")
+    threshold, bad = threshold_param(request, fields, RECOGNIZE_THRESHOLD)
+    if bad is not None:
+        return bad
+    analyzed, failed = await analyze(request, images)
+    if failed is not None:
+        return failed
+    results = request.app[ENGINE_KEY].recognize(analyzed, threshold, log=flag(param(request, fields, "log", "0")))
+    return web.json_response({"results": results, "elapsed_ms": round((time.perf_counter() - start) * 1000, 2)})
+
+
+async def handle_verify(request):
+    start = time.perf_counter()
+    images, fields = await read_images(request)
+    if not images or all(img is None for img in images):
+        return error(400, "no decodable image in request")
+    threshold, bad = threshold_param(request, fields, VERIFY_THRESHOLD)
+    if bad is not None:
+        return bad
+    emp_id = param(request, fields, "employee_id")
+    analyzed, failed = await analyze(request, images)
+    if failed is not None:
+        return failed
+    results = request.app[ENGINE_KEY].verify(analyzed, emp_id, threshold, log=flag(param(request, fields, "log", "0")))
+    return web.json_response({"results": results, "elapsed_ms": round((time.perf_counter() - start) * 1000, 2)})
+
+
+async def handle_enroll(request):
+    token = request.app[ENROLL_TOKEN_KEY]
+    if not token:
+        return error(403, f"enrollment over HTTP is disabled (set {ENROLL_TOKEN_ENV})")
+    if not authorized(request, token):
+        return error(401, "missing or invalid enrollment token")
+    images, fields = await read_images(request)
+    emp_id = param(request, fields, "employee_id")
+    if not emp_id:
+        return error(400, "employee_id is required")
+    if not images or all(img is None for img in images):
+        return error(400, "no decodable image in request")
+    info = {k: param(request, fields, k) for k in ("name", "department", "position")}
+    analyzed, failed = await analyze(request, images)
+    if failed is not None:
+        return failed
+    engine = request.app[ENGINE_KEY]
+    result = await asyncio.get_running_loop().run_in_executor(None, engine.enroll, emp_id, analyzed, info)
+    return web.json_response(result, status=400 if "error" in result else 200)
+
+
+async def handle_metrics(request):
+    """Prometheus text exposition of stage latencies and model calls."""
+    return web.Response(text=metrics.prometheus_text(), content_type="text/plain", charset="utf-8")
+
+
+async def handle_health(request):
+    batcher = request.app[BATCHER_KEY]
+    return web.json_response({
+        "status": "ok",
+        "batches": batcher.batches,
+        "images": batcher.images,
+        "images_per_batch": round(batcher.images / max(batcher.batches, 1), 2),
+    })
+
+
+# ===== App =====
+def create_app(engine=None, warmup=True, enroll_token=None, **batch_kwargs):
+    engine = engine or FaceEngine()
+    app = web.Application(client_max_size=MAX_UPLOAD_MB * 1024 * 1024)
+    app[ENGINE_KEY] = engine
+    app[ENROLL_TOKEN_KEY] = enroll_token if enroll_token is not None else os.environ.get(ENROLL_TOKEN_ENV, "")
+    app[BATCHER_KEY] = MicroBatcher(engine, **batch_kwargs)
+
+    async def on_startup(app):
+        if warmup:
+            # keep models warm: load them before the first request arrives
+            await asyncio.get_running_loop().run_in_executor(None, engine.warmup)
+        app[BATCHER_KEY].start()
+
+    async def on_cleanup(app):
+        await app[BATCHER_KEY].stop()
+        engine.close()
+
+    app.on_startup.append(on_startup)
+    app.on_cleanup.append(on_cleanup)
+    app.router.add_post("/recognize", handle_recognize)
+    app.router.add_post("/verify", handle_verify)
+    app.router.add_post("/enroll", handle_enroll)
+    app.router.add_get("/health", handle_health)
+    app.router.add_get("/metrics", handle_metrics)
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless face recognition HTTP API")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH_IMAGES)
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS)
+    parser.add_argument("--workers", type=int, default=ENGINE_WORKERS)
+    parser.add_argument("--gallery-backend", choices=sorted(BACKENDS), help=f"overrides {BACKEND_ENV}")
+    args = parser.parse_args()
+    if args.gallery_backend:
+        os.environ[BACKEND_ENV] = args.gallery_backend
+    web.run_app(create_app(max_batch=args.max_batch, max_wait_ms=args.max_wait_ms, workers=args.workers),
+                host=args.host, port=args.port)
@@ -0,0 +1,106 @@
+import json
+import os
+
+# === ArcFace ONNX Runtime configuration ===
+# Values come from (lowest to highest priority): the defaults below,
+# config/arcface.json, then HRMS_ARCFACE_<FIELD> environment variables,
+# e.g. HRMS_ARCFACE_INTRA_OP_THREADS=8.
+CONFIG_PATH = os.path.join("config", "arcface.json")
+
+GRAPH_OPT_LEVELS = ("disable", "basic", "extended", "all")
+EXECUTION_MODES = ("sequential", "parallel")
+
+
+class ArcFaceConfig:
+    """Session options for the ArcFace embedding engine."""
+
+    FIELDS = {
+        "model_path": os.path.join("models", "w600k_r50.onnx"),
+        "providers": ["CPUExecutionProvider"],
+        "intra_op_threads": 0,             # 0 = ONNX Runtime default (all physical cores)
+        "inter_op_threads": 0,
+        "execution_mode": "sequential",    # "parallel" only helps models with independent branches
+        "graph_optimization": "all",       # disable / basic / extended / all
+        "enable_cpu_mem_arena": True,
+        "enable_mem_pattern": True,
+        "optimized_model_path": "",        # cache of the optimized graph ("" = off); with "all" the
+                                           # saved graph is CPU-specific, do not copy it between machines
+    }
+
+    def __init__(self, **overrides):
+        unknown = set(overrides) - set(self.FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown ArcFace config fields: {sorted(unknown)}")
+        for name, default in self.FIELDS.items():
+            setattr(self, name, overrides.get(name, default))
+        if self.graph_optimization not in GRAPH_OPT_LEVELS:
+            raise ValueError(f"graph_optimization must be one of {GRAPH_OPT_LEVELS}")
+        if self.execution_mode not in EXECUTION_MODES:
+            raise ValueError(f"execution_mode must be one of {EXECUTION_MODES}")
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    def replace(self, **changes):
+        return ArcFaceConfig(**dict(self.to_dict(), **changes))
+
+
+def _parse_env(name, default):
+    raw = os.environ[name]
+    if isinstance(default, bool):
+        return raw.strip().lower() in ("1", "true", "yes", "on")
+    if isinstance(default, int):
+        return int(raw)
+    if isinstance(default, list):
+        return [p.strip() for p in raw.split(",") if p.strip()]
+    return raw
+
+
+def load_arcface_config(path=CONFIG_PATH):
+    """Build the ArcFace config from config/arcface.json and HRMS_ARCFACE_* env vars."""
+    values = {}
+    if path and os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            values.update(json.load(f))
+    for name, default in ArcFaceConfig.FIELDS.items():
+        env = f"HRMS_ARCFACE_{name.upper()}"
+        if env in os.environ:
+            values[name] = _parse_env(env, default)
+    return ArcFaceConfig(**values)
+
+
+def create_session(config=None):
+    """
+    Create the ArcFace InferenceSession for a config.
+    With optimized_model_path set, the first run serializes the optimized
+    graph there; later runs load it directly and skip graph optimization.
+    """
+    import onnxruntime as ort
+
+    config = config or load_arcface_config()
+    opts = ort.SessionOptions()
+    opts.intra_op_num_threads = config.intra_op_threads
+    opts.inter_op_num_threads = config.inter_op_threads
+    opts.execution_mode = (ort.ExecutionMode.ORT_PARALLEL if config.execution_mode == "parallel"
+                           else ort.ExecutionMode.ORT_SEQUENTIAL)
+    opts.enable_cpu_mem_arena = config.enable_cpu_mem_arena
+    opts.enable_mem_pattern = config.enable_mem_pattern
+
+    levels = {
+        "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+        "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+        "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+        "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+    }
+    model_path = config.model_path
+    cached = config.optimized_model_path
+    if cached and os.path.exists(cached) and os.path.getmtime(cached) >= os.path.getmtime(model_path):
+        model_path = cached
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+    else:
+        opts.graph_optimization_level = levels[config.graph_optimization]
+        if cached:
+            os.makedirs(os.path.dirname(cached) or ".", exist_ok=True)
+            opts.optimized_model_filepath = cached
+
+    return ort.InferenceSession(model_path, sess_options=opts, providers=config.providers)
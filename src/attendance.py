@@ -1,82 +1,46 @@
-import os
-import csv
-import json
 from datetime import datetime
+from src.attendance_store import CSV_FIELDS, get_store
+from src.partitioned_log import ATTENDANCE_COLUMNS, ATTENDANCE_PARTS, attendance_log
+from src.gallery import get_gallery
+from src import embedding_store, metrics
 
 DB_PATH = "db/employees.json"
 ATTENDANCE_PATH = "logs/attendance.csv"
 
 
 def load_db():
-    """Load employees.json"""
-    if not os.path.exists(DB_PATH):
-        return {}
-    with open(DB_PATH, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-
-def init_csv():
-    """Tạo file attendance.csv nếu chưa có"""
-    if not os.path.exists(ATTENDANCE_PATH):
-        with open(ATTENDANCE_PATH, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=[
-                "Employee ID", "Full Name", "Department", "Position",
-                "Date", "CheckIn", "CheckOut"
-            ])
-            writer.writeheader()
+    """Load employees (legacy dict format)"""
+    return embedding_store.get_store(DB_PATH).to_dict()
 
 
 def log_attendance(emp_id):
     """Log attendance: lần đầu -> CheckIn, lần sau -> CheckOut"""
-    init_csv()
-    db = load_db()
-
-    if str(emp_id) not in db:
+    emp = get_gallery(DB_PATH).lookup(emp_id)
+    if emp is None:
         print(f"[WARN] Employee {emp_id} không có trong database.")
         return
 
-    emp = db[str(emp_id)]
-    date_str = datetime.now().strftime("%Y-%m-%d")
-    time_str = datetime.now().strftime("%H:%M:%S")
-
-    rows = []
-    found = False
-
-    # đọc tất cả record hiện tại
-    with open(ATTENDANCE_PATH, "r", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            # nếu đã có CheckIn cho hôm nay, thì lần này cập nhật CheckOut
-            if row["Employee ID"] == str(emp_id) and row["Date"] == date_str:
-                if row["CheckOut"] == "":
-                    row["CheckOut"] = time_str
-                    print(f"[INFO] {emp['name']} đã CheckOut lúc {time_str}")
-                found = True
-            rows.append(row)
+    now = datetime.now()
+    date_str = now.strftime("%Y-%m-%d")
+    time_str = now.strftime("%H:%M:%S")
 
-    # nếu chưa có record hôm nay -> thêm CheckIn mới
-    if not found:
-        new_row = {
-            "Employee ID": emp_id,
-            "Full Name": emp["name"],
-            "Department": emp["department"],
-            "Position": emp["position"],
-            "Date": date_str,
-            "CheckIn": time_str,
-            "CheckOut": ""
-        }
-        rows.append(new_row)
+    # một lệnh INSERT/UPDATE theo index (employee_id, date), không ghi lại toàn bộ file
+    with metrics.timer("logging"):
+        event = get_store(legacy_csv=ATTENDANCE_PATH).record(
+            emp_id, emp["name"], emp["department"], emp["position"], date_str, time_str
+        )
+    if event == "CheckIn":
         print(f"[INFO] {emp['name']} đã CheckIn lúc {time_str}")
-
-    # ghi lại tất cả record
-    with open(ATTENDANCE_PATH, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=[
-            "Employee ID", "Full Name", "Department", "Position",
-            "Date", "CheckIn", "CheckOut"
-        ])
-        writer.writeheader()
-        writer.writerows(rows)
-
-
-
-
+    elif event == "CheckOut":
+        print(f"[INFO] {emp['name']} đã CheckOut lúc {time_str}")
+
+
+def export_csv(parts_root=ATTENDANCE_PARTS):
+    """
+    Xuất toàn bộ lịch sử ra logs/attendance.csv (cùng các cột như trước):
+    các ngày đã lưu trữ trong partitions + các ngày còn trong SQLite
+    """
+    log = attendance_log(parts_root)
+    df = log.read().sort_values(["date", "check_in"], kind="stable")
+    archived = (dict(zip(CSV_FIELDS, rec)) for rec in df[list(ATTENDANCE_COLUMNS)].itertuples(index=False, name=None))
+    get_store(legacy_csv=ATTENDANCE_PATH).export_csv(ATTENDANCE_PATH, archived, log.last_date())
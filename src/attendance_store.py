@@ -0,0 +1,165 @@
+import os
+import csv
+import sqlite3
+import threading
+
+STORE_PATH = "logs/attendance.db"
+CSV_FIELDS = [
+    "Employee ID", "Full Name", "Department", "Position",
+    "Date", "CheckIn", "CheckOut"
+]
+
+
+class AttendanceStore:
+    """
+    SQLite attendance store keyed by (employee_id, date).
+
+    A check-in/out is a single indexed INSERT or UPDATE instead of a rewrite
+    of the whole CSV history. WAL journaling keeps every committed event on
+    disk if the process crashes mid-write.
+    """
+
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS attendance (
+                    employee_id TEXT NOT NULL,
+                    full_name   TEXT,
+                    department  TEXT,
+                    position    TEXT,
+                    date        TEXT NOT NULL,
+                    check_in    TEXT NOT NULL,
+                    check_out   TEXT NOT NULL DEFAULT '',
+                    PRIMARY KEY (employee_id, date)
+                )
+                """
+            )
+            # date range scans for reports
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_attendance_date ON attendance (date)")
+
+    def record(self, emp_id, name, department, position, date_str, time_str):
+        """
+        First event of the day -> CheckIn, second -> CheckOut, later ones ignored.
+        Output: "CheckIn", "CheckOut" or None
+        """
+        emp_id = str(emp_id)
+        with self._lock, self._conn:
+            cur = self._conn.execute(
+                "INSERT OR IGNORE INTO attendance "
+                "(employee_id, full_name, department, position, date, check_in) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (emp_id, name, department, position, date_str, time_str),
+            )
+            if cur.rowcount:
+                return "CheckIn"
+            cur = self._conn.execute(
+                "UPDATE attendance SET check_out = ? "
+                "WHERE employee_id = ? AND date = ? AND check_out = ''",
+                (time_str, emp_id, date_str),
+            )
+            return "CheckOut" if cur.rowcount else None
+
+    def rows(self):
+        """Iterate all records as dicts with the legacy CSV column names."""
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT employee_id, full_name, department, position, date, check_in, check_out "
+                "FROM attendance ORDER BY date, check_in"
+            )
+            records = cur.fetchall()
+        for rec in records:
+            yield dict(zip(CSV_FIELDS, rec))
+
+    def days(self, before=None):
+        """Distinct dates in the store (only those < before if given), oldest first."""
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT DISTINCT date FROM attendance WHERE date < ? ORDER BY date",
+                (before or "9999-99-99",),
+            )
+            return [row[0] for row in cur.fetchall()]
+
+    def rows_for(self, date_str):
+        """Records of one day as tuples in table column order."""
+        with self._lock:
+            cur = self._conn.execute(
+                "SELECT employee_id, full_name, department, position, date, check_in, check_out "
+                "FROM attendance WHERE date = ?",
+                (date_str,),
+            )
+            return cur.fetchall()
+
+    def delete_day(self, date_str):
+        """Drop one day (after it was archived to partitions, see src/partitioned_log.py)."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM attendance WHERE date = ?", (date_str,))
+
+    def export_csv(self, csv_path, archived=(), archived_until=None):
+        """
+        Write csv_path in the original attendance.csv format.
+        Closed days moved to partitions (src/partitioned_log.archive_attendance)
+        are no longer in this store: pass them as `archived` (CSV-field dicts,
+        oldest first) and their last date as archived_until, otherwise only the
+        open days are exported. Store rows up to archived_until are skipped
+        (left behind by an interrupted archive, already in `archived`).
+        """
+        os.makedirs(os.path.dirname(csv_path) or ".", exist_ok=True)
+        tmp_path = csv_path + ".tmp"
+        with open(tmp_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+            writer.writeheader()
+            writer.writerows(archived)
+            writer.writerows(row for row in self.rows() if archived_until is None or row["Date"] > archived_until)
+        os.replace(tmp_path, csv_path)
+
+    def import_csv(self, csv_path):
+        """One-time import of a legacy attendance.csv (existing rows are kept)."""
+        if not os.path.exists(csv_path):
+            return 0
+        with open(csv_path, "r", encoding="utf-8") as f:
+            rows = [
+                (
+                    str(row["Employee ID"]), row["Full Name"], row["Department"], row["Position"],
+                    row["Date"], row["CheckIn"], row.get("CheckOut") or "",
+                )
+                for row in csv.DictReader(f)
+            ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO attendance "
+                "(employee_id, full_name, department, position, date, check_in, check_out) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+        return len(rows)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(path=STORE_PATH, legacy_csv=None):
+    """Process-wide store for `path`, importing legacy_csv when that database is first created."""
+    key = os.path.abspath(path)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            is_new = not os.path.exists(path)
+            store = AttendanceStore(path)
+            if is_new and legacy_csv:
+                n = store.import_csv(legacy_csv)
+                if n:
+                    print(f"[INFO] Imported {n} attendance rows from {legacy_csv}")
+            _stores[key] = store
+        return store
@@ -0,0 +1,151 @@
+import queue
+import threading
+import time
+
+_STOP = object()
+
+
+class BackgroundWriter:
+    """
+    Bounded background worker for side effects (CSV/DB logging, snapshots).
+
+    The capture loops enqueue callables instead of running them inline, so
+    JPEG encoding and file writes never stall frame processing. The queue is
+    bounded. submit() is for records (attendance / access logs): it waits
+    for a free slot and never drops. submit_droppable() is for best-effort
+    work (snapshots): it waits at most `put_timeout` seconds and then drops
+    the item with a warning. Items are executed in batches of up to
+    `batch_size`, after which the optional `on_flush` hooks run once.
+    Submitting and closing share one lock, so nothing is enqueued behind the
+    stop marker; after close() submit() runs the call inline.
+    """
+
+    def __init__(self, maxsize=256, batch_size=16, put_timeout=0.05, name="hrms-writer"):
+        self.batch_size = batch_size
+        self.put_timeout = put_timeout
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._flush_hooks = []
+        self._lock = threading.Lock()
+        self._submit_lock = threading.Lock()    # _closed + enqueue, shared with close()
+        self._counters = {"submitted": 0, "processed": 0, "dropped": 0, "failed": 0, "batches": 0}
+        self._max_depth = 0
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self._counters[key] += n
+
+    def on_flush(self, hook):
+        """Register a callable run after every executed batch."""
+        self._flush_hooks.append(hook)
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Enqueue fn(*args, **kwargs), waiting as long as needed for a free slot.
+        After close() the call runs inline, so records are never lost.
+        """
+        with self._submit_lock:
+            if not self._closed:
+                self._queue.put((fn, args, kwargs))
+                self._count_submit()
+                return True
+        fn(*args, **kwargs)
+        return True
+
+    def submit_droppable(self, fn, *args, **kwargs):
+        """Enqueue best-effort work. Returns False (and warns) if the item was dropped."""
+        with self._submit_lock:
+            if self._closed:
+                reason = "writer closed"
+            else:
+                try:
+                    self._queue.put((fn, args, kwargs), timeout=self.put_timeout)
+                    self._count_submit()
+                    return True
+                except queue.Full:
+                    reason = "queue full"
+        self._drop(fn, reason)
+        return False
+
+    def _count_submit(self):
+        with self._lock:
+            self._counters["submitted"] += 1
+            self._max_depth = max(self._max_depth, self._queue.qsize())
+
+    def _drop(self, fn, reason):
+        with self._lock:
+            self._counters["dropped"] += 1
+            dropped = self._counters["dropped"]
+        print(f"[WARN] Dropped background task {getattr(fn, '__name__', fn)} ({reason}, {dropped} dropped so far)")
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            batch = [item]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stop = any(entry is _STOP for entry in batch)
+            if stop:
+                # nothing can be queued after the marker, but run anything behind it anyway
+                while True:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+            for entry in batch:
+                if entry is _STOP:
+                    continue
+                fn, args, kwargs = entry
+                try:
+                    fn(*args, **kwargs)
+                    self._count("processed")
+                except Exception as e:
+                    self._count("failed")
+                    print(f"[WARN] Background task {getattr(fn, '__name__', fn)} failed: {e}")
+
+            for hook in self._flush_hooks:
+                try:
+                    hook()
+                except Exception as e:
+                    print(f"[WARN] Background flush failed: {e}")
+            self._count("batches")
+
+            for _ in batch:
+                self._queue.task_done()
+            if stop:
+                return
+
+    def drain(self, timeout=None):
+        """Block until everything queued so far has been executed."""
+        deadline = None if timeout is None else time.time() + timeout
+        while self._queue.unfinished_tasks:
+            if deadline is not None and time.time() >= deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def close(self, timeout=10.0):
+        """Stop accepting work, execute what is queued and join the worker."""
+        with self._submit_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            print(f"[WARN] Background writer still busy after {timeout}s; "
+                  f"{self._queue.qsize()} queued task(s) may not be executed")
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats["max_depth"] = self._max_depth
+        stats["queue_depth"] = self._queue.qsize()
+        return stats
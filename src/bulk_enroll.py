@@ -0,0 +1,194 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+import numpy as np
+import pandas as pd
+
+from src.embedding_store import get_store
+from src.face_index import select_templates
+
+# === Paths ===
+CSV_PATH = "db/data_employee.csv"
+DB_PATH = "db/employees.json"
+IMG_DIR = "data/employees"                     # data/employees/<emp_id>/*.jpg
+STATE_PATH = "db/bulk_enroll_state.json"       # folder content hash per employee
+
+# === Batch Configuration ===
+NUM_TEMPLATES = 5      # templates kept per employee (same as live enrollment)
+BATCH_SIZE = 16        # images per detector / ArcFace call
+IMAGE_EXTS = (".jpg", ".jpeg", ".png")
+
+
+def folder_hash(paths):
+    """Content hash of an image folder (file names + bytes), order independent."""
+    h = hashlib.sha1()
+    for path in sorted(paths):
+        h.update(os.path.basename(path).encode("utf-8"))
+        with open(path, "rb") as f:
+            h.update(hashlib.sha1(f.read()).digest())
+    return h.hexdigest()
+
+
+def list_images(emp_dir):
+    return sorted(p for p in glob.glob(os.path.join(emp_dir, "*")) if p.lower().endswith(IMAGE_EXTS))
+
+
+def _load_state():
+    if os.path.exists(STATE_PATH):
+        with open(STATE_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    return {}
+
+
+def _save_state(state):
+    tmp_path = STATE_PATH + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=4)
+    os.replace(tmp_path, STATE_PATH)
+
+
+# ===== Worker side (runs in the process pool) =====
+def _init_worker(threads):
+    """Split the cores between workers instead of every ArcFace session using all of them."""
+    os.environ.setdefault("HRMS_ARCFACE_INTRA_OP_THREADS", str(threads))
+
+
+def _largest_face(img, result):
+    """Aligned chip of the largest detected face (None if no face was found)."""
+    from src.detect_faces import extract_faces
+    faces, _, chips = extract_faces(img, [result])
+    if not faces:
+        return None
+    best = max(range(len(faces)), key=lambda i: faces[i].shape[0] * faces[i].shape[1])
+    return chips[best]
+
+
+def embed_folder(emp_id, paths, batch_size=BATCH_SIZE, num_templates=NUM_TEMPLATES):
+    """
+    Detect + embed every image of one employee in batches. Unreadable images
+    and images without a detected face are skipped, never embedded whole.
+    Output: (emp_id, templates (K, 512) or None, images read, faces embedded,
+             [(path, reason)] of skipped images)
+    """
+    # models are loaded once per worker process, on its first task
+    from src.detect_faces import get_detector
+    from src.extract_embeddings import get_embeddings
+    yolo = get_detector()
+
+    embeddings, n_read, skipped = [], 0, []
+    for start in range(0, len(paths), batch_size):
+        batch = []
+        for path in paths[start:start + batch_size]:
+            img = cv2.imread(path)
+            if img is None or img.size == 0:
+                skipped.append((path, "unreadable"))
+            else:
+                batch.append((path, img))
+        n_read += len(batch)
+        if not batch:
+            continue
+        results = yolo([img for _, img in batch], verbose=False)
+        faces = []
+        for (path, img), r in zip(batch, results):
+            face = _largest_face(img, r)
+            if face is None:
+                skipped.append((path, "no face detected"))
+            else:
+                faces.append(face)
+        embs = get_embeddings(faces) if faces else None
+        if embs is not None:
+            embeddings.extend(e for e in embs if np.isfinite(e).all())
+
+    if not embeddings:
+        return emp_id, None, n_read, 0, skipped
+    return emp_id, select_templates(embeddings, num_templates), n_read, len(embeddings), skipped
+
+
+# ===== Main bulk enrollment =====
+def bulk_enroll(emp_ids=None, department=None, workers=None, force=False):
+    """
+    Enroll employees from data/employees/<id>/ image folders.
+    - emp_ids / department: optional filters on db/data_employee.csv
+    - folders whose content hash is unchanged since the last run are skipped
+      (force=True re-enrolls them)
+    - all embeddings are written to the store in one committed version
+    """
+    df = pd.read_csv(CSV_PATH)
+    if department:
+        df = df[df["Department"] == department]
+    if emp_ids:
+        df = df[df["Employee ID"].astype(str).isin({str(e) for e in emp_ids})]
+
+    state = _load_state()
+    jobs, info, hashes = [], {}, {}
+    for _, row in df.iterrows():
+        emp_id = str(row["Employee ID"])
+        paths = list_images(os.path.join(IMG_DIR, emp_id))
+        if not paths:
+            continue
+        digest = folder_hash(paths)
+        if not force and state.get(emp_id) == digest:
+            continue
+        jobs.append((emp_id, paths))
+        hashes[emp_id] = digest
+        info[emp_id] = {
+            "name": str(row["Full Name"]),
+            "department": str(row["Department"]),
+            "position": str(row["Position"]),
+        }
+
+    if not jobs:
+        print("[INFO] Nothing to enroll (no new or changed image folders).")
+        return 0
+
+    total_images = sum(len(p) for _, p in jobs)
+    print(f"[INFO] Bulk enrolling {len(jobs)} employees ({total_images} images) "
+          f"with {workers or os.cpu_count()} workers...")
+
+    items, n_read, n_faces, n_skipped = [], 0, 0, 0
+    start = time.perf_counter()
+    threads = max(1, (os.cpu_count() or 1) // (workers or os.cpu_count() or 1))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(threads,)) as pool:
+        futures = [pool.submit(embed_folder, emp_id, paths) for emp_id, paths in jobs]
+        for fut in as_completed(futures):
+            try:
+                emp_id, templates, read, used, skipped = fut.result()
+            except Exception as e:
+                print(f"[ERROR] Bulk enrollment worker failed: {e}")
+                continue
+            n_read += read
+            n_faces += used
+            n_skipped += len(skipped)
+            for path, reason in skipped:
+                print(f"[WARN] Skipped {path} ({reason})")
+            if templates is None:
+                print(f"[WARN] No usable faces for employee {emp_id}.")
+                hashes.pop(emp_id, None)
+                continue
+            items.append((emp_id, info[emp_id], templates))
+    elapsed = time.perf_counter() - start
+
+    # one transaction for the whole batch
+    get_store(DB_PATH).upsert_many(items)
+    state.update({emp_id: hashes[emp_id] for emp_id, _, _ in items})
+    _save_state(state)
+
+    print(f"[INFO] Enrolled {len(items)} employees from {n_read} images "
+          f"({n_faces} faces, {n_skipped} images skipped) in {elapsed:.1f}s — {n_read / max(elapsed, 1e-9):.1f} images/s")
+    return len(items)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline bulk enrollment from data/employees/<id>/ folders")
+    parser.add_argument("--ids", nargs="*", help="only these employee IDs")
+    parser.add_argument("--department", help="only employees of this department")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--force", action="store_true", help="re-enroll unchanged folders too")
+    args = parser.parse_args()
+    bulk_enroll(args.ids, args.department, args.workers, args.force)
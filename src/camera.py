@@ -0,0 +1,109 @@
+import os
+import threading
+import time
+from collections import deque
+
+import cv2
+
+from src import metrics
+
+
+class FpsMeter:
+    """Rolling frames-per-second over the last `window` seconds."""
+
+    def __init__(self, window=2.0):
+        self.window = window
+        self._stamps = deque()
+        self._lock = threading.Lock()
+
+    def tick(self, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            self._stamps.append(now)
+            while self._stamps and now - self._stamps[0] > self.window:
+                self._stamps.popleft()
+
+    def fps(self):
+        with self._lock:
+            if len(self._stamps) < 2:
+                return 0.0
+            span = self._stamps[-1] - self._stamps[0]
+            return (len(self._stamps) - 1) / span if span > 0 else 0.0
+
+
+class LatestFrameCapture:
+    """
+    Camera reader running on its own thread that keeps only the newest frame.
+
+    Reading the driver as fast as it delivers means frames never pile up in
+    the capture buffer; consumers always get the most recent frame and any
+    frame they were too slow for is simply overwritten (counted as skipped
+    by the consumer through the sequence number).
+    """
+
+    def __init__(self, source=0, pace=None):
+        self.source = source
+        self.cap = cv2.VideoCapture(source)
+        # video files are replayed at their own frame rate (like a live camera)
+        self.pace = os.path.isfile(str(source)) if pace is None else pace
+        self.fps = FpsMeter()
+        self._frame = None
+        self._seq = 0
+        self._stamp = 0.0
+        self._cond = threading.Condition()
+        self._running = False
+        self._thread = None
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="hrms-capture", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        interval = 1.0 / (self.cap.get(cv2.CAP_PROP_FPS) or 30.0) if self.pace else 0.0
+        next_at = time.time()
+        while self._running:
+            with metrics.timer("capture"):
+                ret, frame = self.cap.read()
+            if not ret:
+                break
+            if interval:
+                next_at += interval
+                time.sleep(max(0.0, next_at - time.time()))
+            now = time.time()
+            self.fps.tick(now)
+            with self._cond:
+                self._frame = frame
+                self._seq += 1
+                self._stamp = now
+                self._cond.notify_all()
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+    @property
+    def running(self):
+        return self._running
+
+    def latest(self):
+        """Return (seq, timestamp, frame) of the newest frame without waiting."""
+        with self._cond:
+            return self._seq, self._stamp, self._frame
+
+    def wait_newer(self, seq, timeout=1.0):
+        """Block until a frame newer than `seq` arrives. Returns (seq, ts, frame) or None."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > seq or not self._running, timeout)
+            if self._seq <= seq:
+                return None
+            return self._seq, self._stamp, self._frame
+
+    def stop(self):
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+        self.cap.release()
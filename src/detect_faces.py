@@ -1,28 +1,146 @@
+import threading
 import cv2
-from ultralytics import YOLO
+import numpy as np
+from src import metrics, model_registry
+from src.align import ALIGN_FACES, align_faces, result_keypoints
+
+# the shared YOLO instance is not thread-safe (several cameras / API requests)
+_detect_lock = threading.Lock()
+
+
+def get_detector():
+    """YOLO face detector, loaded once per process on first use (model_registry)."""
+    return model_registry.get("yolo_face")
+
+
+def __getattr__(name):
+    # backward compatible `from src.detect_faces import yolo` (loads lazily)
+    if name == "yolo":
+        return get_detector()
+    raise AttributeError(name)
+
+
+# === Detection Configuration ===
+DETECT_IMGSZ = 640          # YOLO input size (smaller = faster, fewer small/far faces)
+DETECT_ROI = None           # (x1, y1, x2, y2) as fractions of the frame, e.g. (0.25, 0.0, 0.75, 1.0)
+DETECT_MAX_SIDE = 640       # downscale the (ROI) frame to this longest side before detection
+                            # (None = full resolution); boxes are mapped back to the full frame
+
+
+def detect(frame, imgsz=DETECT_IMGSZ, roi=DETECT_ROI, max_side=DETECT_MAX_SIDE):
+    """
+    Chạy YOLO trên vùng ROI đã thu nhỏ của frame.
+    Output: (xyxy (N, 4), keypoints (N, 5, 2) hoặc None, usable (N,) hoặc None),
+            toạ độ theo frame gốc để crop ở độ phân giải đầy đủ
+    """
+    return detect_batch([frame], imgsz, roi, max_side)[0]
+
+
+def detect_batch(frames, imgsz=DETECT_IMGSZ, roi=DETECT_ROI, max_side=DETECT_MAX_SIDE):
+    """
+    Như detect() cho nhiều frame (vd. nhiều camera) trong một lần gọi YOLO.
+    Output: list (xyxy, keypoints, usable) theo thứ tự frames
+    """
+    if len(frames) == 0:
+        return []
+    regions, transforms = [], []
+    for frame in frames:
+        h, w = frame.shape[:2]
+        x0, y0 = 0, 0
+        region = frame
+        if roi is not None:
+            x0, y0 = int(roi[0] * w), int(roi[1] * h)
+            region = frame[y0:int(roi[3] * h), x0:int(roi[2] * w)]
+
+        scale = 1.0
+        if max_side and max(region.shape[:2]) > max_side:
+            scale = max_side / max(region.shape[:2])
+            region = cv2.resize(region, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        regions.append(region)
+        transforms.append((scale, np.array([x0, y0], dtype=np.float32)))
+
+    out = []
+    with _detect_lock, metrics.timer("detection"):
+        results = get_detector()(regions, imgsz=imgsz, verbose=False)
+    metrics.count_model_call("yolo_face", len(regions))
+    for result, (scale, offset) in zip(results, transforms):
+        xyxy, kps, usable = result_arrays(result)
+        xyxy = xyxy / scale + np.tile(offset, 2)
+        if kps is not None:
+            kps = kps / scale + offset
+        out.append((xyxy, kps, usable))
+    return out
+
+
+def result_arrays(result, align=ALIGN_FACES):
+    """Boxes (N, 4) and, if available, keypoints (N, 5, 2) + usable mask of one YOLO result."""
+    xyxy = result.boxes.xyxy.cpu().numpy()
+    kps, usable = result_keypoints(result) if align else (None, None)
+    return xyxy, kps, usable
+
+
+def crop_faces(frame, xyxy, kps=None, usable=None, align=ALIGN_FACES):
+    """
+    Cắt khuôn mặt của một frame theo box (và keypoint nếu có).
+    Output: (faces, boxes, chips)
+      - faces: crop theo bounding box (anti-spoofing, snapshot)
+      - boxes: (x1, y1, x2, y2) của từng crop
+      - chips: ảnh đưa vào ArcFace — ảnh 112x112 đã căn chỉnh theo 5 keypoint
+               nếu detector có keypoint, nếu không thì chính là crop
+    """
+    faces, boxes, chips, keep = [], [], [], []
+    for j, box in enumerate(xyxy):
+        x1, y1, x2, y2 = map(int, box[:4])
+        face = frame[max(y1, 0):y2, max(x1, 0):x2]
+        if face.size <= 0:
+            continue
+        faces.append(face)
+        boxes.append((x1, y1, x2, y2))
+        chips.append(face)
+        keep.append((len(chips) - 1, j))
+
+    # one batched warp for every face of the frame that has keypoints
+    aligned = [(slot, j) for slot, j in keep if align and kps is not None and usable[j]]
+    if aligned:
+        warped = align_faces(frame, kps[[j for _, j in aligned]])
+        for (slot, _), chip in zip(aligned, warped):
+            chips[slot] = chip
+    return faces, boxes, chips
+
+
+def extract_faces(frame, results, align=ALIGN_FACES):
+    """
+    Cắt khuôn mặt từ kết quả YOLO (chạy trên chính frame này).
+    Output: (faces, boxes, chips) như crop_faces
+    """
+    faces, boxes, chips = [], [], []
+    for r in results:
+        f, b, c = crop_faces(frame, *result_arrays(r, align), align=align)
+        faces += f
+        boxes += b
+        chips += c
+    return faces, boxes, chips
 
-#load my model yolo
-yolo = YOLO("models/yolov8n-face-lindevs.pt")
 
 def detect_and_crop_faces(frame):
     """
     Detect khuôn mặt trong frame và trả về list ảnh khuôn mặt crop
     """
-    results = yolo(frame)  # YOLO inference
-    faces = []
+    results = get_detector()(frame)  # YOLO inference
+    return extract_faces(frame, results, align=False)[0]
 
-    for r in results:
-        boxes = r.boxes.xyxy.cpu().numpy()  # bounding boxes [x1,y1,x2,y2]
-        for box in boxes:
-            x1, y1, x2, y2 = map(int, box[:4])
-            face = frame[y1:y2, x1:x2]
-            if face.size > 0:
-                faces.append(face)
 
-    return faces
+def detect_and_align_faces(frame):
+    """
+    Như detect_and_crop_faces, nhưng trả về (faces, chips):
+    crop để lưu ảnh và chip đã căn chỉnh để trích embedding
+    """
+    faces, _, chips = crop_faces(frame, *detect(frame))
+    return faces, chips
 
 
 if __name__ == "__main__":
+    yolo = get_detector()
     cap = cv2.VideoCapture(0)
     while True:
         ret, frame = cap.read()
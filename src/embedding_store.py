@@ -0,0 +1,301 @@
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:     # Windows: no inter-process lock, single writer process assumed
+    fcntl = None
+
+# ======================
+# Store Configuration
+# ======================
+EMBEDDING_DIM = 512
+DEFAULT_DTYPE = "float32"   # or "float16" to halve the file size
+INITIAL_CAPACITY = 256      # rows preallocated in a new embeddings file
+REUSE_GRACE_S = 60.0        # freed rows are reused only after a later version and this long,
+                            # so readers still mapping the previous version never see them change
+
+_VERSION_RE = re.compile(rb'^\{"version":(\d+),')
+
+
+def _atomic_write_json(path, data):
+    tmp_path = path + ".tmp"
+    data = {"version": data["version"], **data}     # first key, so stamp() reads only the head
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class EmbeddingStore:
+    """
+    Compact employee embedding store.
+
+    For a logical database path like "db/employees.json" two files are kept:
+    - db/employees.meta.json : small metadata table (name, department,
+      position and the embedding row(s) of each employee, plus a version),
+    - db/employees.emb       : raw preallocated (capacity, 512) float32/float16
+      rows, memory-mapped by readers and grown in place by extending the file.
+
+    Updates are copy-on-write: new vectors always go to rows the committed
+    metadata does not reference, then the metadata file is swapped in with
+    os.replace. A crash at any point leaves the previous version intact.
+    Rows released by a version stay "pending" until a later version has been
+    committed and REUSE_GRACE_S has passed, because readers may still map
+    the previous version. Writers from different processes (enroll,
+    bulk_enroll, the API) serialize on an flock of db/employees.lock.
+    The legacy JSON file is migrated once, the first time the store opens.
+    """
+
+    def __init__(self, json_path, dtype=DEFAULT_DTYPE, dim=EMBEDDING_DIM):
+        base = os.path.splitext(json_path)[0]
+        self.json_path = json_path
+        self.meta_path = base + ".meta.json"
+        self.emb_path = base + ".emb"
+        self.lock_path = base + ".lock"
+        self.dtype = dtype
+        self.dim = dim
+        self._lock = threading.Lock()
+        if not os.path.exists(self.meta_path) and os.path.exists(json_path):
+            self.migrate_json(json_path)
+        elif os.path.exists(self.meta_path) and self._head_version() is None:
+            # metadata written before the version moved to the head: rewrite it once
+            with self._write_lock():
+                _atomic_write_json(self.meta_path, self.load_meta())
+
+    # ===== Reading =====
+    def _head_version(self):
+        with open(self.meta_path, "rb") as f:
+            m = _VERSION_RE.match(f.read(64))
+        return int(m.group(1)) if m else None
+
+    def stamp(self):
+        """Committed version number (None if the store is empty), used for reload checks."""
+        try:
+            version = self._head_version()
+        except FileNotFoundError:
+            return None
+        return version if version is not None else self.load_meta()["version"]
+
+    def load_meta(self):
+        if not os.path.exists(self.meta_path):
+            return {"version": 0, "dim": self.dim, "dtype": self.dtype,
+                    "size": 0, "free": [], "pending": [], "employees": {}}
+        with open(self.meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def open_embeddings(self, meta=None, mode="r"):
+        """Memory map of the embeddings file, shape (capacity, dim) (None if empty)."""
+        meta = meta or self.load_meta()
+        if not os.path.exists(self.emb_path):
+            return None
+        dtype = np.dtype(meta["dtype"])
+        capacity = os.path.getsize(self.emb_path) // (meta["dim"] * dtype.itemsize)
+        if capacity == 0:
+            return None
+        return np.memmap(self.emb_path, dtype=dtype, mode=mode, shape=(capacity, meta["dim"]))
+
+    def records(self):
+        """Employee metadata keyed by id (without embeddings)."""
+        return self.load_meta()["employees"]
+
+    def snapshot(self):
+        """
+        Consistent view of the store.
+        Output: (meta, ids, row_owner, matrix) where matrix is (R, dim) float32
+        holding every enrolled row and row_owner[i] indexes into ids.
+        When the used rows are a contiguous prefix of a float32 file the
+        matrix is a zero-copy view of the memory map. Raises FileNotFoundError
+        / ValueError when the metadata references rows the .emb file lacks.
+        """
+        meta = self.load_meta()
+        ids, owner, rows = [], [], []
+        for emp_id, rec in meta["employees"].items():
+            for row in rec["rows"]:
+                owner.append(len(ids))
+                rows.append(row)
+            ids.append(emp_id)
+
+        if not rows:
+            return meta, [], np.empty(0, dtype=np.int64), np.empty((0, self.dim), dtype=np.float32)
+        mm = self.open_embeddings(meta)
+        if mm is None:
+            raise FileNotFoundError(f"Embedding file {self.emb_path} is missing or empty "
+                                    f"but {self.meta_path} lists {len(rows)} rows")
+        if max(rows) >= len(mm):
+            raise ValueError(f"Embedding file {self.emb_path} has {len(mm)} rows, "
+                             f"{self.meta_path} references row {max(rows)}")
+
+        rows = np.asarray(rows, dtype=np.int64)
+        owner = np.asarray(owner, dtype=np.int64)
+        order = np.argsort(rows, kind="stable")
+        rows, owner = rows[order], owner[order]
+        if rows[0] == 0 and rows[-1] == len(rows) - 1 and mm.dtype == np.float32:
+            matrix = mm[:len(rows)]
+        else:
+            matrix = np.asarray(mm[rows], dtype=np.float32)
+        return meta, ids, owner, matrix
+
+    def to_dict(self):
+        """Legacy {emp_id: {..., "embedding": [...]}} view (first template per employee)."""
+        meta = self.load_meta()
+        mm = self.open_embeddings(meta)
+        out = {}
+        for emp_id, rec in meta["employees"].items():
+            info = {k: v for k, v in rec.items() if k != "rows"}
+            info["embedding"] = np.asarray(mm[rec["rows"][0]], dtype=np.float32).tolist()
+            out[emp_id] = info
+        return out
+
+    # ===== Writing =====
+    @contextmanager
+    def _write_lock(self):
+        """Exclusive across threads (self._lock) and processes (flock on the lock file)."""
+        with self._lock:
+            if fcntl is None:
+                yield
+                return
+            os.makedirs(os.path.dirname(self.lock_path) or ".", exist_ok=True)
+            with open(self.lock_path, "a") as f:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    @staticmethod
+    def _release_rows(meta, rows, now=None):
+        """Queue rows dropped by the version about to be committed; free the ones past their grace."""
+        now = time.time() if now is None else now
+        free, pending = list(meta["free"]), []
+        for version, freed_at, old_rows in meta.get("pending", []):
+            if version < meta["version"] and now - freed_at >= REUSE_GRACE_S:
+                free.extend(old_rows)
+            else:
+                pending.append([version, freed_at, old_rows])
+        if rows:
+            pending.append([meta["version"] + 1, now, list(rows)])
+        meta["free"] = sorted(free)
+        meta["pending"] = pending
+
+    def _ensure_capacity(self, needed, meta):
+        row_bytes = meta["dim"] * np.dtype(meta["dtype"]).itemsize
+        current = os.path.getsize(self.emb_path) // row_bytes if os.path.exists(self.emb_path) else 0
+        if current >= needed:
+            return
+        capacity = max(INITIAL_CAPACITY, current)
+        while capacity < needed:
+            capacity *= 2
+        # extend in place: committed rows never move, existing readers keep their maps
+        with open(self.emb_path, "ab") as f:
+            f.truncate(capacity * row_bytes)
+
+    def upsert_many(self, items):
+        """
+        Insert or replace several employees in one committed version.
+        items: iterable of (emp_id, info dict, embeddings) where embeddings is
+        a (512,) vector or a (K, 512) array of templates.
+        """
+        items = [(str(emp_id), dict(info), np.atleast_2d(np.asarray(embs, dtype=np.float32)))
+                 for emp_id, info, embs in items]
+        if not items:
+            return
+        with self._write_lock():
+            meta = self.load_meta()
+            self._release_rows(meta, [])
+            free = list(meta["free"])
+            size = meta["size"]
+
+            # pick rows not referenced by the committed version
+            planned = []
+            for emp_id, info, embs in items:
+                rows = []
+                for _ in range(len(embs)):
+                    if free:
+                        rows.append(free.pop(0))
+                    else:
+                        rows.append(size)
+                        size += 1
+                planned.append(rows)
+
+            meta["size"] = size
+            self._ensure_capacity(size, meta)
+            mm = self.open_embeddings(meta, mode="r+")
+            for (emp_id, info, embs), rows in zip(items, planned):
+                embs = embs / np.maximum(np.linalg.norm(embs, axis=1, keepdims=True), 1e-10)
+                mm[rows] = embs.astype(mm.dtype)
+            mm.flush()
+            del mm
+
+            # commit: new metadata, old rows of replaced employees become pending
+            released = []
+            for (emp_id, info, _), rows in zip(items, planned):
+                old = meta["employees"].get(emp_id)
+                if old:
+                    released.extend(old["rows"])
+                info.pop("embedding", None)
+                info["rows"] = rows
+                meta["employees"][emp_id] = info
+            meta["free"] = free
+            self._release_rows(meta, released)
+            meta["version"] += 1
+            _atomic_write_json(self.meta_path, meta)
+
+    def upsert(self, emp_id, info, embedding):
+        """Insert or replace a single employee atomically."""
+        self.upsert_many([(emp_id, info, embedding)])
+
+    def remove(self, emp_id):
+        with self._write_lock():
+            meta = self.load_meta()
+            rec = meta["employees"].pop(str(emp_id), None)
+            if rec is None:
+                return False
+            self._release_rows(meta, rec["rows"])
+            meta["version"] += 1
+            _atomic_write_json(self.meta_path, meta)
+            return True
+
+    def migrate_json(self, json_path):
+        """One-time import of a legacy JSON database with embedding float lists."""
+        try:
+            with open(json_path, "r", encoding="utf-8") as f:
+                db = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"[WARN] Cannot migrate {json_path}: {e}")
+            return 0
+        items = [
+            (emp_id, {k: v for k, v in data.items() if k != "embedding"}, data["embedding"])
+            for emp_id, data in db.items() if data.get("embedding")
+        ]
+        self.upsert_many(items)
+        print(f"[INFO] Migrated {len(items)} employees from {json_path} to {self.emb_path}")
+        return len(items)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(json_path):
+    """Return the process-wide store for a logical database path."""
+    store = _stores.get(json_path)
+    if store is None:
+        with _stores_lock:
+            if json_path not in _stores:
+                _stores[json_path] = EmbeddingStore(json_path)
+            store = _stores[json_path]
+    return store
+
+
+if __name__ == "__main__":
+    # explicit one-time migration of both legacy JSON databases
+    for path in ("db/employees.json", "db/important_employees.json"):
+        store = get_store(path)
+        print(f"{path}: {len(store.records())} employees in {store.emb_path}")
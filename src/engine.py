@@ -0,0 +1,206 @@
+import threading
+
+import cv2
+import numpy as np
+
+from src import model_registry
+from src.antispoof import check_liveness_batch, is_live
+from src.background_writer import BackgroundWriter
+from src.detect_faces import crop_faces, detect_batch
+from src.embedding_store import get_store
+from src.extract_embeddings import get_embeddings
+from src.face_index import select_templates
+from src.gallery import get_gallery
+
+# === Databases ===
+ATTENDANCE_DB = "db/employees.json"            # one-to-many recognition (attendance)
+ACCESS_DB = "db/important_employees.json"      # one-to-one verification (access control)
+CSV_PATH = "db/data_employee.csv"
+
+# === Matching Configuration (same defaults as recognize.py / verify.py) ===
+RECOGNIZE_THRESHOLD = 0.5
+VERIFY_THRESHOLD = 0.55
+NUM_TEMPLATES = 5
+
+
+class EmbeddingError(RuntimeError):
+    """ArcFace returned no embeddings for the live faces of an analyze() call."""
+
+
+def decode_image(data):
+    """JPEG / PNG bytes -> BGR image, or None if the bytes are not an image."""
+    img = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    return img if img is not None and img.size > 0 else None
+
+
+class FaceEngine:
+    """
+    Headless face pipeline: detection -> anti-spoofing -> ArcFace -> matching.
+
+    No window, camera or terminal is needed; images come in as arrays and
+    results go out as plain dicts (JSON-ready). analyze() takes any number
+    of images and runs each model once for all of them, so callers (e.g.
+    the HTTP API in src/api.py) can merge concurrent requests into one call.
+    """
+
+    def __init__(self, attendance_db=ATTENDANCE_DB, access_db=ACCESS_DB):
+        self.attendance_db = attendance_db
+        self.access_db = access_db
+        self._writer = None
+        self._writer_lock = threading.Lock()
+
+    def warmup(self):
+        """Load and warm up every model so the first request is not slow."""
+        model_registry.warmup()
+        get_gallery(self.attendance_db).refresh()
+        get_gallery(self.access_db).refresh()
+
+    @property
+    def writer(self):
+        """Background writer for attendance / access logs (created on first use)."""
+        if self._writer is None:
+            with self._writer_lock:
+                if self._writer is None:
+                    self._writer = BackgroundWriter(name="hrms-engine-writer")
+        return self._writer
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+    # ===== Pipeline =====
+    def analyze(self, images):
+        """
+        Detect every face of every image, check liveness and embed the live ones.
+        Output: one list per image of face dicts
+                {"box", "liveness", "liveness_conf", "live", "embedding" (None if not live)}
+        Raises EmbeddingError if ArcFace fails, instead of reporting the live
+        faces as unrecognized.
+        """
+        out = [[] for _ in images]
+        valid = [i for i, img in enumerate(images) if img is not None]
+        if not valid:
+            return out
+
+        faces, chips, owners = [], [], []
+        for i, det in zip(valid, detect_batch([images[i] for i in valid])):
+            f, boxes, c = crop_faces(images[i], *det)
+            for box in boxes:
+                out[i].append({"box": [int(v) for v in box]})
+            faces += f
+            chips += c
+            owners += [(i, k) for k in range(len(boxes))]
+        if not faces:
+            return out
+
+        # one anti-spoof call and one ArcFace run for all faces of all images
+        liveness = check_liveness_batch(faces)
+        live = [j for j, (label, conf) in enumerate(liveness) if is_live(label, conf)]
+        embs = get_embeddings([chips[j] for j in live]) if live else []
+        if embs is None:
+            raise EmbeddingError(f"face embedding failed for {len(live)} live face(s)")
+        emb_by_j = dict(zip(live, embs))
+
+        for j, ((i, k), (label, conf)) in enumerate(zip(owners, liveness)):
+            out[i][k].update({
+                "liveness": label,
+                "liveness_conf": round(float(conf), 4),
+                "live": is_live(label, conf),
+                "embedding": emb_by_j.get(j),
+            })
+        return out
+
+    # ===== Matching =====
+    @staticmethod
+    def _public(face):
+        return {k: v for k, v in face.items() if k != "embedding"}
+
+    def recognize(self, analyzed, threshold=RECOGNIZE_THRESHOLD, log=False):
+        """One-to-many: identify each live face among the attendance employees."""
+        gallery = get_gallery(self.attendance_db)
+        results = []
+        for faces in analyzed:
+            res = []
+            for face in faces:
+                item = self._public(face)
+                emp_id, name, score = None, "Unknown", -1.0
+                if face.get("embedding") is not None:
+                    best_id, best_name, score = gallery.match(face["embedding"])
+                    if best_id is not None and score >= threshold:
+                        emp_id, name = best_id, best_name
+                item.update({"employee_id": emp_id, "name": name, "score": round(float(score), 4)})
+                if log and emp_id is not None:
+                    from src.attendance import log_attendance
+                    self.writer.submit(log_attendance, emp_id)
+                res.append(item)
+            results.append(res)
+        return results
+
+    def verify(self, analyzed, emp_id=None, threshold=VERIFY_THRESHOLD, log=False):
+        """
+        One-to-one access check against the important employees.
+        With emp_id, each face is compared only to that employee's templates;
+        without it, against the best matching important employee.
+        """
+        gallery = get_gallery(self.access_db)
+        results = []
+        for faces in analyzed:
+            res = []
+            for face in faces:
+                item = self._public(face)
+                who, name, score = None, None, 0.0
+                if face.get("embedding") is not None:
+                    if emp_id is None:
+                        who, name, score = gallery.match(face["embedding"])
+                    else:
+                        scores = gallery.employee_scores(face["embedding"])
+                        hit = np.flatnonzero(gallery.ids == str(emp_id))
+                        if len(hit):
+                            who, name, score = str(emp_id), gallery.names[hit[0]], float(scores[hit[0]])
+                granted = who is not None and score > threshold
+                item.update({
+                    "employee_id": who if granted else None,
+                    "name": name if granted else None,
+                    "score": round(float(score), 4),
+                    "granted": bool(granted),
+                })
+                if log:
+                    from src.verify import log_access
+                    liveness = "Real" if face.get("live") else "Fake"
+                    if granted:
+                        self.writer.submit(log_access, who, name, "Granted", liveness)
+                    else:
+                        self.writer.submit(log_access, "Unknown", "Unknown", "Denied", liveness)
+                res.append(item)
+            results.append(res)
+        return results
+
+    def enroll(self, emp_id, analyzed, info=None, db_path=None, num_templates=NUM_TEMPLATES):
+        """
+        Enroll one employee from the largest live face of each image.
+        info: {"name", "department", "position"}; looked up in db/data_employee.csv if missing
+        Output: {"employee_id", "faces_used", "templates"} or {"error": ...}
+        """
+        embeddings = []
+        for faces in analyzed:
+            live = [f for f in faces if f.get("embedding") is not None]
+            if live:
+                best = max(live, key=lambda f: (f["box"][2] - f["box"][0]) * (f["box"][3] - f["box"][1]))
+                embeddings.append(best["embedding"])
+        if not embeddings:
+            return {"employee_id": str(emp_id), "error": "no live face found"}
+
+        info = dict(info or {})
+        if not info.get("name"):
+            import pandas as pd
+            df = pd.read_csv(CSV_PATH)
+            rows = df[df["Employee ID"].astype(str) == str(emp_id)]
+            if rows.empty:
+                return {"employee_id": str(emp_id), "error": "employee not found in CSV"}
+            row = rows.iloc[0]
+            info = {"name": row["Full Name"], "department": row["Department"], "position": row["Position"]}
+        info = {k: str(info.get(k, "")) for k in ("name", "department", "position")}
+
+        templates = select_templates(embeddings, num_templates)
+        get_store(db_path or self.attendance_db).upsert(str(emp_id), info, templates)
+        return {"employee_id": str(emp_id), "faces_used": len(embeddings), "templates": len(templates)}
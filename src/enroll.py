@@ -1,16 +1,17 @@
 import cv2
 import os
-import json
 import pandas as pd
 import numpy as np
 from datetime import datetime
 import time
-from src.detect_faces import detect_and_crop_faces
+from src.detect_faces import detect_and_align_faces
 from src.extract_embeddings import get_embedding
+from src.embedding_store import get_store
+from src.face_index import select_templates
 
 # === Paths ===
 CSV_PATH = "db/data_employee.csv"
-DB_PATH = "db/employees.json"
+DB_PATH = "db/employees.json"        # logical DB name, stored as db/employees.meta.json + .emb
 IMG_SAVE_DIR = "data/employees"
 
 # === Capture Configuration ===
@@ -18,6 +19,7 @@ CAPTURE_DURATION = 18          # total duration in seconds
 CAPTURE_INTERVAL = 0.4         # capture every 0.4s
 MAX_SAMPLES = 30               # max number of images
 STAGE_DURATION = 6             # seconds per stage (look forward/left/right)
+NUM_TEMPLATES = 5              # templates kept per employee (clusters of captured poses)
 
 
 # ===== Helper functions =====
@@ -32,18 +34,6 @@ def _ensure_dirs(emp_id):
     return save_dir
 
 
-def _load_db():
-    if os.path.exists(DB_PATH):
-        with open(DB_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {}
-
-
-def _save_db(db):
-    with open(DB_PATH, "w", encoding="utf-8") as f:
-        json.dump(db, f, indent=4, ensure_ascii=False)
-
-
 # ===== Main enrollment function =====
 def enroll_employee(emp_id: str):
     """Enroll a new employee by automatically capturing and saving face embeddings."""
@@ -118,10 +108,11 @@ def enroll_employee(emp_id: str):
 
         # Capture periodically
         if now - last_capture >= CAPTURE_INTERVAL:
-            faces = detect_and_crop_faces(frame)
+            faces, chips = detect_and_align_faces(frame)
             if faces:
-                face = sorted(faces, key=lambda f: f.shape[0] * f.shape[1], reverse=True)[0]
-                emb = get_embedding(face)
+                best = max(range(len(faces)), key=lambda i: faces[i].shape[0] * faces[i].shape[1])
+                face = faces[best]
+                emb = get_embedding(chips[best])  # aligned chip (same as recognition)
                 if emb is not None and np.linalg.norm(emb) > 0:
                     embeddings.append(emb)
 
@@ -145,15 +136,14 @@ def enroll_employee(emp_id: str):
         print("[WARN] No valid faces captured.")
         return
 
-    mean_emb = (sum(embeddings) / len(embeddings)).tolist()
-    db = _load_db()
-    db[str(emp_id)] = {
-        "name": full_name,
-        "department": department,
-        "position": position,
-        "embedding": mean_emb,
-    }
-    _save_db(db)
+    # keep several pose templates instead of one averaged vector
+    templates = select_templates(embeddings, NUM_TEMPLATES)
+    # atomic single-employee update of the binary embedding store
+    get_store(DB_PATH).upsert(emp_id, {
+        "name": str(full_name),
+        "department": str(department),
+        "position": str(position),
+    }, templates)
 
     print(f"[INFO]  Enrollment completed for {full_name} (ID {emp_id}).")
     print(f"[INFO] Saved {saved} face samples at: {save_dir}")
@@ -1,18 +1,19 @@
 import cv2
 import os
-import json
 import pandas as pd
 import numpy as np
 from datetime import datetime
 import time
 
-from src.detect_faces import detect_and_crop_faces
+from src.detect_faces import detect_and_align_faces
 from src.extract_embeddings import get_embedding
+from src.embedding_store import get_store
+from src.face_index import select_templates
 
 
 # === Data paths ===
 CSV_PATH = "db/important_employee.csv"          # VIP employee list (CSV)
-DB_PATH = "db/important_employees.json"         # JSON DB storing VIP embeddings
+DB_PATH = "db/important_employees.json"         # VIP embedding store (.meta.json + .emb)
 IMG_SAVE_DIR = "data/employees_important"       # directory to save face images
 
 
@@ -20,6 +21,7 @@ IMG_SAVE_DIR = "data/employees_important"       # directory to save face images
 CAPTURE_DURATION = 18        # total capture duration (seconds)
 CAPTURE_INTERVAL = 0.5       # interval between captures (seconds)
 MAX_SAMPLES = 30             # maximum number of images to collect
+NUM_TEMPLATES = 5            # templates kept per employee (clusters of captured poses)
 
 
 # === Helper functions ===
@@ -35,27 +37,6 @@ def _ensure_dirs(emp_id):
     return save_dir
 
 
-def _load_db():
-    """Load JSON database (returns empty dict if missing)"""
-    if os.path.exists(DB_PATH):
-        with open(DB_PATH, "r", encoding="utf-8") as f:
-            try:
-                return json.load(f)
-            except json.JSONDecodeError:
-                # corrupted or empty file -> reinitialize
-                print(f"[WARN] {DB_PATH} is invalid. Reinitializing.")
-                with open(DB_PATH, "w", encoding="utf-8") as fw:
-                    fw.write("{}")
-                return {}
-    return {}
-
-
-def _save_db(db):
-    """Save database to JSON"""
-    with open(DB_PATH, "w", encoding="utf-8") as f:
-        json.dump(db, f, indent=4, ensure_ascii=False)
-
-
 # === Main enroll function ===
 def enroll_important(emp_id):
     """Enroll a VIP employee by collecting face crops and embeddings."""
@@ -110,13 +91,13 @@ def enroll_important(emp_id):
 
         now = time.time()
         if now - last_cap >= CAPTURE_INTERVAL and saved < MAX_SAMPLES:
-            faces = detect_and_crop_faces(frame)
+            faces, chips = detect_and_align_faces(frame)
             if faces:
                 # choose the largest detected face
-                faces_sorted = sorted(faces, key=lambda f: f.shape[0] * f.shape[1], reverse=True)
-                face = faces_sorted[0]
+                best = max(range(len(faces)), key=lambda i: faces[i].shape[0] * faces[i].shape[1])
+                face = faces[best]
 
-                emb = get_embedding(face)
+                emb = get_embedding(chips[best])  # aligned chip (same as verification)
                 if emb is not None and np.linalg.norm(emb) > 0:
                     embeddings.append(emb)
                     saved += 1
@@ -139,18 +120,15 @@ def enroll_important(emp_id):
         print("[WARN] No embeddings were collected.")
         return
 
-    # average embedding
-    mean_emb = (sum(embeddings) / len(embeddings)).tolist()
-
-    # update DB
-    db = _load_db()
-    db[str(emp_id)] = {
-        "name": full_name,
-        "department": department,
-        "position": position,
-        "embedding": mean_emb,
-    }
-    _save_db(db)
+    # representative templates (clusters of the captured embeddings)
+    templates = select_templates(embeddings, NUM_TEMPLATES)
+
+    # update DB (atomic single-employee update of the binary store)
+    get_store(DB_PATH).upsert(emp_id, {
+        "name": str(full_name),
+        "department": str(department),
+        "position": str(position),
+    }, templates)
 
     print(f"[INFO] VIP enrollment completed for {full_name} (ID {emp_id}) — {saved} images saved at {save_dir}")
 
@@ -1,15 +1,70 @@
 # src/extract_embeddings.py
 import cv2
 import numpy as np
-import onnxruntime as ort
-import os
+import threading
+from src import metrics, model_registry
 
-# === Load ArcFace model ===
-MODEL_PATH = os.path.join("models", "w600k_r50.onnx")
+# === ArcFace model (loaded lazily through model_registry, path in config/arcface.json) ===
+def get_session():
+    """Shared ArcFace ONNX session and its input name."""
+    session = model_registry.get("arcface")
+    return session, session.get_inputs()[0].name
 
 
-session = ort.InferenceSession(MODEL_PATH, providers=["CPUExecutionProvider"])
-input_name = session.get_inputs()[0].name
+def __getattr__(name):
+    # backward compatible module attributes `session` / `input_name`
+    if name == "session":
+        return get_session()[0]
+    if name == "input_name":
+        return get_session()[1]
+    raise AttributeError(name)
+
+
+# === Preprocessing ===
+INPUT_SIZE = 112
+_SCALE = np.float32(1.0 / 127.5)
+_buffers = threading.local()   # per-thread reusable buffers (capacity grows as needed)
+
+
+def _batch_buffer(n):
+    """Thread-local (capacity, 3, 112, 112) float32 buffer with capacity >= n."""
+    buf = getattr(_buffers, "batch", None)
+    if buf is None or len(buf) < n:
+        capacity = max(n, 2 * len(buf) if buf is not None else 16)
+        buf = np.empty((capacity, 3, INPUT_SIZE, INPUT_SIZE), dtype=np.float32)
+        _buffers.batch = buf
+    return buf
+
+
+def _resize_scratch():
+    scratch = getattr(_buffers, "resized", None)
+    if scratch is None:
+        scratch = np.empty((INPUT_SIZE, INPUT_SIZE, 3), dtype=np.uint8)
+        _buffers.resized = scratch
+    return scratch
+
+
+def preprocess_batch(face_imgs, out=None):
+    """
+    Chuẩn hoá nhiều khuôn mặt vào một batch NCHW float32 cho ArcFace.
+    Input: list ảnh BGR (numpy uint8), out: buffer (>= N, 3, 112, 112) tuỳ chọn
+    Output: view (N, 3, 112, 112) — mặc định là buffer dùng lại của thread,
+            chỉ hợp lệ đến lần gọi tiếp theo
+    """
+    n = len(face_imgs)
+    if out is None:
+        out = _batch_buffer(n)
+    scratch = _resize_scratch()
+    for i, face in enumerate(face_imgs):
+        if face.shape[:2] == (INPUT_SIZE, INPUT_SIZE) and face.dtype == np.uint8:
+            resized = face
+        else:
+            resized = cv2.resize(face, (INPUT_SIZE, INPUT_SIZE), dst=scratch)
+        # BGR -> RGB and HWC -> CHW are just a strided view; the multiply casts,
+        # scales and writes into the batch slot in one pass, then shift to [-1, 1]
+        np.multiply(resized[:, :, ::-1].transpose(2, 0, 1), _SCALE, out=out[i], casting="unsafe")
+        np.subtract(out[i], 1.0, out=out[i])
+    return out[:n]
 
 
 def preprocess_face(face_img):
@@ -18,12 +73,7 @@ def preprocess_face(face_img):
     Input: ảnh BGR (numpy)
     Output: tensor (1, 3, 112, 112)
     """
-    face = cv2.resize(face_img, (112, 112))
-    face = cv2.cvtColor(face, cv2.COLOR_BGR2RGB)
-    face = (face / 127.5 - 1.0).astype(np.float32)
-    face = np.transpose(face, (2, 0, 1))  # (HWC → CHW)
-    face = np.expand_dims(face, axis=0)   # (1, 3, 112, 112)
-    return face
+    return preprocess_batch([face_img], out=np.empty((1, 3, INPUT_SIZE, INPUT_SIZE), dtype=np.float32))
 
 def get_embedding(face_img):
     """
@@ -32,8 +82,11 @@ def get_embedding(face_img):
     Output: vector 512 chiều (numpy)
     """
     try:
-        input_blob = preprocess_face(face_img)
-        emb = session.run(None, {input_name: input_blob})[0].flatten()
+        session, input_name = get_session()
+        input_blob = preprocess_batch([face_img])
+        with metrics.timer("embedding"):
+            emb = session.run(None, {input_name: input_blob})[0].flatten()
+        metrics.count_model_call("arcface", 1)
         emb = emb / np.linalg.norm(emb)  # chuẩn hóa vector để so cosine similarity
         return emb
     except Exception as e:
@@ -41,4 +94,25 @@ def get_embedding(face_img):
         return None
 
 
+def get_embeddings(face_imgs):
+    """
+    Trích xuất embedding cho nhiều khuôn mặt trong một lần chạy ArcFace.
+    Input: list ảnh khuôn mặt (numpy BGR)
+    Output: ma trận (N, 512) float32 đã chuẩn hoá, hoặc None nếu lỗi
+    """
+    if len(face_imgs) == 0:
+        return np.empty((0, 512), dtype=np.float32)
+    try:
+        session, input_name = get_session()
+        batch = preprocess_batch(face_imgs)  # (N, 3, 112, 112), reused buffer
+        with metrics.timer("embedding"):
+            embs = session.run(None, {input_name: batch})[0].astype(np.float32)
+        metrics.count_model_call("arcface", len(face_imgs))
+        embs = embs.reshape(len(face_imgs), -1)
+        embs /= np.maximum(np.linalg.norm(embs, axis=1, keepdims=True), 1e-10)
+        return embs
+    except Exception as e:
+        print(f"[ERROR] Batch embedding extraction failed: {e}")
+        return None
+
 
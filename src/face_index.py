@@ -0,0 +1,178 @@
+import numpy as np
+
+# ======================
+# Index Configuration
+# ======================
+DEFAULT_BACKEND = "exact"   # "exact" (brute-force numpy) or "ivf" (approximate)
+IVF_MIN_SIZE = 2048         # below this an IVF index falls back to exact search
+
+
+def _as_queries(query):
+    q = np.asarray(query, dtype=np.float32)
+    if q.ndim == 1:
+        q = q[None, :]
+    return q / np.maximum(np.linalg.norm(q, axis=1, keepdims=True), 1e-10)
+
+
+def _topk(scores, k):
+    """Row-wise top-k of a (Q, N) score matrix -> (indices, scores), best first."""
+    k = min(k, scores.shape[1])
+    if k == scores.shape[1]:
+        idx = np.argsort(-scores, axis=1)
+    else:
+        idx = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(scores, idx, axis=1), axis=1)
+        idx = np.take_along_axis(idx, order, axis=1)
+    return idx, np.take_along_axis(scores, idx, axis=1)
+
+
+class BruteForceIndex:
+    """Exact cosine search: one (Q, D) x (D, N) matrix product."""
+
+    def __init__(self):
+        self.matrix = np.empty((0, 0), dtype=np.float32)
+
+    def build(self, matrix):
+        """matrix: (N, D) L2-normalized float32 rows"""
+        self.matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        return self
+
+    def __len__(self):
+        return len(self.matrix)
+
+    def search(self, query, k=1):
+        """
+        Input: query (D,) or (Q, D), k
+        Output: (indices (Q, k), scores (Q, k)) sorted by descending similarity
+        """
+        q = _as_queries(query)
+        if len(self.matrix) == 0:
+            return np.empty((len(q), 0), dtype=np.int64), np.empty((len(q), 0), dtype=np.float32)
+        return _topk(q @ self.matrix.T, k)
+
+
+def spherical_kmeans(x, n_clusters, n_iter=10, seed=0):
+    """Cosine k-means on L2-normalized rows -> (n_clusters, D) normalized centroids."""
+    rng = np.random.default_rng(seed)
+    centroids = x[rng.choice(len(x), n_clusters, replace=False)].copy()
+    for _ in range(n_iter):
+        assign = np.argmax(x @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, x)
+        counts = np.bincount(assign, minlength=n_clusters)
+        empty = counts == 0
+        if empty.any():
+            # re-seed empty clusters with random points
+            sums[empty] = x[rng.choice(len(x), int(empty.sum()), replace=False)]
+        centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-10)
+    return centroids.astype(np.float32)
+
+
+def select_templates(embeddings, k):
+    """
+    Pick up to k representative templates from the embeddings captured for
+    one person (e.g. frontal / left / right stages): spherical k-means
+    centroids, ordered by cluster size. k=1 is the plain mean embedding.
+    """
+    x = np.asarray(embeddings, dtype=np.float32).reshape(len(embeddings), -1)
+    x = x / np.maximum(np.linalg.norm(x, axis=1, keepdims=True), 1e-10)
+    k = max(1, min(k, len(x)))
+    if k == 1:
+        mean = x.mean(axis=0)
+        return (mean / max(np.linalg.norm(mean), 1e-10))[None, :]
+
+    centroids = spherical_kmeans(x, k)
+    counts = np.bincount(np.argmax(x @ centroids.T, axis=1), minlength=k)
+    keep = np.argsort(-counts)
+    return centroids[keep[counts[keep] > 0]]
+
+
+class IVFIndex:
+    """
+    Inverted-file approximate index.
+
+    Rows are clustered with spherical k-means into `nlist` cells and stored
+    contiguously per cell. A query scores the centroids, then only the rows
+    of the `nprobe` closest cells. Search cost is roughly nprobe / nlist of
+    brute force, at the price of occasionally missing the true best match.
+    """
+
+    def __init__(self, nlist=None, nprobe=8, n_iter=10, train_size=50000, seed=0):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.n_iter = n_iter
+        self.train_size = train_size
+        self.seed = seed
+        self._exact = None
+        self.centroids = None
+        self.matrix = np.empty((0, 0), dtype=np.float32)
+        self.ids = np.empty(0, dtype=np.int64)     # original row index of each stored row
+        self.offsets = np.zeros(1, dtype=np.int64)  # cell c is rows offsets[c]:offsets[c+1]
+
+    def build(self, matrix):
+        matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+        n = len(matrix)
+        if n < IVF_MIN_SIZE:
+            self._exact = BruteForceIndex().build(matrix)
+            return self
+        self._exact = None
+
+        nlist = self.nlist or max(1, int(4 * np.sqrt(n)))
+        rng = np.random.default_rng(self.seed)
+        train = matrix if n <= self.train_size else matrix[rng.choice(n, self.train_size, replace=False)]
+        self.centroids = spherical_kmeans(train, min(nlist, len(train)), self.n_iter, self.seed)
+
+        # assign in chunks to bound the (chunk, nlist) score matrix
+        assign = np.empty(n, dtype=np.int64)
+        for start in range(0, n, 8192):
+            assign[start:start + 8192] = np.argmax(matrix[start:start + 8192] @ self.centroids.T, axis=1)
+
+        order = np.argsort(assign, kind="stable")
+        self.ids = order
+        self.matrix = matrix[order]
+        counts = np.bincount(assign, minlength=len(self.centroids))
+        self.offsets = np.concatenate([[0], np.cumsum(counts)])
+        return self
+
+    def __len__(self):
+        return len(self._exact) if self._exact is not None else len(self.matrix)
+
+    def search(self, query, k=1):
+        if self._exact is not None:
+            return self._exact.search(query, k)
+
+        q = _as_queries(query)
+        nprobe = min(self.nprobe, len(self.centroids))
+        cells, _ = _topk(q @ self.centroids.T, nprobe)
+
+        out_idx = np.full((len(q), k), -1, dtype=np.int64)
+        out_scores = np.full((len(q), k), -1.0, dtype=np.float32)
+        for qi in range(len(q)):
+            scores, ids = [], []
+            for c in cells[qi]:
+                a, b = self.offsets[c], self.offsets[c + 1]
+                if b > a:
+                    scores.append(self.matrix[a:b] @ q[qi])   # contiguous slice, no copy
+                    ids.append(self.ids[a:b])
+            if not scores:
+                continue
+            scores, ids = np.concatenate(scores), np.concatenate(ids)
+            idx, best = _topk(scores[None, :], k)
+            out_idx[qi, :idx.shape[1]] = ids[idx[0]]
+            out_scores[qi, :idx.shape[1]] = best[0]
+        return out_idx, out_scores
+
+
+BACKENDS = {
+    "exact": BruteForceIndex,
+    "ivf": IVFIndex,
+}
+
+
+def make_index(backend=DEFAULT_BACKEND, **kwargs):
+    """Create an empty index for the given backend name."""
+    try:
+        cls = BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown index backend '{backend}' (choose from {sorted(BACKENDS)})")
+    return cls(**kwargs)
@@ -0,0 +1,250 @@
+import os
+import threading
+import numpy as np
+from src import metrics
+from src.embedding_store import get_store
+from src.face_index import BACKENDS, DEFAULT_BACKEND, make_index
+
+DB_PATH = "db/employees.json"
+RERANK_TOP = 0    # opt-in approximation for multi-template galleries: shortlist this many
+                  # employees by mean template, then re-rank them on all their templates
+                  # (0 = exact, score every template)
+
+# Index backend used by get_gallery() when the caller does not pick one:
+# DEFAULT_BACKEND unless HRMS_GALLERY_BACKEND is set ("exact" or "ivf"),
+# HRMS_GALLERY_NPROBE tunes the IVF index.
+BACKEND_ENV = "HRMS_GALLERY_BACKEND"
+NPROBE_ENV = "HRMS_GALLERY_NPROBE"
+
+
+class _GalleryState:
+    """Immutable snapshot of the gallery arrays (swapped atomically on reload)."""
+
+    def __init__(self, ids, names, matrix, owner, index):
+        self.ids = ids          # (E,) employee ids
+        self.names = names      # (E,) employee names
+        self.matrix = matrix    # (R, 512) templates, R >= E
+        self.owner = owner      # (R,) employee index of each template row
+        self.index = index
+        self.max_templates = int(np.bincount(owner).max()) if len(owner) else 1
+
+        # runs of consecutive rows with the same owner, for np.maximum.reduceat
+        if len(owner):
+            self.run_starts = np.flatnonzero(np.r_[True, owner[1:] != owner[:-1]])
+        else:
+            self.run_starts = np.empty(0, dtype=np.int64)
+        self.run_owner = owner[self.run_starts]
+        self.runs_unique = len(np.unique(self.run_owner)) == len(self.run_owner)
+
+        # per-employee row lists (CSR) and normalized mean template for shortlisting
+        self.emp_rows = np.argsort(owner, kind="stable")
+        counts = np.bincount(owner, minlength=len(ids))
+        self.emp_offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+        if self.max_templates > 1:
+            run_sums = np.add.reduceat(matrix, self.run_starts, axis=0)
+            sums = np.zeros((len(ids), matrix.shape[1]), dtype=np.float32)
+            np.add.at(sums, self.run_owner, run_sums)
+            self.centroids = sums / np.maximum(np.linalg.norm(sums, axis=1, keepdims=True), 1e-10)
+        else:
+            self.centroids = matrix
+
+
+class Gallery:
+    """
+    In-memory face gallery built from an employee embedding store.
+
+    Every employee may have several templates (e.g. frontal / left / right).
+    All templates are kept as one contiguous, L2-normalized float32 matrix
+    (R, 512) with a parallel row -> employee array. The matrix comes straight
+    from the store's memory-mapped file (see src/embedding_store.py).
+    An employee's score is the max over their templates. With the exact
+    backend this is a matrix-vector product followed by a grouped
+    np.maximum.reduceat. With rerank_top > 0 large multi-template galleries
+    first shortlist employees by their mean template and score only the
+    shortlist on every template, so the cost grows with N rather than N * K;
+    this is approximate (a profile-only match can miss the shortlist) and
+    therefore off by default. Other index backends (see src/face_index.py)
+    search template rows and de-duplicate by employee. The gallery reloads
+    automatically when the store commits a new version (e.g. after enrollment).
+    """
+
+    def __init__(self, db_path=DB_PATH, backend=DEFAULT_BACKEND, rerank_top=RERANK_TOP, **index_kwargs):
+        self.db_path = db_path
+        self.backend = backend
+        self.rerank_top = rerank_top
+        self.index_kwargs = index_kwargs
+        self.store = get_store(db_path)
+        self._state = _GalleryState(
+            np.empty(0, dtype=object), np.empty(0, dtype=object),
+            np.empty((0, 0), dtype=np.float32), np.empty(0, dtype=np.int64),
+            make_index(backend, **index_kwargs),
+        )
+        self.records = {}
+        self._stamp = False  # False = never loaded, None = store missing
+        self._lock = threading.Lock()
+
+    @property
+    def ids(self):
+        return self._state.ids
+
+    @property
+    def names(self):
+        return self._state.names
+
+    @property
+    def matrix(self):
+        return self._state.matrix
+
+    def _load(self, stamp):
+        try:
+            meta, ids, owner, matrix = self.store.snapshot()
+        except (OSError, ValueError, KeyError) as e:
+            # keep serving the previous gallery, retry on next refresh
+            print(f"[WARN] Failed to load gallery {self.db_path}: {e}")
+            return
+
+        records = meta["employees"]
+        ids = np.array(ids, dtype=object)
+        names = np.array([records[i].get("name", "Unknown") for i in ids], dtype=object)
+        index = make_index(self.backend, **self.index_kwargs).build(matrix)
+
+        # swap everything at once so concurrent readers never mix old and new arrays
+        self._state = _GalleryState(ids, names, matrix, owner, index)
+        self.records = records
+        self._stamp = stamp
+
+    def refresh(self):
+        """Reload the gallery if the store committed a new version since the last load."""
+        stamp = self.store.stamp()
+        if stamp == self._stamp:
+            return False
+        with self._lock:
+            if stamp == self._stamp:
+                return False
+            self._load(stamp)
+        return True
+
+    def lookup(self, emp_id):
+        """Return the employee record (name, department, ...) or None."""
+        self.refresh()
+        return self.records.get(str(emp_id))
+
+    def __len__(self):
+        return len(self._state.ids)
+
+    @staticmethod
+    def _employee_scores(state, emb):
+        """Max-over-templates score of every employee -> (E,)"""
+        q = np.asarray(emb, dtype=np.float32).ravel()
+        q = q / (np.linalg.norm(q) + 1e-10)
+        row_scores = state.matrix @ q
+        run_max = np.maximum.reduceat(row_scores, state.run_starts)
+        if state.runs_unique:
+            scores = np.empty(len(state.ids), dtype=np.float32)
+            scores[state.run_owner] = run_max
+        else:
+            scores = np.full(len(state.ids), -np.inf, dtype=np.float32)
+            np.maximum.at(scores, state.run_owner, run_max)
+        return scores
+
+    def employee_scores(self, emb):
+        """Similarity of emb to every enrolled employee (max over their templates)."""
+        self.refresh()
+        if len(self._state.ids) == 0:
+            return np.empty(0, dtype=np.float32)
+        return self._employee_scores(self._state, emb)
+
+    def _shortlist_search(self, state, emb, k):
+        """Two-stage exact-backend search: mean-template shortlist, then max over templates."""
+        q = np.asarray(emb, dtype=np.float32).ravel()
+        q = q / (np.linalg.norm(q) + 1e-10)
+        shortlist = np.argpartition(-(state.centroids @ q), self.rerank_top - 1)[:self.rerank_top]
+
+        starts, ends = state.emp_offsets[shortlist], state.emp_offsets[shortlist + 1]
+        rows = state.emp_rows[np.concatenate([np.arange(a, b) for a, b in zip(starts, ends)])]
+        row_scores = state.matrix[rows] @ q
+        group_starts = np.concatenate([[0], np.cumsum(ends - starts)[:-1]])
+        scores = np.maximum.reduceat(row_scores, group_starts)
+
+        top = np.argsort(-scores)[:k]
+        return [(state.ids[shortlist[i]], state.names[shortlist[i]], float(scores[i])) for i in top]
+
+    def search(self, emb, k=1):
+        """
+        Top-k enrolled employees for one embedding.
+        Output: list of (emp_id, name, score), best first
+        """
+        self.refresh()
+        state = self._state
+        if len(state.ids) == 0:
+            return []
+
+        if self.backend == "exact":
+            if state.max_templates > 1 and 0 < self.rerank_top and k <= self.rerank_top < len(state.ids):
+                return self._shortlist_search(state, emb, k)
+            scores = self._employee_scores(state, emb)
+            k = min(k, len(scores))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return [(state.ids[e], state.names[e], float(scores[e])) for e in top]
+
+        # an employee owns at most max_templates rows, so the best k employees
+        # are always among the best k * max_templates rows
+        idx, row_scores = state.index.search(emb, k * state.max_templates)
+        hits, seen = [], set()
+        for row, sc in zip(idx[0], row_scores[0]):
+            if row < 0:
+                continue
+            e = state.owner[row]
+            if e in seen:
+                continue
+            seen.add(e)
+            hits.append((state.ids[e], state.names[e], float(sc)))
+            if len(hits) == k:
+                break
+        return hits
+
+    def match(self, emb):
+        """
+        Find the closest enrolled employee.
+        Input: emb (512-d embedding)
+        Output: (emp_id, name, score) or (None, None, -1) if gallery is empty
+        """
+        with metrics.timer("matching"):
+            hits = self.search(emb, 1)
+        if not hits:
+            return None, None, -1.0
+        return hits[0]
+
+
+_galleries = {}
+_galleries_lock = threading.Lock()
+
+
+def configured_backend():
+    """(backend, index kwargs) from the HRMS_GALLERY_* environment variables."""
+    backend = os.environ.get(BACKEND_ENV) or DEFAULT_BACKEND
+    if backend not in BACKENDS:
+        raise ValueError(f"{BACKEND_ENV}={backend!r} is not one of {sorted(BACKENDS)}")
+    kwargs = {}
+    if backend == "ivf" and os.environ.get(NPROBE_ENV):
+        kwargs["nprobe"] = int(os.environ[NPROBE_ENV])
+    return backend, kwargs
+
+
+def get_gallery(db_path=DB_PATH, backend=None, **kwargs):
+    """
+    Return the process-wide gallery for (db_path, backend, kwargs), created on first use.
+    backend=None uses the configured backend (see configured_backend).
+    """
+    if backend is None:
+        backend, defaults = configured_backend()
+        kwargs = dict(defaults, **kwargs)
+    key = (os.path.abspath(db_path), backend, frozenset(kwargs.items()))
+    gallery = _galleries.get(key)
+    if gallery is None:
+        with _galleries_lock:
+            if key not in _galleries:
+                _galleries[key] = Gallery(db_path, backend, **kwargs)
+            gallery = _galleries[key]
+    return gallery
@@ -0,0 +1,173 @@
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+# Pipeline instrumentation shared by the whole process.
+# Stage timers keep a rolling window of recent latencies (p50 / p95 / p99)
+# plus lifetime sum / count; counters track model calls and batch items.
+# Exposed as on-screen lines, a dict snapshot and Prometheus text format.
+
+# === Metrics Configuration ===
+WINDOW = 1024                        # latest samples per stage used for percentiles
+QUANTILES = (0.5, 0.95, 0.99)
+PROM_PATH = "logs/metrics.prom"      # text exposition file (node_exporter textfile collector)
+EXPORT_INTERVAL = 5.0                # seconds between file exports
+STAGE_ORDER = ("capture", "detection", "liveness", "embedding", "matching", "logging")
+
+
+class _Stage:
+    def __init__(self):
+        self.samples = deque(maxlen=WINDOW)
+        self.total = 0.0
+        self.count = 0
+
+
+class Metrics:
+    def __init__(self):
+        self._stages = {}
+        self._counters = {}      # (name, labels tuple) -> value
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            s = self._stages.get(stage)
+            if s is None:
+                s = self._stages[stage] = _Stage()
+            s.samples.append(seconds)
+            s.total += seconds
+            s.count += 1
+
+    @contextmanager
+    def timer(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def count(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def snapshot(self):
+        """{"stages": {stage: {count, sum_s, p50_ms, p95_ms, p99_ms}}, "counters": {...}}"""
+        with self._lock:
+            stages = {name: (np.array(s.samples), s.total, s.count) for name, s in self._stages.items()}
+            counters = dict(self._counters)
+        out = {"uptime_s": round(time.time() - self.started, 1), "stages": {}, "counters": {}}
+        for name in sorted(stages, key=_stage_key):
+            samples, total, count = stages[name]
+            item = {"count": count, "sum_s": round(total, 6)}
+            if samples.size:
+                for q, v in zip(QUANTILES, np.quantile(samples, QUANTILES)):
+                    item[f"p{int(q * 100)}_ms"] = round(float(v) * 1000, 3)
+            out["stages"][name] = item
+        for (name, labels), value in sorted(counters.items()):
+            label_str = ",".join(f"{k}={v}" for k, v in labels)
+            out["counters"][f"{name}{{{label_str}}}" if label_str else name] = value
+        return out
+
+    def overlay_lines(self):
+        """Short per-stage lines for drawing on the video."""
+        snap = self.snapshot()
+        lines = []
+        for name, s in snap["stages"].items():
+            if "p50_ms" in s:
+                lines.append(f"{name:<9} p50 {s['p50_ms']:6.1f}  p95 {s['p95_ms']:6.1f}  p99 {s['p99_ms']:6.1f} ms")
+        calls = [f"{k.split('=')[-1].rstrip('}')}:{v}" for k, v in snap["counters"].items()
+                 if k.startswith("hrms_model_calls_total")]
+        if calls:
+            lines.append("calls " + " ".join(calls))
+        return lines
+
+    def draw_overlay(self, img):
+        """Draw overlay_lines() in the top-left corner of a BGR image."""
+        import cv2
+        for i, line in enumerate(self.overlay_lines()):
+            cv2.putText(img, line, (10, 20 + 18 * i), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (255, 255, 0), 1)
+        return img
+
+    def prometheus_text(self):
+        """Prometheus text exposition (version 0.0.4) of every stage and counter."""
+        with self._lock:
+            stages = {name: (np.array(s.samples), s.total, s.count) for name, s in self._stages.items()}
+            counters = dict(self._counters)
+
+        lines = [
+            "# HELP hrms_stage_latency_seconds Pipeline stage latency (quantiles over the last samples).",
+            "# TYPE hrms_stage_latency_seconds summary",
+        ]
+        for name in sorted(stages, key=_stage_key):
+            samples, total, count = stages[name]
+            if samples.size:
+                for q, v in zip(QUANTILES, np.quantile(samples, QUANTILES)):
+                    lines.append(f'hrms_stage_latency_seconds{{stage="{name}",quantile="{q}"}} {float(v):.6f}')
+            lines.append(f'hrms_stage_latency_seconds_sum{{stage="{name}"}} {total:.6f}')
+            lines.append(f'hrms_stage_latency_seconds_count{{stage="{name}"}} {count}')
+
+        typed = set()
+        for (name, labels), value in sorted(counters.items()):
+            if name not in typed:
+                lines.append(f"# TYPE {name} counter")
+                typed.add(name)
+            label_str = ",".join(f'{k}="{v}"' for k, v in labels)
+            lines.append(f"{name}{{{label_str}}} {value}" if label_str else f"{name} {value}")
+        lines.append(f"hrms_uptime_seconds {time.time() - self.started:.1f}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path=PROM_PATH):
+        """Atomically write the exposition file (safe for a textfile collector)."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+
+
+def _stage_key(name):
+    return (STAGE_ORDER.index(name), name) if name in STAGE_ORDER else (len(STAGE_ORDER), name)
+
+
+# ===== Process-wide instance =====
+METRICS = Metrics()
+timer = METRICS.timer
+observe = METRICS.observe
+count = METRICS.count
+snapshot = METRICS.snapshot
+overlay_lines = METRICS.overlay_lines
+draw_overlay = METRICS.draw_overlay
+prometheus_text = METRICS.prometheus_text
+
+
+def count_model_call(model, items):
+    """One model invocation on `items` inputs (batch size)."""
+    METRICS.count("hrms_model_calls_total", model=model)
+    METRICS.count("hrms_model_items_total", items, model=model)
+
+
+_exporter = None
+
+
+def start_exporter(path=PROM_PATH, interval=EXPORT_INTERVAL):
+    """Write the Prometheus file every `interval` seconds on a daemon thread."""
+    global _exporter
+    if _exporter is not None:
+        return _exporter
+
+    def run():
+        while True:
+            time.sleep(interval)
+            try:
+                METRICS.write_prometheus(path)
+            except OSError as e:
+                print(f"[WARN] Failed to write metrics to {path}: {e}")
+
+    _exporter = threading.Thread(target=run, name="hrms-metrics", daemon=True)
+    _exporter.start()
+    return _exporter
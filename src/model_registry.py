@@ -0,0 +1,112 @@
+import threading
+import time
+
+# Central registry of the models used by the pipeline.
+# Nothing is imported or loaded until a model is first requested, and every
+# model is shared by the whole process (one instance per name).
+
+_loaders = {}       # name -> callable returning the model
+_warmups = {}       # name -> callable(model) running one dummy inference
+_instances = {}
+_stats = {}         # name -> {"load_s": ..., "warmup_s": ...}
+_locks = {}
+_registry_lock = threading.Lock()
+
+
+def register(name, loader, warmup=None):
+    """Register (or replace) a lazy loader and optional warm-up for a model name."""
+    with _registry_lock:
+        _loaders[name] = loader
+        if warmup is not None:
+            _warmups[name] = warmup
+        _locks.setdefault(name, threading.Lock())
+
+
+def get(name):
+    """Return the shared instance of a model, loading it on first use."""
+    if name in _instances:
+        return _instances[name]
+    try:
+        lock = _locks[name]
+    except KeyError:
+        raise KeyError(f"Model '{name}' is not registered (known: {sorted(_loaders)})")
+    with lock:
+        if name not in _instances:
+            start = time.perf_counter()
+            model = _loaders[name]()
+            load_s = time.perf_counter() - start
+            _stats[name] = {"load_s": load_s}
+            _instances[name] = model
+            print(f"[INFO] Model '{name}' loaded in {load_s:.2f}s")
+    return _instances[name]
+
+
+def is_loaded(name):
+    return name in _instances
+
+
+PIPELINE_MODELS = ("yolo_face", "arcface", "antispoof")
+
+
+def warmup(names=PIPELINE_MODELS):
+    """Load the given models and run their warm-up inference."""
+    for name in names:
+        model = get(name)
+        fn = _warmups.get(name)
+        if fn is None or model is None or "warmup_s" in _stats[name]:
+            continue
+        start = time.perf_counter()
+        try:
+            fn(model)
+        except Exception as e:
+            print(f"[WARN] Warm-up of '{name}' failed: {e}")
+        _stats[name]["warmup_s"] = time.perf_counter() - start
+
+
+def stats():
+    """Load / warm-up times (seconds) of the models loaded so far."""
+    return {name: dict(s) for name, s in _stats.items()}
+
+
+# ===== Default models =====
+def _load_yolo_face():
+    from models.build import load_yolo_model
+    return load_yolo_model()
+
+
+def _warmup_yolo(model):
+    import numpy as np
+    model(np.zeros((640, 640, 3), dtype=np.uint8), verbose=False)
+
+
+def _load_arcface():
+    # threads / graph optimization / arena / optimized-model cache come from
+    # config/arcface.json and HRMS_ARCFACE_* (see src/arcface_engine.py)
+    from src.arcface_engine import create_session
+    return create_session()
+
+
+def _warmup_arcface(session):
+    import numpy as np
+    session.run(None, {session.get_inputs()[0].name: np.zeros((1, 3, 112, 112), dtype=np.float32)})
+
+
+def _load_antispoof():
+    from src.antispoof import load_antispoof_model
+    return load_antispoof_model()
+
+
+def _warmup_antispoof(model):
+    import numpy as np
+    model.predict(source=np.zeros((112, 112, 3), dtype=np.uint8), verbose=False)
+
+
+def _load_facenet():
+    from models.build import load_facenet_model, get_device
+    return load_facenet_model(get_device())
+
+
+register("yolo_face", _load_yolo_face, _warmup_yolo)
+register("arcface", _load_arcface, _warmup_arcface)
+register("antispoof", _load_antispoof, _warmup_antispoof)
+register("facenet", _load_facenet)
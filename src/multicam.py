@@ -0,0 +1,276 @@
+import argparse
+import os
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from src import metrics, model_registry
+from src.antispoof import load_antispoof_model
+from src.background_writer import BackgroundWriter
+from src.camera import FpsMeter, LatestFrameCapture
+from src.detect_faces import detect_batch
+from src.face_index import BACKENDS
+from src.gallery import BACKEND_ENV
+from src.realtime_attendance import (
+    SNAPSHOT_DIR, AttendanceState, CooldownRegistry, draw_overlays, finish_frame, prepare_frame, recognize_pending,
+)
+from src.snapshot_store import get_snapshot_store
+
+# ======================
+# Service Configuration
+# ======================
+RECOGNITION_WORKERS = max(1, min(4, (os.cpu_count() or 2) // 2))  # anti-spoof + ArcFace threads
+MAX_BATCH_FRAMES = 8        # frames (one per camera) per detector call
+QUEUE_DEPTH = 4             # detected frame batches waiting for recognition
+STATS_INTERVAL = 10.0       # seconds between stats lines in headless mode
+
+
+class CameraChannel:
+    """One camera source and its own tracks, scheduler and overlays."""
+
+    def __init__(self, cam_id, source, cooldowns):
+        self.cam_id = cam_id
+        self.source = source
+        self.capture = LatestFrameCapture(source)
+        self.state = AttendanceState(cooldowns)
+        self.last_seq = 0
+        self.busy = False           # a frame of this camera is in the pipeline
+        self.overlays = []
+        self.processed_fps = FpsMeter()
+        self.processed = 0
+        self.skipped = 0
+
+
+class MultiCameraService:
+    """
+    Attendance for several cameras in one process with shared models.
+
+    - every camera has a capture thread that keeps only its newest frame,
+    - one detector thread takes the newest frame of every idle camera and
+      runs YOLO on all of them in one batched call (the only YOLO user, so
+      the detector lock is not contended),
+    - RECOGNITION_WORKERS threads run anti-spoofing + ArcFace batched over
+      all faces of a detector batch, then cooldowns / logging per camera.
+      ultralytics models are not thread-safe, so with several workers each
+      one loads its own anti-spoof model instead of queueing on the shared
+      one; ArcFace (onnxruntime) sessions are shared.
+    Detector and ArcFace are loaded once (model_registry) and the stages
+    overlap, so more cameras use more cores instead of more processes. A
+    camera has at most one frame in flight, which keeps its tracks and
+    cooldowns in order.
+    """
+
+    def __init__(self, sources, workers=RECOGNITION_WORKERS, max_batch=MAX_BATCH_FRAMES):
+        cooldowns = CooldownRegistry()   # per-employee cooldown shared by all cameras
+        self.channels = [CameraChannel(i, src, cooldowns) for i, src in enumerate(sources)]
+        self.workers = workers
+        self.max_batch = max_batch
+        self.writer = BackgroundWriter()
+        self._queue = queue.Queue(maxsize=QUEUE_DEPTH)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []
+        self._counts = {"detect_batches": 0, "detect_frames": 0, "recognize_batches": 0, "faces": 0}
+
+    # ===== Pipeline threads =====
+    def _collect(self):
+        """Newest unseen frame of every camera that has nothing in flight."""
+        batch = []
+        with self._lock:
+            for ch in self.channels:
+                if ch.busy:
+                    continue
+                seq, ts, frame = ch.capture.latest()
+                if frame is None or seq <= ch.last_seq:
+                    continue
+                ch.skipped += max(0, seq - ch.last_seq - 1)
+                ch.last_seq = seq
+                ch.busy = True
+                batch.append((ch, frame))
+                if len(batch) == self.max_batch:
+                    break
+        return batch
+
+    def _release(self, ch, overlays):
+        ch.processed_fps.tick()
+        with self._lock:
+            ch.overlays = overlays
+            ch.processed += 1
+            ch.busy = False
+
+    def _detect_loop(self):
+        while not self._stop.is_set():
+            batch = self._collect()
+            if not batch:
+                if not any(ch.capture.running for ch in self.channels):
+                    break
+                time.sleep(0.002)
+                continue
+
+            now = time.time()
+            todo = []
+            for ch, frame in batch:
+                state = ch.state
+                # Motion-gated detection per camera: still cameras keep their overlays
+                if state.scheduler.should_detect(frame, now, has_tracks=bool(state.tracker.tracks)):
+                    todo.append((ch, frame))
+                else:
+                    self._release(ch, state.last_overlays)
+            if not todo:
+                continue
+
+            try:
+                detections = detect_batch([frame for _, frame in todo])
+                works = [prepare_frame(frame, ch.state, det, now) for (ch, frame), det in zip(todo, detections)]
+            except Exception as e:
+                print(f"[ERROR] Detection failed: {e}")
+                for ch, _ in todo:
+                    self._release(ch, [])
+                continue
+            with self._lock:
+                self._counts["detect_batches"] += 1
+                self._counts["detect_frames"] += len(todo)
+            self._queue.put([(ch, w) for (ch, _), w in zip(todo, works)])
+
+        for _ in range(self.workers):
+            self._queue.put(None)
+
+    def _worker_antispoof(self):
+        """Private anti-spoof model of one recognition worker (None = use the shared one)."""
+        if self.workers <= 1:
+            return None     # a single worker never waits for the shared model
+        model = load_antispoof_model()
+        if model is not None:
+            try:
+                model.predict(source=np.zeros((112, 112, 3), dtype=np.uint8), verbose=False)   # warm-up
+            except Exception as e:
+                print(f"[WARN] Warm-up of a worker anti-spoof model failed: {e}")
+        return model
+
+    def _recognize_loop(self):
+        antispoof = self._worker_antispoof()
+        while True:
+            items = self._queue.get()
+            if items is None:
+                break
+            try:
+                recognize_pending([w for _, w in items], antispoof=antispoof)
+            except Exception as e:
+                print(f"[ERROR] Recognition failed: {e}")
+            with self._lock:
+                self._counts["recognize_batches"] += 1
+                self._counts["faces"] += sum(len(w.refresh) for _, w in items)
+            for ch, work in items:
+                try:
+                    overlays = finish_frame(work, self.writer)
+                except Exception as e:
+                    print(f"[ERROR] Camera {ch.cam_id} frame failed: {e}")
+                    overlays = []
+                self._release(ch, overlays)
+
+    # ===== Control =====
+    def start(self):
+        # load + warm up every model once for all cameras
+        model_registry.warmup()
+        for ch in self.channels:
+            if not ch.capture.isOpened():
+                print(f"[ERROR] Cannot open camera {ch.cam_id}: {ch.source}")
+                continue
+            ch.capture.start()
+            print(f"[INFO] Camera {ch.cam_id} started: {ch.source}")
+
+        self._threads = [threading.Thread(target=self._detect_loop, name="hrms-detect", daemon=True)]
+        self._threads += [threading.Thread(target=self._recognize_loop, name=f"hrms-recognize-{i}", daemon=True)
+                          for i in range(self.workers)]
+        for t in self._threads:
+            t.start()
+        return self
+
+    @property
+    def running(self):
+        return any(t.is_alive() for t in self._threads)
+
+    def stop(self):
+        self._stop.set()
+        for t in self._threads:
+            t.join(timeout=5.0)
+        for ch in self.channels:
+            ch.capture.stop()
+        self.writer.close()
+        get_snapshot_store(SNAPSHOT_DIR).flush()
+
+    def stats(self):
+        with self._lock:
+            out = dict(self._counts)
+            cams = {ch.cam_id: {
+                "source": str(ch.source),
+                "capture_fps": round(ch.capture.fps.fps(), 1),
+                "processed_fps": round(ch.processed_fps.fps(), 1),
+                "processed": ch.processed,
+                "skipped": ch.skipped,
+                "detect_duty": round(ch.state.scheduler.duty_cycle(), 3),
+            } for ch in self.channels}
+        out["frames_per_detect_batch"] = round(out["detect_frames"] / max(out["detect_batches"], 1), 2)
+        out["cameras"] = cams
+        return out
+
+    def run(self, show=False, stats_interval=STATS_INTERVAL):
+        """Run until every source ends, 'q' is pressed (show=True) or Ctrl+C."""
+        self.start()
+        metrics.start_exporter()
+        last_stats = time.time()
+        shown = {}
+        show_metrics = False
+        try:
+            while self.running:
+                if show:
+                    for ch in self.channels:
+                        seq, _, frame = ch.capture.latest()
+                        if frame is None or shown.get(ch.cam_id) == seq:
+                            continue
+                        shown[ch.cam_id] = seq
+                        with self._lock:
+                            overlays = ch.overlays
+                        annotated = draw_overlays(frame.copy(), overlays)
+                        if show_metrics:
+                            metrics.draw_overlay(annotated)
+                        cv2.imshow(f"Camera {ch.cam_id}", annotated)
+                    key = cv2.waitKey(1) & 0xFF
+                    if key == ord("q"):
+                        break
+                    if key == ord("m"):
+                        show_metrics = not show_metrics
+                else:
+                    time.sleep(0.2)
+                if time.time() - last_stats >= stats_interval:
+                    last_stats = time.time()
+                    print(f"[INFO] {self.stats()}")
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+            if show:
+                cv2.destroyAllWindows()
+        print(f"[INFO] Multi-camera stats: {self.stats()}")
+        print(f"[INFO] Background writer stats: {self.writer.stats()}")
+        print(f"[INFO] Snapshot stats: {get_snapshot_store(SNAPSHOT_DIR).stats()}")
+
+
+def parse_source(text):
+    """Device index ("0") or a video file / stream URL."""
+    return int(text) if text.isdigit() else text
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Attendance service for several cameras with shared models")
+    parser.add_argument("sources", nargs="+", help="camera indices, video files or RTSP URLs")
+    parser.add_argument("--workers", type=int, default=RECOGNITION_WORKERS, help="recognition threads")
+    parser.add_argument("--show", action="store_true", help="show one window per camera")
+    parser.add_argument("--gallery-backend", choices=sorted(BACKENDS), help=f"overrides {BACKEND_ENV}")
+    args = parser.parse_args()
+    if args.gallery_backend:
+        os.environ[BACKEND_ENV] = args.gallery_backend
+    MultiCameraService([parse_source(s) for s in args.sources], workers=args.workers).run(show=args.show)
@@ -0,0 +1,430 @@
+import argparse
+import json
+import os
+import shutil
+import time
+from datetime import date
+
+import numpy as np
+
+from src.access_log import ACCESS_LOG, rotated_segments
+
+# ======================
+# Partition Configuration
+# ======================
+ATTENDANCE_PARTS = "logs/attendance_parts"
+ACCESS_PARTS = "logs/access_parts"
+ACCESS_CSV = ACCESS_LOG                      # live access log + rotated segments (src/access_log.py)
+
+ATTENDANCE_COLUMNS = ("employee_id", "full_name", "department", "position", "date", "check_in", "check_out")
+ACCESS_COLUMNS = ("date", "time", "employee_id", "name", "status", "liveness", "count")
+ACCESS_CSV_COLUMNS = {"Date": "date", "Time": "time", "Employee ID": "employee_id",
+                      "Name": "name", "Status": "status", "Liveness": "liveness", "Count": "count"}
+
+_META = "_meta.json"
+
+
+def _atomic_write_json(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class PartitionedLog:
+    """
+    Append-only log stored in date partitions, in columnar form.
+
+        <root>/<YYYY-MM-DD>/part-<id>/<column>.npy       uint16 / int32 codes
+        <root>/<YYYY-MM>/part-<id>/...                   closed month (compacted)
+                            /<column>.dict.npy           sorted distinct values
+                            /_meta.json                  rows, key range, sorted, replaces, sources
+
+    Every column is dictionary-encoded (names, departments and times repeat a
+    lot), so a part is small and a reader loads only the columns it asks for;
+    the code arrays are memory-mapped. A reader prunes partitions by their
+    directory name and parts by their employee range; inside a sorted part
+    rows are ordered by employee, so one employee is a binary search, not a scan.
+
+    append() writes a new part per day (built in a hidden temp directory and
+    renamed in, so readers never see half a part). compact() merges the parts
+    of each day, and rolls closed months into one month partition. A merged
+    part lists the parts it replaces, so a crash before they are deleted
+    never duplicates rows (the next compact() deletes them). A part can also
+    record the source files its rows came from (see ingested()), so a crash
+    between writing a part and deleting its source never ingests it twice.
+    """
+
+    def __init__(self, root, columns, date_column="date", key_column="employee_id"):
+        self.root = root
+        self.columns = tuple(columns)
+        self.date_column = date_column
+        self.key_column = key_column
+
+    # ===== Layout =====
+    def partitions(self, start=None, end=None):
+        """Day (YYYY-MM-DD) and month (YYYY-MM) partitions overlapping [start, end], oldest first."""
+        if not os.path.isdir(self.root):
+            return []
+        names = sorted(d for d in os.listdir(self.root)
+                       if len(d) in (7, 10) and os.path.isdir(os.path.join(self.root, d)))
+        return [d for d in names
+                if (start is None or d >= start[:len(d)]) and (end is None or d <= end[:len(d)])]
+
+    def _live_parts(self, start=None, end=None):
+        """[(partition, path, meta)] of the parts overlapping the range, minus replaced parts."""
+        found = []
+        for part_name in self.partitions(start, end):
+            part_dir = os.path.join(self.root, part_name)
+            for name in sorted(os.listdir(part_dir)):
+                meta_path = os.path.join(part_dir, name, _META)
+                if name.startswith("part-") and os.path.exists(meta_path):
+                    with open(meta_path, "r", encoding="utf-8") as f:
+                        found.append((part_name, name, json.load(f)))
+        # a replacing part is always in the same day or in its month -> also in range
+        replaced = {old for _, _, meta in found for old in meta.get("replaces", [])}
+        return [(p, os.path.join(self.root, p, name), meta) for p, name, meta in found
+                if f"{p}/{name}" not in replaced]
+
+    def dates(self, start=None, end=None):
+        """Sorted distinct dates stored in [start, end] (reads only the date dictionaries)."""
+        out = set()
+        for _, path, _ in self._live_parts(start, end):
+            out.update(str(d) for d in np.load(os.path.join(path, f"{self.date_column}.dict.npy")))
+        return sorted(d for d in out if (start is None or d >= start) and (end is None or d <= end))
+
+    def first_date(self):
+        names = self.partitions()
+        if not names:
+            return None
+        return names[0] if len(names[0]) == 10 else next(iter(self.dates(names[0], names[0] + "-31")), None)
+
+    def last_date(self):
+        names = self.partitions()
+        if not names:
+            return None
+        return names[-1] if len(names[-1]) == 10 else next(iter(self.dates(names[-1], names[-1] + "-31")[-1:]), None)
+
+    # ===== Write =====
+    def _write_part(self, partition, data, is_sorted=False, replaces=(), sources=()):
+        n = len(data[self.key_column])
+        name = f"part-{time.time_ns():x}-{os.getpid()}"
+        part_dir = os.path.join(self.root, partition)
+        tmp_dir = os.path.join(part_dir, f".{name}.tmp")
+        os.makedirs(tmp_dir)
+        key_range = ("", "")
+        for col in self.columns:
+            values, codes = np.unique(data[col], return_inverse=True)
+            if col == self.key_column and n:
+                key_range = (str(values[0]), str(values[-1]))
+            code_dtype = np.uint16 if len(values) <= np.iinfo(np.uint16).max else np.int32
+            np.save(os.path.join(tmp_dir, f"{col}.dict.npy"), values)
+            np.save(os.path.join(tmp_dir, f"{col}.npy"), codes.reshape(-1).astype(code_dtype))
+        _atomic_write_json(os.path.join(tmp_dir, _META), {
+            "rows": n,
+            "sorted": is_sorted,
+            "min_key": key_range[0],
+            "max_key": key_range[1],
+            "replaces": list(replaces),
+            "sources": sorted(sources),
+        })
+        os.rename(tmp_dir, os.path.join(part_dir, name))
+        return name
+
+    def append(self, data, sort=False, source=None):
+        """
+        Append rows given as {column: sequence} (or a DataFrame with those
+        columns). Rows are split by their date column into day partitions;
+        sort=True writes them sorted by employee (no compaction needed).
+        source: id of the file the rows come from, recorded per day part as
+        "<source>@<day>" (see ingested())
+        Output: number of rows written
+        """
+        cols = {col: np.asarray(data[col]).astype(str) for col in self.columns}
+        n = len(cols[self.date_column])
+        if n == 0:
+            return 0
+        days, inverse = np.unique(cols[self.date_column], return_inverse=True)
+        for i, day in enumerate(days):
+            rows = np.flatnonzero(inverse.reshape(-1) == i)
+            if sort:
+                rows = rows[np.argsort(cols[self.key_column][rows], kind="stable")]
+            os.makedirs(os.path.join(self.root, day), exist_ok=True)
+            self._write_part(day, {col: v[rows] for col, v in cols.items()}, is_sorted=sort,
+                             sources=[f"{source}@{day}"] if source else ())
+        return n
+
+    def ingested(self, start=None, end=None):
+        """Set of "<source>@<day>" entries recorded by append(source=...) in [start, end]."""
+        return {src for _, _, meta in self._live_parts(start, end) for src in meta.get("sources", [])}
+
+    # ===== Read =====
+    def _load(self, path, col, mmap=True):
+        values = np.load(os.path.join(path, f"{col}.dict.npy"))
+        codes = np.load(os.path.join(path, f"{col}.npy"), mmap_mode="r" if mmap else None)
+        return values, codes
+
+    def _read_part(self, path, meta, columns, employees=None, start=None, end=None):
+        """Columns of one part, restricted to employees / [start, end] (None = no match)."""
+        rows = None
+        if employees is not None:
+            if not employees or employees[0] > meta["max_key"] or employees[-1] < meta["min_key"]:
+                return None
+            key_dict, codes = self._load(path, self.key_column)
+            pos = np.minimum(np.searchsorted(key_dict, employees), len(key_dict) - 1)
+            wanted = np.unique(pos[key_dict[pos] == np.asarray(employees)])
+            if wanted.size == 0:
+                return None
+            if meta.get("sorted"):
+                lo = np.searchsorted(codes, wanted, side="left")
+                hi = np.searchsorted(codes, wanted, side="right")
+                rows = np.concatenate([np.arange(a, b) for a, b in zip(lo, hi)])
+            else:
+                rows = np.flatnonzero(np.isin(codes, wanted))
+
+        if start is not None or end is not None:
+            # month partitions only partly inside the range
+            date_dict, codes = self._load(path, self.date_column)
+            keep = np.ones(len(date_dict), dtype=bool)
+            if start is not None:
+                keep &= date_dict >= start
+            if end is not None:
+                keep &= date_dict <= end
+            if not keep.all():
+                if not keep.any():
+                    return None
+                day_rows = np.flatnonzero(keep[codes])
+                rows = day_rows if rows is None else np.intersect1d(rows, day_rows, assume_unique=True)
+
+        out = {}
+        for col in columns:
+            values, codes = self._load(path, col)
+            out[col] = values[codes if rows is None else codes[rows]]
+        return out
+
+    def read_columns(self, start=None, end=None, employees=None, columns=None):
+        """
+        {column: array} of the rows with start <= date <= end, optionally only
+        for the given employee ids. Only overlapping partitions and parts are opened.
+        """
+        columns = tuple(columns or self.columns)
+        if employees is not None:
+            employees = sorted({str(e) for e in employees})
+        chunks = []
+        for partition, path, meta in self._live_parts(start, end):
+            is_month = len(partition) == 7
+            part = self._read_part(path, meta, columns, employees,
+                                   start if is_month else None, end if is_month else None)
+            if part is not None:
+                chunks.append(part)
+        if not chunks:
+            return {col: np.array([], dtype=str) for col in columns}
+        return {col: np.concatenate([c[col] for c in chunks]) for col in columns}
+
+    def read(self, start=None, end=None, employees=None, columns=None):
+        """Same as read_columns, as a pandas DataFrame."""
+        import pandas as pd
+        return pd.DataFrame(self.read_columns(start, end, employees, columns))
+
+    # ===== Maintenance =====
+    def _merge(self, partition, parts):
+        """Write one sorted part (by employee, then date) replacing `parts`, then delete them."""
+        merged = {col: [] for col in self.columns}
+        for _, path, meta in parts:
+            data = self._read_part(path, meta, self.columns)
+            for col in self.columns:
+                merged[col].append(data[col])
+        merged = {col: np.concatenate(v) for col, v in merged.items()}
+        order = np.lexsort((merged[self.date_column], merged[self.key_column]))
+        os.makedirs(os.path.join(self.root, partition), exist_ok=True)
+        self._write_part(partition, {col: v[order] for col, v in merged.items()}, is_sorted=True,
+                         replaces=[f"{p}/{os.path.basename(path)}" for p, path, _ in parts],
+                         sources={src for _, _, meta in parts for src in meta.get("sources", [])})
+        for p, path, _ in parts:
+            self._remove_part(p, path)
+
+    def _remove_part(self, partition, path):
+        """Delete a part, and its partition directory once it is empty."""
+        shutil.rmtree(path, ignore_errors=True)
+        part_dir = os.path.join(self.root, partition)
+        if os.path.isdir(part_dir) and not os.listdir(part_dir):
+            os.rmdir(part_dir)
+
+    def _remove_replaced(self):
+        """Delete parts a merge replaced but a crash left behind. Output: number deleted"""
+        removed = 0
+        for _, _, meta in self._live_parts():
+            for old in meta.get("replaces", []):
+                old_path = os.path.join(self.root, old)
+                if os.path.isdir(old_path):
+                    self._remove_part(os.path.dirname(old), old_path)
+                    removed += 1
+        return removed
+
+    def compact(self, today=None):
+        """
+        Months before the current one are rolled into one month partition;
+        days of the current month with several (or unsorted) parts are merged.
+        Partitions that are already a single sorted part are left alone.
+        Parts left behind by an interrupted merge are deleted first.
+        Output: number of partitions written
+        """
+        removed = self._remove_replaced()
+        if removed:
+            print(f"[INFO] Removed {removed} part(s) left behind by an interrupted compaction")
+        current_month = (today or date.today().isoformat())[:7]
+        by_partition = {}
+        for partition, path, meta in self._live_parts():
+            target = partition[:7] if partition[:7] < current_month else partition
+            by_partition.setdefault(target, []).append((partition, path, meta))
+
+        written = 0
+        for target, parts in sorted(by_partition.items()):
+            if len(parts) == 1 and parts[0][0] == target and parts[0][2].get("sorted"):
+                continue
+            self._merge(target, parts)
+            written += 1
+        return written
+
+    def stats(self):
+        names = self.partitions()
+        parts = rows = size = 0
+        for _, path, meta in self._live_parts():
+            parts += 1
+            rows += meta["rows"]
+            size += sum(e.stat().st_size for e in os.scandir(path))
+        return {"partitions": len(names), "parts": parts, "rows": rows, "size_mb": round(size / 2**20, 2)}
+
+
+def attendance_log(root=ATTENDANCE_PARTS):
+    return PartitionedLog(root, ATTENDANCE_COLUMNS)
+
+
+def access_log(root=ACCESS_PARTS):
+    return PartitionedLog(root, ACCESS_COLUMNS)
+
+
+# ===== Jobs =====
+def archive_attendance(store_path=None, log=None, before=None):
+    """
+    Move closed days (date < before, default today) from the SQLite store into
+    day partitions. The store keeps only open days, so check-ins stay a single
+    indexed write. A day already in the partitions is only deleted from the
+    store (finishes an archive interrupted after the write).
+    Output: number of rows archived
+    """
+    from src.attendance_store import AttendanceStore, STORE_PATH
+
+    store_path = store_path or STORE_PATH
+    if not os.path.exists(store_path):
+        return 0
+    log = log or attendance_log()
+    before = before or date.today().isoformat()
+    store = AttendanceStore(store_path)
+    try:
+        days = store.days(before=before)
+        done = set(log.dates(days[0], days[-1])) if days else set()
+        moved = 0
+        for day in days:
+            if day not in done:
+                rows = store.rows_for(day)
+                log.append({col: [r[i] for r in rows] for i, col in enumerate(ATTENDANCE_COLUMNS)}, sort=True)
+                moved += len(rows)
+            store.delete_day(day)
+        return moved
+    finally:
+        store.close()
+
+
+def read_access_csv(path):
+    """One access CSV (live file or segment) with partition column names."""
+    import pandas as pd
+    df = pd.read_csv(path, dtype=str, keep_default_na=False).rename(columns=ACCESS_CSV_COLUMNS)
+    if "count" not in df.columns:
+        df["count"] = "1"     # files written before repeats were collapsed
+    return df[list(ACCESS_COLUMNS)]
+
+
+def pending_access_csv(csv_path=ACCESS_CSV):
+    """Access rows not partitioned yet: rotated segments + the live file (DataFrame)."""
+    import pandas as pd
+    paths = rotated_segments(csv_path) + ([csv_path] if os.path.exists(csv_path) else [])
+    frames = [read_access_csv(p) for p in paths]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=list(ACCESS_COLUMNS))
+
+
+def segment_id(path):
+    """Identity of a rotated segment: its name is reused once ingested, so add inode + mtime."""
+    st = os.stat(path)
+    return f"{os.path.basename(path)}:{st.st_ino}:{st.st_mtime_ns}"
+
+
+def ingest_access_log(csv_path=ACCESS_CSV, log=None):
+    """
+    Move rotated access-log segments into day partitions. Segments are closed
+    for good once the writer rotates them; the live file is left to the writer.
+    Every part records the segment it came from, so days of a segment already
+    in the partitions (crash before the segment was deleted) are skipped.
+    Output: number of rows ingested
+    """
+    log = log or access_log()
+    n = 0
+    for segment in rotated_segments(csv_path):
+        source = segment_id(segment)
+        df = read_access_csv(segment)
+        if len(df):
+            done = log.ingested(df["date"].min(), df["date"].max())
+            df = df[~df["date"].map(lambda day: f"{source}@{day}" in done)]
+        n += log.append(df, sort=True, source=source)
+        os.remove(segment)
+    return n
+
+
+def query_access(start=None, end=None, employees=None, log=None, csv_path=ACCESS_CSV):
+    """Audit query over partitioned and not-yet-ingested access decisions."""
+    import pandas as pd
+    log = log or access_log()
+    df = pd.concat([log.read(start, end, employees), pending_access_csv(csv_path)], ignore_index=True)
+    mask = np.ones(len(df), dtype=bool)
+    if start:
+        mask &= (df["date"] >= start).to_numpy()
+    if end:
+        mask &= (df["date"] <= end).to_numpy()
+    if employees is not None:
+        mask &= df["employee_id"].isin([str(e) for e in employees]).to_numpy()
+    return df[mask].sort_values(["date", "time"], ignore_index=True)
+
+
+def run_compaction():
+    """Archive closed attendance days, ingest the access CSV and merge small parts."""
+    start = time.perf_counter()
+    moved = archive_attendance()
+    ingested = ingest_access_log()
+    merged = attendance_log().compact() + access_log().compact()
+    print(f"[INFO] Archived {moved} attendance rows, ingested {ingested} access rows, "
+          f"compacted {merged} partitions in {time.perf_counter() - start:.2f}s")
+    print(f"[INFO] Attendance partitions: {attendance_log().stats()}")
+    print(f"[INFO] Access partitions: {access_log().stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Date-partitioned attendance / access logs")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("compact", help="archive closed days and compact partitions (run daily)")
+    query = sub.add_parser("query", help="audit query")
+    query.add_argument("log", choices=["access", "attendance"])
+    query.add_argument("--start", help="YYYY-MM-DD")
+    query.add_argument("--end", help="YYYY-MM-DD")
+    query.add_argument("--employee", nargs="+", help="employee id(s)")
+    args = parser.parse_args()
+
+    if args.command == "compact":
+        run_compaction()
+    elif args.log == "access":
+        print(query_access(args.start, args.end, args.employee).to_string(index=False))
+    else:
+        from src.report import load_attendance
+        df = load_attendance(args.start, args.end, employees=args.employee)
+        print(df.to_string(index=False) if df is not None else "[WARN] No attendance data found.")
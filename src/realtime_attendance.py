@@ -1,13 +1,19 @@
 import cv2
 import time
-import os
-from datetime import datetime
+import threading
 from collections import defaultdict
 
-from src.detect_faces import yolo
-from src.recognize import recognize
+from src.detect_faces import crop_faces, detect
+from src import metrics, model_registry
+from src.recognize import recognize_embedding
+from src.extract_embeddings import get_embeddings
 from src.attendance import log_attendance
-from src.antispoof import check_liveness  # Add anti-spoofing
+from src.antispoof import check_liveness_batch, is_live  # Add anti-spoofing
+from src.background_writer import BackgroundWriter
+from src.camera import FpsMeter, LatestFrameCapture
+from src.tracker import FaceTracker
+from src.scheduler import DetectionScheduler
+from src.snapshot_store import get_snapshot_store
 
 # ======================
 # Time Configuration
@@ -19,130 +25,290 @@ DISPLAY_DURATION = 2.0   # keep name displayed after check (seconds)
 # ======================
 # Snapshot Configuration
 # ======================
-SNAPSHOT_DIR = "snapshots"  # snapshots/<emp_id>/*.jpg
-os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+SNAPSHOT_DIR = "snapshots"  # snapshots/<emp_id>/*.jpg + index.db (src/snapshot_store.py)
+
+DETECTION_COLOR = (255, 128, 0)
 
 
 def save_snapshot(emp_id, face):
-    """Save cropped face image to snapshots/<emp_id>/"""
-    try:
-        emp_dir = os.path.join(SNAPSHOT_DIR, str(emp_id))
-        os.makedirs(emp_dir, exist_ok=True)
-        filename = f"{emp_id}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jpg"
-        cv2.imwrite(os.path.join(emp_dir, filename), face)
-    except Exception as e:
-        print(f"[WARN] Failed to save snapshot for {emp_id}: {e}")
-
-
-def realtime_attendance():
-    cap = cv2.VideoCapture(0)
+    """Queue the cropped face for snapshots/<emp_id>/ (near duplicates are skipped)"""
+    get_snapshot_store(SNAPSHOT_DIR).add(emp_id, face, kind="attendance")
+
+
+class CooldownRegistry:
+    """Per-employee log timestamps; safe to share between camera threads."""
+
+    def __init__(self, cooldown=PER_EMP_COOLDOWN):
+        self.cooldown = cooldown
+        self._last = {}
+        self._lock = threading.Lock()
+
+    def ready(self, emp_id, now):
+        with self._lock:
+            return now - self._last.get(emp_id, 0.0) >= self.cooldown
+
+    def try_acquire(self, emp_id, now):
+        """Check the cooldown and claim it in one step; False if another camera logged first."""
+        with self._lock:
+            if now - self._last.get(emp_id, 0.0) < self.cooldown:
+                return False
+            self._last[emp_id] = now
+            return True
+
+
+class AttendanceState:
+    """Face tracks and cooldown timestamps shared across frames (queue mode)."""
+
+    def __init__(self, cooldowns=None):
+        self.tracker = FaceTracker()
+        self.scheduler = DetectionScheduler()
+        self.last_overlays = []
+        self.last_any_log = 0.0
+        # pass a shared registry to apply the per-employee cooldown across cameras
+        self.cooldowns = cooldowns if cooldowns is not None else CooldownRegistry()
+        self.last_display = defaultdict(lambda: 0.0)
+
+
+def draw_overlays(img, overlays):
+    """Draw ("rect", box, color) / ("text", text, org, scale, color) items onto img."""
+    for item in overlays:
+        if item[0] == "rect":
+            _, (x1, y1, x2, y2), color = item
+            cv2.rectangle(img, (x1, y1), (x2, y2), color, 2)
+        else:
+            _, text, org, scale, color = item
+            cv2.putText(img, text, org, cv2.FONT_HERSHEY_SIMPLEX, scale, color, 2)
+    return img
+
+
+class FrameWork:
+    """Faces of one frame moving through the pipeline stages (see process_frame)."""
+
+    def __init__(self, frame, state, now):
+        self.frame = frame
+        self.state = state
+        self.now = now
+        self.faces, self.boxes, self.chips = [], [], []
+        self.tracks, self.refresh = [], []
+        self.overlays = []
+
+
+def prepare_frame(frame, state, detections, now):
+    """Stage 1: crop the detected faces and match them to the frame's face tracks."""
+    work = FrameWork(frame, state, now)
+
+    # Crop every detected face (chips = 5-point aligned faces for ArcFace)
+    work.faces, work.boxes, work.chips = crop_faces(frame, *detections)
+    for box in work.boxes:
+        work.overlays.append(("rect", box, DETECTION_COLOR))
+
+    # Follow faces across frames; only new tracks, stale results or boxes
+    # that changed a lot go through anti-spoofing + ArcFace again
+    work.tracks = state.tracker.update(work.boxes, now)
+    work.refresh = [i for i, t in enumerate(work.tracks) if t.needs_refresh(now)]
+    return work
+
+
+def recognize_pending(works, antispoof=None):
+    """
+    Stage 2: anti-spoofing + ArcFace for every face to refresh, batched over
+    all given frames (one predict call and one ArcFace run in total).
+    antispoof: private anti-spoof model of the calling thread (default: shared)
+    """
+    pending = [(w, i) for w in works for i in w.refresh]
+    if not pending:
+        return
+
+    # Anti-spoofing check (one predict call)
+    liveness = check_liveness_batch([w.faces[i] for w, i in pending], model=antispoof)
+    live = [k for k, (label, conf) in enumerate(liveness) if is_live(label, conf)]
+
+    # Face recognition: one ArcFace run for every real face to refresh
+    embs = get_embeddings([pending[k][0].chips[pending[k][1]] for k in live]) if live else []
+    emb_by_k = dict(zip(live, embs)) if embs is not None else None
+
+    live = set(live)
+    for k, ((w, i), result) in enumerate(zip(pending, liveness)):
+        if k in live:
+            if emb_by_k is None:
+                continue  # embedding failed, retry on next frame
+            emp_id, name = recognize_embedding(emb_by_k[k])
+        else:
+            emp_id, name = None, "Unknown"
+        w.tracks[i].set_result(result, emp_id, name, -1.0, w.now)
+
+
+def finish_frame(work, writer):
+    """Stage 3: cooldowns, attendance logging and overlays of one frame."""
+    state, now, overlays = work.state, work.now, work.overlays
+
+    # Check cooldown between persons (queue)
+    global_ready = (now - state.last_any_log) >= GLOBAL_COOLDOWN
+
+    for face, (x1, y1, x2, y2), track in zip(work.faces, work.boxes, work.tracks):
+        if track.liveness is None:
+            continue
+        if not is_live(*track.liveness):
+            overlays.append(("text", "FAKE FACE DETECTED!", (x1, y1 - 10), 0.7, (0, 0, 255)))
+            continue
+
+        emp_id, name = track.emp_id, track.name
+        if emp_id is None or name == "Unknown":
+            continue
+
+        # Per-employee cooldown; a track is logged at most once while in view
+        if emp_id in track.logged or not state.cooldowns.ready(emp_id, now):
+            if now - state.last_display[emp_id] <= DISPLAY_DURATION:
+                overlays.append(("rect", (x1, y1, x2, y2), (0, 255, 0)))
+                overlays.append(("text", f"{emp_id} - {name}", (x1, y1 - 10), 0.7, (0, 255, 0)))
+            continue
+
+        # Not ready for next person
+        if not global_ready:
+            overlays.append(("text", "Please wait... next person in queue", (20, 40), 0.8, (0, 255, 255)))
+            continue
+
+        # Claim the cooldown atomically: another camera may log the same person concurrently
+        if not state.cooldowns.try_acquire(emp_id, now):
+            continue
+
+        # Log attendance (Check-in / Check-out)
+        writer.submit(log_attendance, emp_id)
+        writer.submit_droppable(save_snapshot, emp_id, face.copy())
+
+        # Display info
+        overlays.append(("rect", (x1, y1, x2, y2), (0, 255, 0)))
+        overlays.append(("text", f"{emp_id} - {name}", (x1, y1 - 10), 0.7, (0, 255, 0)))
+
+        # Update timestamps
+        track.logged.add(emp_id)
+        state.last_display[emp_id] = now
+        state.last_any_log = now
+        global_ready = False
+        break  # prevent duplicate logs in same frame
+
+    state.last_overlays = overlays
+    return overlays
+
+
+def process_frame(frame, state, writer):
+    """
+    Run detection -> anti-spoofing -> recognition -> logging on one frame.
+    Output: list of overlays to draw (see draw_overlays)
+    """
+    now = time.time()
+    # Motion-gated detection: skipped frames reuse the last overlays
+    if not state.scheduler.should_detect(frame, now, has_tracks=bool(state.tracker.tracks)):
+        return state.last_overlays
+    detections = detect(frame)  # ROI / downscaled detection, boxes in full-res coords
+    work = prepare_frame(frame, state, detections, now)
+    recognize_pending([work])
+    return finish_frame(work, writer)
+
+
+def realtime_attendance(source=0):
+    """
+    Capture, inference and display run decoupled:
+    - capture thread keeps only the newest camera frame,
+    - inference worker always takes the newest frame (stale ones are skipped),
+    - the main thread renders live frames with the latest inference overlays
+      (OpenCV windows must be driven from the main thread).
+    """
+    # load + warm up every model before the camera starts, not on the first face
+    model_registry.warmup()
+
+    capture = LatestFrameCapture(source)
+    if not capture.isOpened():
+        print("[ERROR] Cannot access the camera.")
+        return
+    capture.start()
     print("[INFO] Realtime Attendance System Started (press 'q' to quit)")
 
-    # Store timestamps for logging and display
-    last_any_log = 0.0
-    last_emp_log = defaultdict(lambda: 0.0)
-    last_display = defaultdict(lambda: 0.0)
+    state = AttendanceState()
+    # Logging and snapshots run off the capture loop
+    writer = BackgroundWriter()
 
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
+    processed_fps = FpsMeter()
+    shared = {"overlays": [], "skipped": 0, "processed": 0}
+    shared_lock = threading.Lock()
+    stop = threading.Event()
+
+    def inference_worker():
+        last_seq = 0
+        while not stop.is_set():
+            item = capture.wait_newer(last_seq, timeout=0.5)
+            if item is None:
+                if not capture.running:
+                    break
+                continue
+            seq, _, frame = item
+            try:
+                overlays = process_frame(frame, state, writer)
+            except Exception as e:
+                print(f"[ERROR] Frame processing failed: {e}")
+                overlays = []
+            processed_fps.tick()
+            with shared_lock:
+                shared["overlays"] = overlays
+                shared["skipped"] += max(0, seq - last_seq - 1)
+                shared["processed"] += 1
+            last_seq = seq
 
-        now = time.time()
-        results = yolo(frame)
-        annotated = results[0].plot()
-
-        # Check cooldown between persons (queue)
-        global_ready = (now - last_any_log) >= GLOBAL_COOLDOWN
-
-        for r in results:
-            boxes = r.boxes.xyxy.cpu().numpy()
-
-            for box in boxes:
-                x1, y1, x2, y2 = map(int, box[:4])
-                face = frame[y1:y2, x1:x2]
-                if face.size <= 0:
-                    continue
-
-                # Anti-spoofing check
-                is_real = check_liveness(face)
-                if not is_real:
-                    cv2.putText(
-                        annotated,
-                        "FAKE FACE DETECTED!",
-                        (x1, y1 - 10),
-                        cv2.FONT_HERSHEY_SIMPLEX,
-                        0.7,
-                        (0, 0, 255),
-                        2,
-                    )
-                    continue
-
-                # Face recognition
-                emp_id, name = recognize(face)
-                if emp_id is None or name == "Unknown":
-                    continue
-
-                # Per-employee cooldown
-                if (now - last_emp_log[emp_id]) < PER_EMP_COOLDOWN:
-                    if now - last_display[emp_id] <= DISPLAY_DURATION:
-                        cv2.rectangle(annotated, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                        cv2.putText(
-                            annotated,
-                            f"{emp_id} - {name}",
-                            (x1, y1 - 10),
-                            cv2.FONT_HERSHEY_SIMPLEX,
-                            0.7,
-                            (0, 255, 0),
-                            2,
-                        )
-                    continue
-
-                # Not ready for next person
-                if not global_ready:
-                    cv2.putText(
-                        annotated,
-                        "Please wait... next person in queue",
-                        (20, 40),
-                        cv2.FONT_HERSHEY_SIMPLEX,
-                        0.8,
-                        (0, 255, 255),
-                        2,
-                    )
-                    continue
-
-                # Log attendance (Check-in / Check-out)
-                log_attendance(emp_id)
-                save_snapshot(emp_id, face)
-
-                # Display info
-                cv2.rectangle(annotated, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                cv2.putText(
-                    annotated,
-                    f"{emp_id} - {name}",
-                    (x1, y1 - 10),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    0.7,
-                    (0, 255, 0),
-                    2,
-                )
-
-                # Update timestamps
-                last_emp_log[emp_id] = now
-                last_display[emp_id] = now
-                last_any_log = now
-                global_ready = False
-                break  # prevent duplicate logs in same frame
+    worker = threading.Thread(target=inference_worker, name="hrms-inference", daemon=True)
+    worker.start()
+
+    # Stage timings / model calls go to logs/metrics.prom; press 'm' for the overlay
+    metrics.start_exporter()
+    show_metrics = False
+
+    last_shown = 0
+    while capture.running or last_shown < capture.latest()[0]:
+        seq, _, frame = capture.latest()
+        if frame is None or seq == last_shown:
+            if cv2.waitKey(5) & 0xFF == ord("q"):
+                break
+            continue
+        last_shown = seq
+
+        with shared_lock:
+            overlays = shared["overlays"]
+        annotated = draw_overlays(frame.copy(), overlays)
+        cv2.putText(
+            annotated,
+            f"capture {capture.fps.fps():.1f} fps | processed {processed_fps.fps():.1f} fps | "
+            f"detect {state.scheduler.mode} {state.scheduler.duty_cycle():.0%}",
+            (10, annotated.shape[0] - 12),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.5,
+            (255, 255, 255),
+            1,
+        )
+
+        if show_metrics:
+            metrics.draw_overlay(annotated)
 
         # Display frame
         cv2.imshow("Realtime Attendance (Queue Mode)", annotated)
-        if cv2.waitKey(1) & 0xFF == ord("q"):
+        key = cv2.waitKey(1) & 0xFF
+        if key == ord("q"):
             break
+        if key == ord("m"):
+            show_metrics = not show_metrics
 
-    cap.release()
+    stop.set()
+    worker.join(timeout=5.0)
+    capture.stop()
     cv2.destroyAllWindows()
 
+    writer.close()
+    snapshots = get_snapshot_store(SNAPSHOT_DIR)
+    snapshots.flush()
+    print(f"[INFO] Frames processed: {shared['processed']}, stale frames skipped: {shared['skipped']}")
+    print(f"[INFO] Detection scheduler stats: {state.scheduler.stats()}")
+    print(f"[INFO] Stage metrics: {metrics.snapshot()}")
+    print(f"[INFO] Background writer stats: {writer.stats()}")
+    print(f"[INFO] Snapshot stats: {snapshots.stats()}")
+
 
 if __name__ == "__main__":
     realtime_attendance()
-
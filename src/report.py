@@ -1,50 +1,297 @@
-import pandas as pd
-import matplotlib.pyplot as plt
+import argparse
+import hashlib
 import os
+import sqlite3
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from src.attendance_store import STORE_PATH
+from src.partitioned_log import ATTENDANCE_PARTS, attendance_log
+
+# === Paths ===
+ATTENDANCE_PATH = "logs/attendance.csv"       # legacy CSV (used when there is no store)
+EMPLOYEE_CSV = "db/data_employee.csv"         # roster: expected headcount per department
+REPORT_DIR = "reports"
+CACHE_DIR = "logs/report_cache"               # summaries of closed periods
+
+# === Attendance Policy ===
+WORK_START = "08:30:00"
+LATE_GRACE_MIN = 5                            # check-in after WORK_START + grace = late
+WORKDAY_MASK = "1111100"                      # Mon..Sun, for expected attendance / absences
+
+# report name -> pandas period frequency
+PERIODS = {"daily": "D", "weekly": "W-SUN", "monthly": "M"}
+REPORT_COLUMNS = ("employee_id", "department", "date", "check_in", "check_out")
+SUMMARY_COLUMNS = [
+    "period", "start", "end", "department", "headcount", "workdays", "present_days",
+    "employees_present", "hours_total", "hours_avg", "late_arrivals", "absences",
+]
+
+
+# ===== Loading =====
+def _normalize(df):
+    """Legacy CSV / store columns -> employee_id, department, date, check_in, check_out."""
+    df = df.rename(columns=lambda c: c.strip().lower())
+    df = df.rename(columns={
+        "employee id": "employee_id", "emp_id": "employee_id",
+        "checkin": "check_in", "checkout": "check_out",
+    })
+    for col in ("department", "check_out"):
+        if col not in df.columns:
+            df[col] = ""
+    df = df[list(REPORT_COLUMNS)].copy()
+    df["employee_id"] = df["employee_id"].astype(str)
+    df["department"] = df["department"].fillna("").astype(str)
+    df["date"] = pd.to_datetime(df["date"])
+    return df
+
+
+def load_attendance(start=None, end=None, store_path=STORE_PATH, csv_path=ATTENDANCE_PATH,
+                    parts_root=ATTENDANCE_PARTS, employees=None):
+    """
+    Attendance rows with start <= date <= end (ISO date strings or None),
+    optionally only for some employee ids. Archived days are read from the
+    day partitions in range (src/partitioned_log.py), open days from the
+    SQLite store with an indexed date range; the CSV is the last fallback.
+    """
+    log = attendance_log(parts_root)
+    frames = []
+    if log.partitions(start, end):
+        frames.append(log.read(start, end, employees, columns=REPORT_COLUMNS))
+
+    if os.path.exists(store_path):
+        # only days after the last archived one (an interrupted archive may leave both)
+        query = ("SELECT employee_id, department, date, check_in, check_out FROM attendance "
+                 "WHERE date >= ? AND date <= ? AND date > ?")
+        params = [start or "0000-00-00", end or "9999-99-99", log.last_date() or ""]
+        if employees is not None:
+            ids = [str(e) for e in employees]
+            query += f" AND employee_id IN ({','.join('?' * len(ids))})"
+            params += ids
+        with sqlite3.connect(f"file:{store_path}?mode=ro", uri=True) as conn:
+            frames.append(pd.read_sql_query(query, conn, params=params))
+    if frames:
+        return _normalize(pd.concat(frames, ignore_index=True))
+
+    if not os.path.exists(csv_path):
+        return None
+    df = _normalize(pd.read_csv(csv_path, dtype=str))
+    if start:
+        df = df[df["date"] >= pd.Timestamp(start)]
+    if end:
+        df = df[df["date"] <= pd.Timestamp(end)]
+    if employees is not None:
+        df = df[df["employee_id"].isin([str(e) for e in employees])]
+    return df
+
+
+def first_date(store_path=STORE_PATH, csv_path=ATTENDANCE_PATH, parts_root=ATTENDANCE_PARTS):
+    """Earliest attendance date, without loading the whole history."""
+    first = attendance_log(parts_root).first_date()
+    if first is not None:
+        return pd.Timestamp(first)
+    if os.path.exists(store_path):
+        with sqlite3.connect(f"file:{store_path}?mode=ro", uri=True) as conn:
+            row = conn.execute("SELECT MIN(date) FROM attendance").fetchone()
+        return pd.Timestamp(row[0]) if row and row[0] else None
+    df = load_attendance(csv_path=csv_path, store_path=store_path, parts_root=parts_root)
+    return df["date"].min() if df is not None and len(df) else None
+
+
+def load_roster(path=EMPLOYEE_CSV):
+    """Headcount per department from the employee list (None if unavailable)."""
+    try:
+        roster = pd.read_csv(path, usecols=["Employee ID", "Department"])
+    except (OSError, ValueError) as e:
+        print(f"[WARN] Employee roster unavailable ({e}); headcount = employees seen per period.")
+        return None
+    return roster.groupby(roster["Department"].astype(str))["Employee ID"].nunique()
+
 
-ATTENDANCE_PATH = "logs/attendance.csv"
+# ===== Vectorized summaries =====
+def _seconds(times):
+    """'HH:MM:SS' strings -> seconds since midnight (NaN when empty / malformed)."""
+    raw = np.asarray(times.fillna("").to_numpy(dtype=str), dtype="S8")
+    digits = raw.view(np.uint8).reshape(-1, 8).astype(np.int32) - ord("0")
+    secs = (digits[:, 0] * 36000 + digits[:, 1] * 3600 + digits[:, 3] * 600
+            + digits[:, 4] * 60 + digits[:, 6] * 10 + digits[:, 7])
+    valid = (raw.view(np.uint8).reshape(-1, 8)[:, [2, 5]] == ord(":")).all(axis=1)
+    return np.where(valid, secs, np.nan)
 
 
-def generate_report():
-    if not os.path.exists(ATTENDANCE_PATH):
-        print("[WARN] Attendance log not found.")
-        return
+def daily_records(df):
+    """Add hours worked and late flag per (employee, day) row, fully vectorized."""
+    check_in = _seconds(df["check_in"])
+    check_out = _seconds(df["check_out"])
+    hours = (check_out - check_in) / 3600.0
+    h, m, sec = (int(x) for x in WORK_START.split(":"))
+    late_after = h * 3600 + m * 60 + sec + LATE_GRACE_MIN * 60
+    return df.assign(hours=np.where(hours >= 0, hours, np.nan), late=check_in > late_after)
 
-    df = pd.read_csv(ATTENDANCE_PATH)
 
-    # chuẩn hóa tên cột về lowercase
-    df.columns = [c.strip().lower() for c in df.columns]
+def summarize(daily, freq, headcount=None, today=None):
+    """
+    Per period and department: presence, hours, late arrivals and absences.
+    absences = headcount * workdays elapsed in the period - present employee-days
+    """
+    if daily is None or daily.empty:
+        return pd.DataFrame(columns=SUMMARY_COLUMNS)
+    today = pd.Timestamp(today or date.today()).normalize()
+    period = daily["date"].dt.to_period(freq)
+    grouped = daily.groupby([period.rename("period"), daily["department"]], observed=True).agg(
+        present_days=("employee_id", "size"),
+        employees_present=("employee_id", "nunique"),
+        hours_total=("hours", "sum"),
+        hours_avg=("hours", "mean"),
+        late_arrivals=("late", "sum"),
+    ).reset_index()
 
-    # change alias to "employeeid" and "time"
-    if "employee id" in df.columns:
-        emp_col = "employee id"
-    elif "emp_id" in df.columns:
-        emp_col = "emp_id"
+    # without a roster: employees seen in the period (a period is always loaded whole,
+    # so cached and rebuilt summaries agree)
+    if headcount is None:
+        grouped["headcount"] = grouped["employees_present"]
     else:
-        print("[ERROR] Không tìm thấy cột EmployeeID/emp_id trong attendance.csv")
-        print("Các cột hiện tại:", df.columns)
-        return
+        grouped["headcount"] = grouped["department"].map(headcount).fillna(grouped["employees_present"]).astype(int)
 
-    if "date" in df.columns and "checkin" in df.columns:
-        # Đếm số lần check-in theo nhân viên
-        summary = df.groupby(emp_col).size().reset_index(name="CheckIns")
+    starts = grouped["period"].map(lambda p: p.start_time.normalize())
+    ends = grouped["period"].map(lambda p: p.end_time.normalize())
+    stop = np.minimum(ends.to_numpy(dtype="datetime64[D]"), today.to_datetime64().astype("datetime64[D]"))
+    workdays = np.busday_count(starts.to_numpy(dtype="datetime64[D]"), stop + np.timedelta64(1, "D"),
+                               weekmask=WORKDAY_MASK)
+    grouped["workdays"] = np.maximum(workdays, 0)
+    grouped["absences"] = np.maximum(grouped["headcount"] * grouped["workdays"] - grouped["present_days"], 0)
+    grouped["start"] = starts.dt.strftime("%Y-%m-%d")
+    grouped["end"] = ends.dt.strftime("%Y-%m-%d")
+    grouped["period"] = grouped["period"].astype(str)
+    grouped["hours_total"] = grouped["hours_total"].round(2)
+    grouped["hours_avg"] = grouped["hours_avg"].round(2)
+    grouped["late_arrivals"] = grouped["late_arrivals"].astype(int)
+    return grouped[SUMMARY_COLUMNS]
+
+
+# ===== Cache of closed periods =====
+def _policy_tag():
+    """Cache files are tied to the policy they were computed with."""
+    return hashlib.sha1(f"{WORK_START}|{LATE_GRACE_MIN}|{WORKDAY_MASK}".encode()).hexdigest()[:8]
+
+
+def _cache_path(name, cache_dir):
+    return os.path.join(cache_dir, f"{name}_{_policy_tag()}.csv")
+
+
+def period_summary(name, today=None, cache_dir=CACHE_DIR, headcount=None, rebuild=False,
+                   store_path=STORE_PATH, csv_path=ATTENDANCE_PATH, parts_root=ATTENDANCE_PARTS):
+    """
+    Summary for one report (daily / weekly / monthly). Closed periods are read
+    from the cache; only the periods after them (normally just the current
+    one) are recomputed, loading only their attendance rows. Use rebuild=True
+    after editing past attendance or the roster.
+    """
+    freq = PERIODS[name]
+    today = pd.Timestamp(today or date.today()).normalize()
+    path = _cache_path(name, cache_dir)
+
+    cached = pd.DataFrame(columns=SUMMARY_COLUMNS)
+    if not rebuild and os.path.exists(path):
+        cached = pd.read_csv(path, dtype={"period": str, "department": str})
+        cached["department"] = cached["department"].fillna("")
+
+    # closed periods are contiguous: resume the day after the last cached one
+    if len(cached):
+        start = pd.Timestamp(cached["end"].max()) + pd.Timedelta(days=1)
     else:
-        print("[ERROR] Không tìm thấy cột date/checkin trong attendance.csv")
-        print("Các cột hiện tại:", df.columns)
-        return
+        start = first_date(store_path, csv_path, parts_root)
+        if start is None:
+            return cached
+        start = start.to_period(freq).start_time
+    if start > today:
+        return cached
+
+    df = load_attendance(start.strftime("%Y-%m-%d"), today.strftime("%Y-%m-%d"), store_path, csv_path, parts_root)
+    fresh = summarize(daily_records(df), freq, headcount, today) if df is not None else None
+    if fresh is None or fresh.empty:
+        return cached
+
+    # periods that ended before today never change again -> cache them
+    closed = fresh[pd.to_datetime(fresh["end"]) < today]
+    if len(closed):
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = path + ".tmp"
+        pd.concat([cached, closed], ignore_index=True).to_csv(tmp_path, index=False)
+        os.replace(tmp_path, path)
+    return pd.concat([cached, fresh], ignore_index=True).sort_values(["period", "department"], ignore_index=True)
+
+
+# ===== Export =====
+def plot_summary(summary, name, path, last=12):
+    """Headless PNG: hours worked and late arrivals / absences per department."""
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(11, 7))
+    ax_hours, ax_late = fig.subplots(2, 1)
+    if not summary.empty:
+        periods = sorted(summary["period"].unique())[-last:]
+        recent = summary[summary["period"].isin(periods)]
+        hours = recent.pivot_table(index="period", columns="department", values="hours_total", aggfunc="sum")
+        hours.plot(ax=ax_hours, marker="o")
+        latest = recent[recent["period"] == periods[-1]].set_index("department")
+        latest[["late_arrivals", "absences"]].plot.bar(ax=ax_late, color=["orange", "tomato"])
+        ax_late.set_title(f"Late arrivals / absences ({periods[-1]})")
+    ax_hours.set_title(f"Hours worked per department ({name})")
+    ax_hours.set_ylabel("Hours")
+    fig.tight_layout()
+    fig.savefig(path, dpi=100)
+
+
+def export_reports(reports, output_dir=REPORT_DIR):
+    """Write <name>.csv, <name>.png per report and attendance_report.xlsx (if openpyxl exists)."""
+    os.makedirs(output_dir, exist_ok=True)
+    written = []
+    for name, summary in reports.items():
+        csv_path = os.path.join(output_dir, f"attendance_{name}.csv")
+        summary.to_csv(csv_path, index=False)
+        written.append(csv_path)
+        try:
+            png_path = os.path.join(output_dir, f"attendance_{name}.png")
+            plot_summary(summary, name, png_path)
+            written.append(png_path)
+        except ImportError:
+            print("[WARN] matplotlib not installed, skipping charts.")
+
+    try:
+        xlsx_path = os.path.join(output_dir, "attendance_report.xlsx")
+        with pd.ExcelWriter(xlsx_path) as writer:
+            for name, summary in reports.items():
+                summary.to_excel(writer, sheet_name=name, index=False)
+        written.append(xlsx_path)
+    except ImportError:
+        print("[WARN] openpyxl not installed, skipping Excel export.")
+    return written
+
 
-    print(summary)
+def generate_report(output_dir=REPORT_DIR, names=tuple(PERIODS), today=None, rebuild=False):
+    """Build daily / weekly / monthly summaries and export them (no window needed)."""
+    start = datetime.now()
+    headcount = load_roster()
+    reports = {name: period_summary(name, today, headcount=headcount, rebuild=rebuild) for name in names}
+    if all(r.empty for r in reports.values()):
+        print("[WARN] No attendance data found.")
+        return reports
 
-    # Plot
-    plt.figure(figsize=(8, 5))
-    plt.bar(summary[emp_col].astype(str), summary["CheckIns"], color="skyblue")
-    plt.xlabel("Employee ID")
-    plt.ylabel("Check-ins")
-    plt.title("Attendance Report")
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    plt.show()
+    written = export_reports(reports, output_dir)
+    monthly = reports.get("monthly")
+    if monthly is not None and not monthly.empty:
+        print(monthly[monthly["period"] == monthly["period"].max()].to_string(index=False))
+    print(f"[INFO] Report written in {(datetime.now() - start).total_seconds():.2f}s: {', '.join(written)}")
+    return reports
 
 
 if __name__ == "__main__":
-    generate_report()
+    parser = argparse.ArgumentParser(description="Attendance summaries (CSV / Excel / PNG)")
+    parser.add_argument("--output", default=REPORT_DIR)
+    parser.add_argument("--periods", nargs="+", default=list(PERIODS), choices=list(PERIODS))
+    parser.add_argument("--rebuild", action="store_true", help="ignore cached closed periods")
+    args = parser.parse_args()
+    generate_report(args.output, args.periods, rebuild=args.rebuild)
@@ -0,0 +1,97 @@
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+# === Scheduler Configuration ===
+MOTION_SIZE = (64, 36)          # frames are compared at this tiny grayscale size
+MOTION_PIXEL_DELTA = 12         # per-pixel gray level change counted as "changed"
+MOTION_THRESHOLD = 0.01         # fraction of changed pixels that counts as motion
+MOTION_HOLD = 1.0               # keep detecting every frame this long after motion (seconds)
+STABLE_EVERY_N = 5              # tracks present, no motion: detect every Nth frame
+IDLE_INTERVAL = 2.0             # empty scene, no motion: still detect this often (seconds)
+MAX_GAP = 0.5                   # never skip detection longer than this while tracks exist
+                                # (must stay below tracker.MAX_MISSED_TIME)
+DUTY_WINDOW = 300               # frames used for the rolling duty cycle
+
+
+class DetectionScheduler:
+    """
+    Decide per frame whether the face detector has to run.
+
+    A cheap frame difference (tiny grayscale thumbnail, absdiff) gates YOLO:
+    - motion: detect every frame, and keep doing so for MOTION_HOLD seconds
+    - faces tracked but the scene is still: every STABLE_EVERY_N-th frame
+      (and at least every MAX_GAP seconds so tracks do not expire)
+    - empty and still (e.g. overnight): once every IDLE_INTERVAL seconds
+    duty_cycle() is the fraction of recent frames that ran the detector.
+    """
+
+    def __init__(self, every_n=STABLE_EVERY_N, idle_interval=IDLE_INTERVAL,
+                 motion_threshold=MOTION_THRESHOLD, motion_hold=MOTION_HOLD, max_gap=MAX_GAP):
+        self.every_n = every_n
+        self.idle_interval = idle_interval
+        self.motion_threshold = motion_threshold
+        self.motion_hold = motion_hold
+        self.max_gap = max_gap
+        self._prev = None
+        self._last_motion = -float("inf")
+        self._last_detect = -float("inf")
+        self._since_detect = 0
+        self._history = deque(maxlen=DUTY_WINDOW)
+        self._counts = {"frames": 0, "detected": 0, "motion": 0, "stable": 0, "idle": 0}
+        self.mode = "motion"
+        self.motion = 0.0
+        self._lock = threading.Lock()
+
+    def motion_score(self, frame):
+        """Fraction of thumbnail pixels that changed since the previous frame."""
+        small = cv2.resize(frame, MOTION_SIZE, interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        prev, self._prev = self._prev, small
+        if prev is None:
+            return 1.0
+        return float(np.count_nonzero(cv2.absdiff(small, prev) > MOTION_PIXEL_DELTA)) / small.size
+
+    def should_detect(self, frame, now=None, has_tracks=False):
+        """Return True if the detector should run on this frame."""
+        now = time.time() if now is None else now
+        with self._lock:
+            self.motion = self.motion_score(frame)
+            if self.motion >= self.motion_threshold:
+                self._last_motion = now
+
+            if now - self._last_motion <= self.motion_hold:
+                self.mode, run = "motion", True
+            elif has_tracks:
+                self.mode = "stable"
+                run = self._since_detect + 1 >= self.every_n or now - self._last_detect >= self.max_gap
+            else:
+                self.mode = "idle"
+                run = now - self._last_detect >= self.idle_interval
+
+            self._counts["frames"] += 1
+            self._counts[self.mode] += 1
+            self._history.append(run)
+            if run:
+                self._counts["detected"] += 1
+                self._last_detect = now
+                self._since_detect = 0
+            else:
+                self._since_detect += 1
+            return run
+
+    def duty_cycle(self):
+        """Fraction of the last DUTY_WINDOW frames on which detection ran."""
+        with self._lock:
+            return sum(self._history) / len(self._history) if self._history else 1.0
+
+    def stats(self):
+        with self._lock:
+            out = dict(self._counts)
+            out["mode"] = self.mode
+        out["duty_cycle"] = self.duty_cycle()
+        return out
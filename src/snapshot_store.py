@@ -0,0 +1,372 @@
+import argparse
+import atexit
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import cv2
+
+# ======================
+# Snapshot Configuration
+# ======================
+SNAPSHOT_DIR = "snapshots"
+INDEX_NAME = "index.db"              # snapshots/index.db
+JPEG_QUALITY = 85
+MAX_SIDE = 640                       # longest side after downscaling (0 = keep size)
+DEDUPE_DISTANCE = 6                  # dHash bits; closer to a recent snapshot = duplicate
+DEDUPE_WINDOW = 3600.0               # seconds a snapshot counts as "recent" for dedupe
+DEDUPE_RECENT = 16                   # recent hashes kept per employee
+BATCH_SIZE = 16                      # snapshots encoded + indexed per flush
+FLUSH_INTERVAL = 2.0                 # seconds a snapshot may wait in memory
+MAX_PENDING = 256                    # dropped beyond this (disk slower than arrivals)
+MAX_EMPLOYEE_MB = 50                 # per-employee quota (oldest deleted first)
+MAX_TOTAL_MB = 2048                  # total quota
+RETENTION_DAYS = 90                  # snapshots older than this are deleted
+RETENTION_CHECK_INTERVAL = 3600.0    # seconds between retention sweeps
+
+
+def dhash(img):
+    """64-bit difference hash of an image (robust to small shifts / lighting)."""
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int("".join("1" if b else "0" for b in bits), 2)
+
+
+def _hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class SnapshotStore:
+    """
+    Snapshot files under snapshots/<emp_id>/ plus a SQLite index.
+
+    add() downscales the image to MAX_SIDE, computes a perceptual hash and
+    skips it when it is within DEDUPE_DISTANCE bits of one of the employee's
+    recent snapshots; kept images wait in memory and are JPEG-encoded,
+    written and indexed in batches (BATCH_SIZE or FLUSH_INTERVAL, on a
+    background thread, one index transaction per batch).
+
+    The index (employee, time, path, bytes, hash) answers audit lookups and
+    quota accounting without directory scans. After each batch the
+    per-employee and total quotas are enforced by deleting the oldest
+    snapshots (never an employee's newest one); usage is summed from the
+    index inside the same write transaction, so processes sharing the
+    store count each other's files. RETENTION_DAYS is applied periodically. Files that existed
+    before the index are imported once when it is created.
+    """
+
+    def __init__(self, root=SNAPSHOT_DIR, quality=JPEG_QUALITY, max_side=MAX_SIDE,
+                 dedupe_distance=DEDUPE_DISTANCE, dedupe_window=DEDUPE_WINDOW,
+                 batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL,
+                 max_employee_mb=MAX_EMPLOYEE_MB, max_total_mb=MAX_TOTAL_MB, retention_days=RETENTION_DAYS):
+        self.root = root
+        self.quality = quality
+        self.max_side = max_side
+        self.dedupe_distance = dedupe_distance
+        self.dedupe_window = dedupe_window
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_employee_bytes = int(max_employee_mb * 2**20)
+        self.max_total_bytes = int(max_total_mb * 2**20)
+        self.retention_days = retention_days
+
+        os.makedirs(root, exist_ok=True)
+        index_path = os.path.join(root, INDEX_NAME)
+        is_new = not os.path.exists(index_path)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(index_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS snapshots (
+                    id          INTEGER PRIMARY KEY,
+                    employee_id TEXT NOT NULL,
+                    ts          REAL NOT NULL,
+                    kind        TEXT NOT NULL DEFAULT '',
+                    path        TEXT NOT NULL,
+                    bytes       INTEGER NOT NULL,
+                    width       INTEGER,
+                    height      INTEGER,
+                    phash       TEXT
+                )
+                """
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_snapshots_emp_ts ON snapshots (employee_id, ts)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_snapshots_ts ON snapshots (ts)")
+        if is_new:
+            n = self._import_existing()
+            if n:
+                print(f"[INFO] Indexed {n} existing snapshots in {root}")
+
+        self._pending = []
+        self._recent = {}            # emp_id -> deque[(ts, hash)]
+        self._last_retention = 0.0
+        self._counters = {"added": 0, "duplicates": 0, "dropped": 0, "written": 0, "deleted": 0, "batches": 0}
+        self._closed = False
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._flush_loop, name="hrms-snapshots", daemon=True)
+        self._thread.start()
+
+    def _import_existing(self):
+        rows = []
+        for entry in os.scandir(self.root):
+            if not entry.is_dir():
+                continue
+            for f in os.scandir(entry.path):
+                if f.name.lower().endswith(".jpg"):
+                    st = f.stat()
+                    rows.append((entry.name, st.st_mtime, "", os.path.relpath(f.path, self.root), st.st_size))
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO snapshots (employee_id, ts, kind, path, bytes) VALUES (?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    # ===== Public =====
+    def add(self, emp_id, img, kind="", now=None):
+        """
+        Queue a snapshot of emp_id. Output: False when it was a near duplicate
+        of a recent snapshot or the queue is full, True otherwise.
+        """
+        if img is None or img.size == 0:
+            return False
+        emp_id = str(emp_id)
+        now = now or time.time()
+        h, w = img.shape[:2]
+        if self.max_side and max(h, w) > self.max_side:
+            scale = self.max_side / max(h, w)
+            img = cv2.resize(img, (max(1, round(w * scale)), max(1, round(h * scale))), interpolation=cv2.INTER_AREA)
+        phash = dhash(img)
+
+        with self._lock:
+            if self._closed:
+                return False
+            recent = self._recent_hashes(emp_id)
+            while recent and now - recent[0][0] > self.dedupe_window:
+                recent.popleft()
+            if any(_hamming(phash, old) <= self.dedupe_distance for _, old in recent):
+                self._counters["duplicates"] += 1
+                return False
+            if len(self._pending) >= MAX_PENDING:
+                self._counters["dropped"] += 1
+                return False
+            recent.append((now, phash))
+            self._pending.append((emp_id, now, kind, img, phash))
+            self._counters["added"] += 1
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self._wake.set()
+        return True
+
+    def find(self, emp_id=None, start=None, end=None, kind=None, limit=100):
+        """
+        Indexed audit lookup, newest first. start / end: datetime or epoch seconds.
+        Output: list of dicts (employee_id, time, kind, path, bytes, width, height)
+        """
+        query = "SELECT employee_id, ts, kind, path, bytes, width, height FROM snapshots WHERE 1=1"
+        params = []
+        for clause, value in (("employee_id = ?", None if emp_id is None else str(emp_id)),
+                              ("ts >= ?", _epoch(start)), ("ts <= ?", _epoch(end)), ("kind = ?", kind)):
+            if value is not None:
+                query += f" AND {clause}"
+                params.append(value)
+        query += " ORDER BY ts DESC LIMIT ?"
+        params.append(int(limit))
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [{
+            "employee_id": r[0], "time": datetime.fromtimestamp(r[1]).isoformat(timespec="seconds"),
+            "kind": r[2], "path": os.path.join(self.root, r[3]), "bytes": r[4], "width": r[5], "height": r[6],
+        } for r in rows]
+
+    def flush(self):
+        """Encode, write and index every pending snapshot, then enforce quotas."""
+        with self._lock:
+            if self._closed:
+                return
+            pending, self._pending = self._pending, []
+            written = self._write_batch(pending) if pending else set()
+            self._enforce_quotas(written)
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._conn.close()
+        self._wake.set()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats["pending"] = len(self._pending)
+            if not self._closed:
+                total, employees = self._conn.execute(
+                    "SELECT COALESCE(SUM(bytes), 0), COUNT(DISTINCT employee_id) FROM snapshots").fetchone()
+                stats["total_mb"] = round(total / 2**20, 2)
+                stats["employees"] = employees
+        return stats
+
+    # ===== Internals (called with the lock held) =====
+    def _recent_hashes(self, emp_id):
+        recent = self._recent.get(emp_id)
+        if recent is None:
+            # warm start from the index so a restart does not re-save the same face
+            rows = self._conn.execute(
+                "SELECT ts, phash FROM snapshots WHERE employee_id = ? AND phash IS NOT NULL "
+                "ORDER BY ts DESC LIMIT ?", (emp_id, DEDUPE_RECENT)).fetchall()
+            recent = self._recent[emp_id] = deque(((ts, int(h, 16)) for ts, h in reversed(rows)),
+                                                  maxlen=DEDUPE_RECENT)
+        return recent
+
+    def _write_batch(self, pending):
+        """Encode, write and index a batch. Output: ids of the employees written"""
+        rows = []
+        for emp_id, ts, kind, img, phash in pending:
+            ok, buf = cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+            if not ok:
+                continue
+            emp_dir = os.path.join(self.root, emp_id)
+            os.makedirs(emp_dir, exist_ok=True)
+            stem = f"{emp_id}_{datetime.fromtimestamp(ts).strftime('%Y%m%d_%H%M%S_%f')}"
+            rel = os.path.join(emp_id, f"{stem}.jpg")
+            n = 1
+            while os.path.exists(os.path.join(self.root, rel)):
+                rel = os.path.join(emp_id, f"{stem}_{n}.jpg")
+                n += 1
+            try:
+                with open(os.path.join(self.root, rel), "wb") as f:
+                    f.write(buf.tobytes())
+            except OSError as e:
+                print(f"[WARN] Failed to save snapshot for {emp_id}: {e}")
+                continue
+            rows.append((emp_id, ts, kind, rel, len(buf), img.shape[1], img.shape[0], f"{phash:016x}"))
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO snapshots (employee_id, ts, kind, path, bytes, width, height, phash) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        self._counters["written"] += len(rows)
+        self._counters["batches"] += 1
+        return {r[0] for r in rows}
+
+    def _delete(self, rows):
+        """Remove rows [(id, employee_id, path, bytes)] from the index (inside the caller's transaction)."""
+        self._conn.executemany("DELETE FROM snapshots WHERE id = ?", [(r[0],) for r in rows])
+        return list(rows)
+
+    def _remove_files(self, rows):
+        for _, _, rel, _ in rows:
+            try:
+                os.remove(os.path.join(self.root, rel))
+            except FileNotFoundError:
+                pass
+        self._counters["deleted"] += len(rows)
+
+    def _enforce_quotas(self, emp_ids=()):
+        """Retention sweep plus the quotas of emp_ids and the total, in one write transaction."""
+        now = time.time()
+        retention_due = self.retention_days and now - self._last_retention >= RETENTION_CHECK_INTERVAL
+        if not emp_ids and not retention_due:
+            return
+        conn, doomed = self._conn, []
+        conn.execute("BEGIN IMMEDIATE")     # other processes' quota checks wait for this one
+        try:
+            if retention_due:
+                self._last_retention = now
+                doomed += self._delete(conn.execute(
+                    "SELECT id, employee_id, path, bytes FROM snapshots WHERE ts < ?",
+                    (now - self.retention_days * 86400,)).fetchall())
+
+            for emp_id in sorted(emp_ids) if self.max_employee_bytes else ():
+                used = conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM snapshots WHERE employee_id = ?",
+                                    (emp_id,)).fetchone()[0]
+                if used > self.max_employee_bytes:
+                    doomed += self._delete(self._oldest(used - self.max_employee_bytes, emp_id))
+
+            if self.max_total_bytes:
+                total = conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM snapshots").fetchone()[0]
+                if total > self.max_total_bytes:
+                    doomed += self._delete(self._oldest(total - self.max_total_bytes))
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        # files go only after the index no longer references them
+        self._remove_files(doomed)
+
+    def _oldest(self, excess, emp_id=None):
+        """
+        Oldest snapshots (of emp_id, or overall) whose sizes add up to at least
+        `excess` bytes. The newest snapshot of every employee is never returned.
+        """
+        where, params = ("WHERE employee_id = ?", (emp_id,)) if emp_id is not None else ("", ())
+        cur = self._conn.execute(
+            "SELECT id, employee_id, path, bytes FROM ("
+            "  SELECT id, employee_id, path, bytes, ts, ROW_NUMBER() OVER "
+            f"   (PARTITION BY employee_id ORDER BY ts DESC, id DESC) AS newest FROM snapshots {where}"
+            ") WHERE newest > 1 ORDER BY ts, id", params)
+        out, freed = [], 0
+        for row in cur:
+            if freed >= excess:
+                break
+            out.append(row)
+            freed += row[3]
+        return out
+
+    def _flush_loop(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            if self._closed:
+                break
+            try:
+                self.flush()
+            except (OSError, sqlite3.Error) as e:
+                print(f"[WARN] Snapshot flush failed: {e}")
+
+
+def _epoch(value):
+    if value is None or isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return value.timestamp()
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_snapshot_store(root=SNAPSHOT_DIR):
+    """Process-wide store for `root` (flushed and closed automatically at exit)."""
+    with _stores_lock:
+        store = _stores.get(root)
+        if store is None or store._closed:
+            store = _stores[root] = SnapshotStore(root)
+            atexit.register(store.close)
+        return store
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Snapshot audit lookup / maintenance")
+    parser.add_argument("--root", default=SNAPSHOT_DIR)
+    parser.add_argument("--employee", help="employee id")
+    parser.add_argument("--start", help="ISO date / time")
+    parser.add_argument("--end", help="ISO date / time")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--enforce", action="store_true", help="apply retention + quotas now")
+    args = parser.parse_args()
+
+    store = get_snapshot_store(args.root)
+    if args.enforce:
+        store._last_retention = 0.0
+        store.flush()
+    for item in store.find(args.employee, args.start, args.end, limit=args.limit):
+        print(f"{item['time']}  {item['employee_id']:<10} {item['kind']:<10} {item['bytes']:>8}  {item['path']}")
+    print(f"[INFO] {store.stats()}")
@@ -0,0 +1,107 @@
+import time
+import numpy as np
+
+# ======================
+# Tracker Configuration
+# ======================
+MATCH_IOU = 0.3          # min IoU to associate a detection with an existing track
+MAX_MISSED_TIME = 1.0    # drop a track not seen for this long (seconds)
+REFRESH_INTERVAL = 2.0   # re-run liveness + embedding for a track this often (seconds)
+REFRESH_IOU = 0.5        # ... or when the box moved/changed below this IoU vs last check
+
+
+def iou_matrix(a, b):
+    """IoU between every box in a (N,4) and b (M,4), boxes as [x1, y1, x2, y2]."""
+    a = np.asarray(a, dtype=np.float32).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float32).reshape(-1, 4)
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)), dtype=np.float32)
+
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = area_a[:, None] + area_b[None, :] - inter
+    return inter / np.maximum(union, 1e-6)
+
+
+class Track:
+    """One face followed across frames, with its cached liveness / identity."""
+
+    def __init__(self, track_id, box, now):
+        self.id = track_id
+        self.box = tuple(box)
+        self.last_seen = now
+        # cached results from the last liveness + recognition pass
+        self.checked_box = None
+        self.checked_at = 0.0
+        self.liveness = None        # (label, confidence)
+        self.emp_id = None
+        self.name = "Unknown"
+        self.score = -1.0
+        # employee ids already logged while this track has been in view
+        self.logged = set()
+
+    def needs_refresh(self, now, interval=REFRESH_INTERVAL, refresh_iou=REFRESH_IOU):
+        """True if liveness/identity must be recomputed for the current box."""
+        if self.checked_box is None or now - self.checked_at >= interval:
+            return True
+        return iou_matrix([self.box], [self.checked_box])[0, 0] < refresh_iou
+
+    def set_result(self, liveness, emp_id, name, score, now):
+        self.liveness = liveness
+        self.emp_id = emp_id
+        self.name = name
+        self.score = score
+        self.checked_box = self.box
+        self.checked_at = now
+
+
+class FaceTracker:
+    """
+    Greedy IoU tracker over detector boxes (r.boxes.xyxy).
+
+    update() associates the current detections with existing tracks and
+    returns one Track per detection (same order), creating new tracks for
+    unmatched boxes and dropping tracks unseen for MAX_MISSED_TIME.
+    """
+
+    def __init__(self, match_iou=MATCH_IOU, max_missed_time=MAX_MISSED_TIME):
+        self.match_iou = match_iou
+        self.max_missed_time = max_missed_time
+        self.tracks = []
+        self._next_id = 1
+
+    def update(self, boxes, now=None):
+        now = time.time() if now is None else now
+        boxes = [tuple(map(int, b[:4])) for b in boxes]
+        assigned = [None] * len(boxes)
+
+        if self.tracks and boxes:
+            ious = iou_matrix([t.box for t in self.tracks], boxes)
+            # greedy: best remaining pair first
+            order = np.dstack(np.unravel_index(np.argsort(-ious, axis=None), ious.shape))[0]
+            used_tracks = set()
+            for ti, di in order:
+                if ious[ti, di] < self.match_iou:
+                    break
+                if ti in used_tracks or assigned[di] is not None:
+                    continue
+                track = self.tracks[ti]
+                track.box = boxes[di]
+                track.last_seen = now
+                assigned[di] = track
+                used_tracks.add(ti)
+
+        for di, box in enumerate(boxes):
+            if assigned[di] is None:
+                track = Track(self._next_id, box, now)
+                self._next_id += 1
+                self.tracks.append(track)
+                assigned[di] = track
+
+        self.tracks = [t for t in self.tracks if now - t.last_seen <= self.max_missed_time]
+        return assigned
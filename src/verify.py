@@ -1,28 +1,28 @@
 import cv2
-import os
-import json
+import time
 import numpy as np
-from datetime import datetime
-from src.detect_faces import yolo
-from src.extract_embeddings import get_embedding
-from src.antispoof import check_liveness
+from src.detect_faces import crop_faces, detect
+from src import metrics, model_registry
+from src.extract_embeddings import get_embedding, get_embeddings
+from src.antispoof import check_liveness_batch, is_live
+from src.background_writer import BackgroundWriter
+from src.tracker import FaceTracker
+from src.scheduler import DetectionScheduler
+from src.gallery import get_gallery
+from src.embedding_store import get_store
+from src.access_log import get_access_log
+from src.snapshot_store import get_snapshot_store
 
 # =======================
 # Configuration
 # =======================
 DB_PATH = "db/important_employees.json"
-ACCESS_LOG = "db/access_logs.csv"
-SNAPSHOT_DIR = "snapshots"
-
-os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+ACCESS_LOG = "db/access_logs.csv"      # buffered + rotated, see src/access_log.py
+SNAPSHOT_DIR = "snapshots"            # snapshots/<emp_id>/*.jpg + index.db (src/snapshot_store.py)
 
 def load_db():
     """Load employee database"""
-    if not os.path.exists(DB_PATH):
-        print("[WARN] Database not found! Creating new...")
-        return {}
-    with open(DB_PATH, "r", encoding="utf-8") as f:
-        return json.load(f)
+    return get_store(DB_PATH).to_dict()
 
 def cosine_similarity(a, b):
     """Calculate cosine similarity between two vectors"""
@@ -31,8 +31,9 @@ def cosine_similarity(a, b):
 
 def verify_access(face_img, threshold=0.55):
     """Verify employee access using one-to-one matching"""
-    db = load_db()
-    if not db:
+    gallery = get_gallery(DB_PATH)
+    gallery.refresh()
+    if len(gallery) == 0:
         print("[WARN] Empty database.")
         return None, None, 0
 
@@ -40,15 +41,13 @@ def verify_access(face_img, threshold=0.55):
     if emb is None:
         return None, None, 0
 
-    best_id, best_name, best_score = None, None, -1
+    return verify_embedding(emb, threshold)
 
-    for emp_id, emp_data in db.items():
-        db_emb = np.array(emp_data["embedding"])
-        score = cosine_similarity(emb, db_emb)
-        if score > best_score:
-            best_score = score
-            best_id = emp_id
-            best_name = emp_data["name"]
+def verify_embedding(emb, threshold=0.55):
+    """Verify an already-extracted embedding against the database"""
+    best_id, best_name, best_score = get_gallery(DB_PATH).match(emb)
+    if best_id is None:
+        return None, None, 0
 
     if best_score > threshold:
         return (best_id, best_name, best_score)
@@ -56,107 +55,149 @@ def verify_access(face_img, threshold=0.55):
         return (None, None, best_score)
 
 def log_access(emp_id, name, status, liveness="Unknown"):
-    """Log access attempts with timestamp"""
-    now = datetime.now()
-    date_str = now.strftime("%Y-%m-%d")
-    time_str = now.strftime("%H:%M:%S")
-
-    new_row = f"{date_str},{time_str},{emp_id},{name},{status},{liveness}\n"
-
-    if not os.path.exists(ACCESS_LOG):
-        with open(ACCESS_LOG, "w", encoding="utf-8") as f:
-            f.write("Date,Time,Employee ID,Name,Status,Liveness\n")
-
-    with open(ACCESS_LOG, "a", encoding="utf-8") as f:
-        f.write(new_row)
+    """Log access attempts with timestamp (buffered; repeated denials are collapsed)"""
+    with metrics.timer("logging"):
+        get_access_log(ACCESS_LOG).write(emp_id, name, status, liveness)
 
 def save_snapshot(emp_id, name, frame):
-    """Save snapshot of verification attempt"""
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    safe_name = name.replace(" ", "_")
-    emp_dir = os.path.join(SNAPSHOT_DIR, str(emp_id))
-    os.makedirs(emp_dir, exist_ok=True)
-    filename = f"{emp_id}_{safe_name}_{timestamp}.jpg"
-    filepath = os.path.join(emp_dir, filename)
-    cv2.imwrite(filepath, frame)
+    """Queue a (downscaled) snapshot of the verification attempt; near duplicates are skipped"""
+    get_snapshot_store(SNAPSHOT_DIR).add(emp_id, frame, kind="access")
 
 def one_to_one_verification():
     """Main verification loop"""
+    # load + warm up every model before the camera starts, not on the first face
+    model_registry.warmup()
+
     cap = cv2.VideoCapture(0)
     print("[INFO] Starting One-to-One Access Control... Press 'q' to quit.")
 
+    # Access logging and snapshots run off the capture loop
+    writer = BackgroundWriter()
+    # Liveness + matching are cached per face track and only refreshed periodically
+    tracker = FaceTracker()
+    # Motion-gated detection (see src/scheduler.py)
+    scheduler = DetectionScheduler()
+
+    # Stage timings / model calls go to logs/metrics.prom; press 'm' for the overlay
+    metrics.start_exporter()
+    show_metrics = False
+
     while True:
-        ret, frame = cap.read()
+        with metrics.timer("capture"):
+            ret, frame = cap.read()
         if not ret:
             break
 
-        results = yolo(frame)
+        now = time.time()
         annotated = frame.copy()
 
-        for r in results:
-            boxes = r.boxes.xyxy.cpu().numpy()
-            for box in boxes:
-                x1, y1, x2, y2 = map(int, box[:4])
-                face = frame[y1:y2, x1:x2]
-
-                if face.size <= 0:
-                    continue
-
-                # Step 1: Liveness detection
-                is_real = check_liveness(face)
-                if not is_real:
-                    cv2.rectangle(annotated, (x1, y1), (x2, y2), (0, 0, 255), 2)
-                    cv2.putText(
-                        annotated,
-                        "Fake Face Detected",
-                        (x1, y1 - 10),
-                        cv2.FONT_HERSHEY_SIMPLEX,
-                        0.8,
-                        (0, 0, 255),
-                        2,
-                    )
+        if scheduler.should_detect(frame, now, has_tracks=bool(tracker.tracks)):
+            faces, face_boxes, chips = crop_faces(frame, *detect(frame))
+            tracks = tracker.update(face_boxes, now)
+            refresh = [i for i, t in enumerate(tracks) if t.needs_refresh(now)]
+        else:
+            # still scene: keep drawing the current tracks without running YOLO
+            tracks = list(tracker.tracks)
+            face_boxes = [t.box for t in tracks]
+            refresh = []
+        if refresh:
+            # Step 1: Liveness detection (one predict call for every face to refresh)
+            liveness = check_liveness_batch([faces[i] for i in refresh])
+            live_idx = [i for i, (label, conf) in zip(refresh, liveness) if is_live(label, conf)]
+
+            # Step 2: Face matching (one ArcFace run for all real faces)
+            embs = get_embeddings([chips[i] for i in live_idx]) if live_idx else []
+            emb_by_idx = dict(zip(live_idx, embs)) if embs is not None else None
+
+            # Decisions are logged once per refresh, not on every frame
+            for i, live in zip(refresh, liveness):
+                track = tracks[i]
+                if i not in live_idx:
                     print("[ACCESS DENIED] Spoof detected")
-                    log_access("Unknown", "Unknown", "Denied", "Fake")
+                    writer.submit(log_access, "Unknown", "Unknown", "Denied", "Fake")
+                    track.set_result(live, None, None, 0, now)
                     continue
+                if emb_by_idx is None:
+                    continue  # embedding failed, retry on next frame
 
-                # Step 2: Face matching
-                emp_id, name, score = verify_access(face)
-
+                emp_id, name, score = verify_embedding(emb_by_idx[i])
+                track.set_result(live, emp_id, name, score, now)
                 if emp_id is not None:
                     print(f"[ACCESS GRANTED] {name} (ID {emp_id}) | score={score:.2f}")
-                    log_access(emp_id, name, "Granted", "Real")
-                    save_snapshot(emp_id, name, frame)
-
-                    cv2.rectangle(annotated, (x1, y1), (x2, y2), (0, 255, 0), 2)
-                    cv2.putText(
-                        annotated,
-                        f"{name} - Access Granted",
-                        (x1, y1 - 10),
-                        cv2.FONT_HERSHEY_SIMPLEX,
-                        0.8,
-                        (0, 255, 0),
-                        2,
-                    )
+                    writer.submit(log_access, emp_id, name, "Granted", "Real")
+                    writer.submit_droppable(save_snapshot, emp_id, name, frame)
                 else:
                     print(f"[ACCESS DENIED] | score={score:.2f}")
-                    log_access("Unknown", "Unknown", "Denied", "Real")
-                    cv2.rectangle(annotated, (x1, y1), (x2, y2), (0, 0, 255), 2)
-                    cv2.putText(
-                        annotated,
-                        "Access Denied",
-                        (x1, y1 - 10),
-                        cv2.FONT_HERSHEY_SIMPLEX,
-                        0.8,
-                        (0, 0, 255),
-                        2,
-                    )
-
+                    writer.submit(log_access, "Unknown", "Unknown", "Denied", "Real")
+
+        for (x1, y1, x2, y2), track in zip(face_boxes, tracks):
+            if track.liveness is None:
+                continue
+
+            if not is_live(*track.liveness):
+                cv2.rectangle(annotated, (x1, y1), (x2, y2), (0, 0, 255), 2)
+                cv2.putText(
+                    annotated,
+                    "Fake Face Detected",
+                    (x1, y1 - 10),
+                    cv2.FONT_HERSHEY_SIMPLEX,
+                    0.8,
+                    (0, 0, 255),
+                    2,
+                )
+            elif track.emp_id is not None:
+                cv2.rectangle(annotated, (x1, y1), (x2, y2), (0, 255, 0), 2)
+                cv2.putText(
+                    annotated,
+                    f"{track.name} - Access Granted",
+                    (x1, y1 - 10),
+                    cv2.FONT_HERSHEY_SIMPLEX,
+                    0.8,
+                    (0, 255, 0),
+                    2,
+                )
+            else:
+                cv2.rectangle(annotated, (x1, y1), (x2, y2), (0, 0, 255), 2)
+                cv2.putText(
+                    annotated,
+                    "Access Denied",
+                    (x1, y1 - 10),
+                    cv2.FONT_HERSHEY_SIMPLEX,
+                    0.8,
+                    (0, 0, 255),
+                    2,
+                )
+
+        cv2.putText(
+            annotated,
+            f"detect {scheduler.mode} {scheduler.duty_cycle():.0%}",
+            (10, annotated.shape[0] - 12),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.5,
+            (255, 255, 255),
+            1,
+        )
+        if show_metrics:
+            metrics.draw_overlay(annotated)
         cv2.imshow("One-to-One Verification", annotated)
-        if cv2.waitKey(1) & 0xFF == ord("q"):
+        key = cv2.waitKey(1) & 0xFF
+        if key == ord("q"):
             break
+        if key == ord("m"):
+            show_metrics = not show_metrics
 
     cap.release()
     cv2.destroyAllWindows()
 
+    writer.close()
+    access_log = get_access_log(ACCESS_LOG)
+    access_log.flush()
+    snapshots = get_snapshot_store(SNAPSHOT_DIR)
+    snapshots.flush()
+    print(f"[INFO] Detection scheduler stats: {scheduler.stats()}")
+    print(f"[INFO] Background writer stats: {writer.stats()}")
+    print(f"[INFO] Access log stats: {access_log.stats()}")
+    print(f"[INFO] Snapshot stats: {snapshots.stats()}")
+
 if __name__ == "__main__":
     one_to_one_verification()
\ No newline at end of file
@@ -0,0 +1,103 @@
+import csv
+import os
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.access_log import HEADER, AccessLogWriter, rotated_segments
+
+
+def _read(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def _writer(path, **kwargs):
+    return AccessLogWriter(str(path), flush_interval=60, **kwargs)
+
+
+def test_repeated_denials_are_collapsed(tmp_path):
+    path = tmp_path / "access.csv"
+    log = _writer(path, dedupe_window=5.0)
+    t = datetime.now()
+    for i in range(10):
+        log.write("Unknown", "Unknown", "Denied", "Fake", now=t + timedelta(seconds=i * 0.4))
+    log.write("7", "An", "Granted", "Real", now=t + timedelta(seconds=5))
+    log.close()
+
+    rows = _read(path)
+    assert [(r["Status"], r["Count"]) for r in rows] == [("Denied", "1"), ("Denied", "9"), ("Granted", "1")]
+    assert log.stats()["suppressed"] == 9
+
+
+def test_rotation_by_size_and_date(tmp_path):
+    path = tmp_path / "access.csv"
+    log = _writer(path, rotate_bytes=300, flush_rows=4, dedupe_window=0)
+    t = datetime(2026, 1, 1, 8)
+    for i in range(40):
+        log.write(str(i), "x", "Granted", "Real", now=t + timedelta(hours=i))
+    log.close()
+
+    files = rotated_segments(str(path)) + [str(path)]
+    assert len(files) > 2
+    ids = []
+    for f in files:
+        with open(f, encoding="utf-8") as fh:
+            assert fh.readline() == HEADER
+        rows = _read(f)
+        assert len({r["Date"] for r in rows}) == 1
+        ids += [r["Employee ID"] for r in rows]
+    assert ids == [str(i) for i in range(40)]
+
+
+def test_failed_write_keeps_rows(tmp_path, monkeypatch):
+    path = tmp_path / "access.csv"
+    log = _writer(path)
+    log.write("1", "An", "Granted", "Real")
+
+    def disk_full(chunk):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(log, "_write", disk_full)
+    with pytest.raises(OSError):
+        log.flush()
+    assert log.stats()["buffered"] == 1
+    monkeypatch.undo()
+    log.close()
+    assert [r["Employee ID"] for r in _read(path)] == ["1"]
+
+
+def test_partial_write_requeues_only_the_unwritten_rows(tmp_path):
+    path = tmp_path / "access.csv"
+    log = _writer(path, dedupe_window=0)
+    t = datetime.now()
+    log.write("0", "An", "Granted", "Real", now=t)
+    log.flush()         # file and header exist
+    for i in range(1, 4):
+        log.write(str(i), "An", "Granted", "Real", now=t)
+
+    real_file = log._file
+    row_bytes = len(f"{t:%Y-%m-%d},{t:%H:%M:%S},1,An,Granted,Real,1\n")
+
+    class ShortWrites:
+        """Writes 1.5 rows, then fails like a full disk."""
+        calls = 0
+
+        def write(self, data):
+            self.calls += 1
+            if self.calls == 1:
+                return real_file.write(data[:row_bytes + row_bytes // 2])
+            raise OSError("disk full")
+
+        def __getattr__(self, name):
+            return getattr(real_file, name)
+
+    log._file = ShortWrites()
+    with pytest.raises(OSError):
+        log.flush()
+    log._file = real_file
+    assert log.stats()["buffered"] == 2
+    assert log._size == os.fstat(real_file.fileno()).st_size   # half row cut off again
+
+    log.close()
+    assert [r["Employee ID"] for r in _read(path)] == ["0", "1", "2", "3"]
@@ -0,0 +1,65 @@
+import numpy as np
+
+from src.align import ARCFACE_TEMPLATE, align_faces, result_keypoints, similarity_transforms
+
+
+def _apply(m, pts):
+    return pts @ m[:, :2].T + m[:, 2]
+
+
+def test_recovers_a_known_similarity_transform():
+    angle, scale, shift = np.deg2rad(20), 2.5, np.array([40.0, -15.0])
+    rot = scale * np.array([[np.cos(angle), -np.sin(angle)], [np.sin(angle), np.cos(angle)]])
+    # keypoints = template moved into a frame; the transform must undo it
+    src = ARCFACE_TEMPLATE @ rot.T + shift
+    m = similarity_transforms(src[None])[0]
+    assert m.shape == (2, 3)
+    np.testing.assert_allclose(_apply(m, src), ARCFACE_TEMPLATE, atol=1e-3)
+
+
+def test_never_reflects():
+    mirrored = ARCFACE_TEMPLATE * np.array([-1.0, 1.0])
+    m = similarity_transforms(mirrored[None])[0]
+    assert np.linalg.det(m[:, :2]) > 0
+
+
+def test_batch_matches_one_by_one():
+    rng = np.random.default_rng(0)
+    src = ARCFACE_TEMPLATE * 3 + rng.normal(0, 2, size=(4, 5, 2)) + 100
+    batch = similarity_transforms(src)
+    for kps, m in zip(src, batch):
+        np.testing.assert_allclose(similarity_transforms(kps[None])[0], m, atol=1e-5)
+
+
+def test_align_faces_warps_keypoints_onto_the_template():
+    frame = np.zeros((300, 300, 3), dtype=np.uint8)
+    kps = ARCFACE_TEMPLATE * 2 + 50
+    for x, y in kps.astype(int):
+        frame[y - 1:y + 2, x - 1:x + 2] = 255
+    (chip,) = align_faces(frame, kps[None])
+    assert chip.shape == (112, 112, 3)
+    for x, y in ARCFACE_TEMPLATE.round().astype(int):
+        assert chip[y, x].max() > 0
+    assert align_faces(frame, np.empty((0, 5, 2))) == []
+
+
+class _Tensor:
+    def __init__(self, values):
+        self.values = np.asarray(values, dtype=np.float32)
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.values
+
+
+def test_result_keypoints_usable_mask():
+    xy = np.stack([ARCFACE_TEMPLATE, ARCFACE_TEMPLATE, np.zeros((5, 2))])
+    conf = np.array([[0.9] * 5, [0.9, 0.9, 0.1, 0.9, 0.9], [0.9] * 5])
+    kps = type("Keypoints", (), {"xy": _Tensor(xy), "conf": _Tensor(conf)})()
+    result = type("Result", (), {"keypoints": kps})()
+    out, usable = result_keypoints(result)
+    assert out.shape == (3, 5, 2)
+    assert usable.tolist() == [True, False, False]
+    assert result_keypoints(type("Result", (), {"keypoints": None})()) == (None, None)
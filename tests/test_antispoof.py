@@ -0,0 +1,76 @@
+import numpy as np
+
+from src import antispoof
+
+
+class _Tensor:
+    def __init__(self, values):
+        self.values = np.asarray(values)
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.values
+
+
+class _Boxes:
+    def __init__(self, cls, conf):
+        self.cls, self.conf = _Tensor(cls), _Tensor(conf)
+
+    def __len__(self):
+        return len(self.cls.values)
+
+
+class _Result:
+    """One ultralytics result: a single box of class `cls`, or no box."""
+    names = {0: "Fake", 1: "Real"}
+
+    def __init__(self, cls=None, conf=None):
+        self.boxes = _Boxes([], []) if cls is None else _Boxes([cls], [conf])
+
+
+class _Model:
+    """Answers from a fixed list; records every predict call."""
+
+    def __init__(self, results):
+        self.results = results
+        self.calls = []
+
+    def predict(self, source, verbose=False):
+        self.calls.append(len(source))
+        return self.results[:len(source)]
+
+
+def _faces(n):
+    return [np.zeros((20 + i, 20, 3), dtype=np.uint8) for i in range(n)]
+
+
+def test_one_predict_call_for_the_whole_batch(monkeypatch):
+    model = _Model([_Result(1, 0.9), _Result(0, 0.8), _Result()])
+    monkeypatch.setattr(antispoof, "get_antispoof_model", lambda: model)
+    out = antispoof.check_liveness_batch(_faces(3))
+    assert model.calls == [3]
+    assert out == [("real", 0.9), ("fake", 0.8), ("unknown", 0.0)]
+    assert [antispoof.is_live(*r) for r in out] == [True, False, True]
+
+
+def test_batch_matches_single_face_checks(monkeypatch):
+    model = _Model([_Result(0, 0.7)])
+    monkeypatch.setattr(antispoof, "get_antispoof_model", lambda: model)
+    assert antispoof.check_liveness_batch(_faces(1)) == [("fake", 0.7)]
+    assert antispoof.check_liveness(_faces(1)[0]) is False
+    assert antispoof.check_liveness(_faces(1)[0], threshold=0.75) is True
+
+
+def test_missing_model_or_failure_allows_every_face(monkeypatch):
+    assert antispoof.check_liveness_batch([]) == []
+    monkeypatch.setattr(antispoof, "get_antispoof_model", lambda: None)
+    assert antispoof.check_liveness_batch(_faces(2)) == [("unknown", 0.0)] * 2
+
+    class Broken:
+        def predict(self, source, verbose=False):
+            raise RuntimeError("boom")
+
+    monkeypatch.setattr(antispoof, "get_antispoof_model", lambda: Broken())
+    assert antispoof.check_liveness_batch(_faces(2)) == [("unknown", 0.0)] * 2
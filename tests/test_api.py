@@ -0,0 +1,97 @@
+import asyncio
+
+import cv2
+import numpy as np
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+from src import api
+from src.engine import EmbeddingError
+
+JPEG = cv2.imencode(".jpg", np.zeros((16, 16, 3), dtype=np.uint8))[1].tobytes()
+
+
+class FakeEngine:
+    """Stands in for FaceEngine: records the threshold each call was made with."""
+
+    def analyze(self, images):
+        return [[] for _ in images]
+
+    def recognize(self, analyzed, threshold, log=False):
+        return [[{"threshold": threshold}] for _ in analyzed]
+
+    def verify(self, analyzed, emp_id=None, threshold=None, log=False):
+        return [[{"threshold": threshold, "employee_id": emp_id}] for _ in analyzed]
+
+    def enroll(self, emp_id, analyzed, info=None):
+        return {"employee_id": emp_id, "faces_used": len(analyzed)}
+
+    def close(self):
+        pass
+
+
+class FailingEngine(FakeEngine):
+    def analyze(self, images):
+        raise EmbeddingError("face embedding failed for 1 live face(s)")
+
+
+def request(method, url, enroll_token="", engine=None, **kwargs):
+    """Send one request to a fresh app; Output: (status, json body)"""
+    async def run():
+        app = api.create_app(engine or FakeEngine(), warmup=False, enroll_token=enroll_token)
+        async with TestClient(TestServer(app)) as client:
+            resp = await client.request(method, url, **kwargs)
+            return resp.status, await resp.json()
+    return asyncio.run(run())
+
+
+def post_image(url, **kwargs):
+    headers = {"Content-Type": "image/jpeg", **kwargs.pop("headers", {})}
+    return request("POST", url, data=JPEG, headers=headers, **kwargs)
+
+
+def test_verify_uses_configured_threshold_by_default():
+    status, body = post_image("/verify?employee_id=7")
+    assert status == 200
+    assert body["results"] == [[{"threshold": api.VERIFY_THRESHOLD, "employee_id": "7"}]]
+
+
+def test_verify_accepts_stricter_threshold():
+    strict = round(min(1.0, api.VERIFY_THRESHOLD + 0.1), 3)
+    status, body = post_image(f"/verify?threshold={strict}")
+    assert status == 200
+    assert body["results"][0][0]["threshold"] == strict
+
+
+@pytest.mark.parametrize("value", ["abc", "", "nan", "1.5", str(api.VERIFY_THRESHOLD - 0.1)])
+def test_verify_rejects_invalid_or_looser_threshold(value):
+    status, body = post_image(f"/verify?threshold={value}")
+    assert status == 400
+    assert "threshold" in body["error"]
+
+
+def test_recognize_rejects_looser_threshold():
+    status, _ = post_image(f"/recognize?threshold={api.RECOGNIZE_THRESHOLD - 0.1}")
+    assert status == 400
+
+
+def test_verify_rejects_undecodable_image():
+    status, _ = request("POST", "/verify", data=b"not an image", headers={"Content-Type": "image/jpeg"})
+    assert status == 400
+
+
+def test_enroll_requires_token():
+    assert post_image("/enroll?employee_id=7")[0] == 403
+    assert post_image("/enroll?employee_id=7", enroll_token="s3cret")[0] == 401
+    assert post_image("/enroll?employee_id=7", enroll_token="s3cret",
+                      headers={"Authorization": "Bearer wrong"})[0] == 401
+    status, body = post_image("/enroll?employee_id=7", enroll_token="s3cret",
+                              headers={"Authorization": "Bearer s3cret"})
+    assert status == 200 and body["employee_id"] == "7"
+
+
+@pytest.mark.parametrize("url", ["/recognize", "/verify"])
+def test_embedding_failure_is_an_error_not_an_unknown_face(url):
+    status, body = post_image(url, engine=FailingEngine())
+    assert status == 503
+    assert "embedding" in body["error"]
@@ -0,0 +1,40 @@
+import json
+
+import pytest
+
+from src.arcface_engine import ArcFaceConfig, load_arcface_config
+
+
+def test_defaults_and_replace():
+    config = ArcFaceConfig()
+    assert config.to_dict() == ArcFaceConfig.FIELDS
+    tuned = config.replace(intra_op_threads=4)
+    assert tuned.intra_op_threads == 4
+    assert config.intra_op_threads == ArcFaceConfig.FIELDS["intra_op_threads"]
+
+
+@pytest.mark.parametrize("overrides", [
+    {"threads": 4},
+    {"graph_optimization": "max"},
+    {"execution_mode": "async"},
+])
+def test_invalid_config_is_rejected(overrides):
+    with pytest.raises(ValueError):
+        ArcFaceConfig(**overrides)
+
+
+def test_env_overrides_file(tmp_path, monkeypatch):
+    path = tmp_path / "arcface.json"
+    path.write_text(json.dumps({"intra_op_threads": 2, "graph_optimization": "basic"}))
+    for name in ArcFaceConfig.FIELDS:
+        monkeypatch.delenv(f"HRMS_ARCFACE_{name.upper()}", raising=False)
+    monkeypatch.setenv("HRMS_ARCFACE_INTRA_OP_THREADS", "8")
+    monkeypatch.setenv("HRMS_ARCFACE_ENABLE_CPU_MEM_ARENA", "off")
+    monkeypatch.setenv("HRMS_ARCFACE_PROVIDERS", "CUDAExecutionProvider, CPUExecutionProvider")
+
+    config = load_arcface_config(str(path))
+    assert config.intra_op_threads == 8                   # env beats the file
+    assert config.graph_optimization == "basic"           # file beats the default
+    assert config.enable_cpu_mem_arena is False
+    assert config.providers == ["CUDAExecutionProvider", "CPUExecutionProvider"]
+    assert load_arcface_config(str(tmp_path / "missing.json")).graph_optimization == "all"
@@ -0,0 +1,23 @@
+from src.attendance_store import AttendanceStore, get_store
+
+
+def test_record_check_in_check_out_then_ignore(tmp_path):
+    store = AttendanceStore(str(tmp_path / "attendance.db"))
+    assert store.record("7", "An", "IT", "Dev", "2026-03-02", "08:01:00") == "CheckIn"
+    assert store.record("7", "An", "IT", "Dev", "2026-03-02", "17:30:00") == "CheckOut"
+    assert store.record("7", "An", "IT", "Dev", "2026-03-02", "18:00:00") is None
+    assert store.record("7", "An", "IT", "Dev", "2026-03-03", "08:05:00") == "CheckIn"
+
+    rows = list(store.rows())
+    assert [(r["Date"], r["CheckIn"], r["CheckOut"]) for r in rows] == [
+        ("2026-03-02", "08:01:00", "17:30:00"),
+        ("2026-03-03", "08:05:00", ""),
+    ]
+    store.close()
+
+
+def test_get_store_is_keyed_by_path(tmp_path):
+    a = get_store(str(tmp_path / "a.db"))
+    b = get_store(str(tmp_path / "b.db"))
+    assert a is not b
+    assert get_store(str(tmp_path / "a.db")) is a
@@ -0,0 +1,59 @@
+import threading
+import time
+
+from src.background_writer import BackgroundWriter
+
+
+def test_records_are_never_dropped_when_the_queue_is_full():
+    done = []
+    writer = BackgroundWriter(maxsize=2, batch_size=1)
+    for i in range(20):
+        writer.submit(lambda i=i: (time.sleep(0.002), done.append(i)))
+    writer.close()
+    assert done == list(range(20))
+    assert writer.stats()["dropped"] == 0
+
+
+def test_droppable_work_is_dropped_and_counted():
+    gate = threading.Event()
+    writer = BackgroundWriter(maxsize=1, batch_size=1, put_timeout=0.01)
+    writer.submit(gate.wait)
+    writer.submit(lambda: None)                 # fills the queue behind the blocked task
+    assert not writer.submit_droppable(lambda: None)
+    gate.set()
+    writer.close()
+    assert writer.stats()["dropped"] == 1
+    assert not writer.submit_droppable(lambda: None)   # closed
+
+
+def test_submit_racing_close_runs_everything_once():
+    done = []
+    lock = threading.Lock()
+    writer = BackgroundWriter(maxsize=8, batch_size=4)
+
+    def record(n):
+        with lock:
+            done.append(n)
+
+    def producer(base):
+        for i in range(200):
+            writer.submit(record, base + i)
+
+    threads = [threading.Thread(target=producer, args=(k * 1000,)) for k in range(4)]
+    for t in threads:
+        t.start()
+    time.sleep(0.005)
+    writer.close()
+    for t in threads:
+        t.join()
+    assert sorted(done) == sorted(k * 1000 + i for k in range(4) for i in range(200))
+
+
+def test_flush_hooks_run_per_batch():
+    flushed = []
+    writer = BackgroundWriter(batch_size=8)
+    writer.on_flush(lambda: flushed.append(True))
+    writer.submit(lambda: None)
+    assert writer.drain(timeout=5)
+    writer.close()
+    assert flushed
@@ -0,0 +1,69 @@
+import cv2
+import numpy as np
+
+from src import bulk_enroll, detect_faces, extract_embeddings
+
+
+def _write_image(path, value):
+    cv2.imwrite(str(path), np.full((32, 32, 3), value, dtype=np.uint8))
+    return str(path)
+
+
+def _fake_models(monkeypatch, faceless):
+    """Detector that finds no face in images whose pixels equal `faceless`."""
+    embedded = []
+
+    def detector(imgs, verbose=False):
+        return [int(img[0, 0, 0]) for img in imgs]
+
+    def extract_faces(img, results):
+        if results[0] == faceless:
+            return [], [], []
+        chip = np.full((112, 112, 3), results[0], dtype=np.uint8)
+        return [img], [(0, 0, 32, 32)], [chip]
+
+    def get_embeddings(chips):
+        embedded.extend(int(c[0, 0, 0]) for c in chips)
+        return np.stack([np.eye(512, dtype=np.float32)[int(c[0, 0, 0])] for c in chips])
+
+    monkeypatch.setattr(detect_faces, "get_detector", lambda: detector)
+    monkeypatch.setattr(detect_faces, "extract_faces", extract_faces)
+    monkeypatch.setattr(extract_embeddings, "get_embeddings", get_embeddings)
+    return embedded
+
+
+def test_images_without_a_face_are_skipped(tmp_path, monkeypatch):
+    embedded = _fake_models(monkeypatch, faceless=7)
+    paths = [_write_image(tmp_path / f"{v}.png", v) for v in (1, 7, 3)]
+    broken = tmp_path / "broken.jpg"
+    broken.write_bytes(b"not an image")
+
+    emp_id, templates, n_read, n_embedded, skipped = bulk_enroll.embed_folder(
+        "E1", paths + [str(broken)], batch_size=2, num_templates=2)
+
+    assert emp_id == "E1"
+    assert sorted(embedded) == [1, 3]       # the faceless frame never reaches ArcFace
+    assert (n_read, n_embedded) == (3, 2)
+    assert templates.shape == (2, 512)
+    assert set(skipped) == {(str(broken), "unreadable"), (paths[1], "no face detected")}
+
+
+def test_folder_without_any_face_yields_no_templates(tmp_path, monkeypatch):
+    _fake_models(monkeypatch, faceless=5)
+    paths = [_write_image(tmp_path / "a.png", 5)]
+    _, templates, n_read, n_embedded, skipped = bulk_enroll.embed_folder("E2", paths)
+    assert templates is None
+    assert (n_read, n_embedded) == (1, 0)
+    assert skipped == [(paths[0], "no face detected")]
+
+
+def test_folder_hash_tracks_names_and_content(tmp_path):
+    a = _write_image(tmp_path / "a.png", 1)
+    b = _write_image(tmp_path / "b.jpg", 2)
+    (tmp_path / "notes.txt").write_text("ignored")
+    assert bulk_enroll.list_images(str(tmp_path)) == [a, b]
+
+    before = bulk_enroll.folder_hash([b, a])
+    assert before == bulk_enroll.folder_hash([a, b])
+    _write_image(tmp_path / "b.jpg", 3)
+    assert bulk_enroll.folder_hash([a, b]) != before
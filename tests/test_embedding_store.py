@@ -0,0 +1,82 @@
+import os
+
+import numpy as np
+import pytest
+
+from src import embedding_store
+from src.embedding_store import EmbeddingStore
+from src.gallery import Gallery
+
+
+def _unit(rng, shape):
+    v = rng.standard_normal(shape).astype(np.float32)
+    return v / np.linalg.norm(v, axis=-1, keepdims=True)
+
+
+def test_upsert_and_snapshot(tmp_path):
+    rng = np.random.default_rng(0)
+    store = EmbeddingStore(str(tmp_path / "employees.json"))
+    assert store.stamp() is None
+    a, b = _unit(rng, (3, 512)), _unit(rng, 512)
+    store.upsert_many([("1", {"name": "A"}, a), ("2", {"name": "B"}, b)])
+
+    meta, ids, owner, matrix = store.snapshot()
+    assert ids == ["1", "2"]
+    assert store.stamp() == meta["version"] == 1
+    np.testing.assert_allclose(matrix[owner == 0], a, atol=1e-6)
+    np.testing.assert_allclose(matrix[owner == 1][0], b, atol=1e-6)
+    assert store.records()["2"]["name"] == "B"
+
+
+def test_replace_defers_row_reuse(tmp_path, monkeypatch):
+    rng = np.random.default_rng(1)
+    store = EmbeddingStore(str(tmp_path / "employees.json"))
+    store.upsert("1", {"name": "A"}, _unit(rng, (2, 512)))
+    old_rows = store.records()["1"]["rows"]
+
+    new = _unit(rng, (2, 512))
+    store.upsert("1", {"name": "A"}, new)
+    meta = store.load_meta()
+    assert set(meta["employees"]["1"]["rows"]).isdisjoint(old_rows)
+    assert meta["free"] == [] and meta["pending"][0][2] == old_rows
+
+    # the next version may not reuse them within the grace period...
+    store.upsert("2", {"name": "B"}, _unit(rng, 512))
+    assert set(store.records()["2"]["rows"]).isdisjoint(old_rows)
+    # ...but does afterwards
+    monkeypatch.setattr(embedding_store, "REUSE_GRACE_S", 0.0)
+    store.upsert("3", {"name": "C"}, _unit(rng, 512))
+    assert store.records()["3"]["rows"][0] in old_rows
+
+    _, ids, owner, matrix = store.snapshot()
+    np.testing.assert_allclose(matrix[owner == ids.index("1")], new, atol=1e-6)
+
+
+def test_reload_sees_other_writer(tmp_path):
+    rng = np.random.default_rng(2)
+    path = str(tmp_path / "employees.json")
+    reader, writer = EmbeddingStore(path), EmbeddingStore(path)
+    writer.upsert("1", {"name": "A"}, _unit(rng, 512))
+    stamp = reader.stamp()
+    writer.upsert("2", {"name": "B"}, _unit(rng, 512))
+    assert reader.stamp() == stamp + 1
+    assert reader.remove("1") and reader.stamp() == stamp + 2
+    assert list(writer.records()) == ["2"]
+
+
+def test_snapshot_with_missing_embedding_file(tmp_path):
+    store = EmbeddingStore(str(tmp_path / "employees.json"))
+    store.upsert("1", {"name": "A"}, _unit(np.random.default_rng(3), 512))
+    os.remove(store.emb_path)
+    with pytest.raises(FileNotFoundError, match="missing"):
+        store.snapshot()
+
+    # the gallery keeps serving what it had (here: nothing) instead of failing searches
+    gallery = Gallery(str(tmp_path / "employees.json"))
+    assert gallery.search(np.ones(512), k=1) == []
+    assert len(gallery.employee_scores(np.ones(512))) == 0
+
+
+def test_snapshot_of_empty_store(tmp_path):
+    meta, ids, owner, matrix = EmbeddingStore(str(tmp_path / "employees.json")).snapshot()
+    assert ids == [] and len(owner) == 0 and matrix.shape == (0, 512)
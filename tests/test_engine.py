@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+from src import engine
+from src.engine import EmbeddingError, FaceEngine
+
+
+@pytest.fixture
+def one_live_face(monkeypatch):
+    box = np.array([[0, 0, 16, 16]], dtype=np.float32)
+    monkeypatch.setattr(engine, "detect_batch", lambda frames: [(box, None, None) for _ in frames])
+    monkeypatch.setattr(engine, "check_liveness_batch", lambda faces: [("real", 0.9)] * len(faces))
+
+
+def test_analyze_raises_when_arcface_fails(one_live_face, monkeypatch):
+    monkeypatch.setattr(engine, "get_embeddings", lambda chips: None)
+    with pytest.raises(EmbeddingError):
+        FaceEngine().analyze([np.zeros((32, 32, 3), dtype=np.uint8)])
+
+
+def test_analyze_attaches_embeddings_to_live_faces(one_live_face, monkeypatch):
+    monkeypatch.setattr(engine, "get_embeddings", lambda chips: np.ones((len(chips), 512), dtype=np.float32))
+    (face,), empty = FaceEngine().analyze([np.zeros((32, 32, 3), dtype=np.uint8), None])
+    assert empty == []
+    assert face["live"] and face["box"] == [0, 0, 16, 16]
+    assert face["embedding"].shape == (512,)
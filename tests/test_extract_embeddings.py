@@ -0,0 +1,55 @@
+import cv2
+import numpy as np
+
+from src import extract_embeddings
+from src.extract_embeddings import get_embeddings, preprocess_batch, preprocess_face
+
+
+def _legacy_preprocess(face_img):
+    """The original per-face preprocessing, kept as the reference."""
+    face = cv2.resize(face_img, (112, 112))
+    face = cv2.cvtColor(face, cv2.COLOR_BGR2RGB)
+    face = (face / 127.5 - 1.0).astype(np.float32)
+    return np.transpose(face, (2, 0, 1))[None]
+
+
+def _faces():
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 256, size=shape, dtype=np.uint8)
+            for shape in ((112, 112, 3), (80, 64, 3), (200, 150, 3))]
+
+
+def test_preprocess_batch_matches_legacy_path():
+    faces = _faces()
+    batch = preprocess_batch(faces)
+    assert batch.shape == (3, 3, 112, 112) and batch.dtype == np.float32
+    for face, row in zip(faces, batch):
+        np.testing.assert_allclose(row[None], _legacy_preprocess(face), atol=1e-6)
+        np.testing.assert_allclose(preprocess_face(face), _legacy_preprocess(face), atol=1e-6)
+
+
+def test_reused_buffer_grows_and_leaves_inputs_untouched():
+    faces = _faces()
+    copies = [f.copy() for f in faces]
+    small = preprocess_batch(faces[:1]).copy()
+    big = preprocess_batch(faces * 10)
+    assert big.shape[0] == 30
+    np.testing.assert_array_equal(big[0], small[0])
+    for face, copy in zip(faces, copies):
+        np.testing.assert_array_equal(face, copy)
+
+
+def test_get_embeddings_normalizes_one_batch(monkeypatch):
+    calls = []
+
+    class Session:
+        def run(self, outputs, feeds):
+            batch = feeds["input"]
+            calls.append(batch.shape)
+            return [np.full((len(batch), 512), 3.0, dtype=np.float32)]
+
+    monkeypatch.setattr(extract_embeddings, "get_session", lambda: (Session(), "input"))
+    embs = get_embeddings(_faces())
+    assert calls == [(3, 3, 112, 112)]
+    np.testing.assert_allclose(np.linalg.norm(embs, axis=1), 1.0, rtol=1e-6)
+    assert get_embeddings([]).shape == (0, 512)
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from src.face_index import IVF_MIN_SIZE
+from src.gallery import Gallery, get_gallery
+
+
+@pytest.fixture
+def gallery_path(tmp_path):
+    rng = np.random.default_rng(0)
+    path = str(tmp_path / "employees.json")
+    gallery = Gallery(path)
+    # 300 employees with 1-4 templates each
+    items = [(str(i), {"name": f"E{i}"}, rng.standard_normal((1 + i % 4, 512))) for i in range(300)]
+    gallery.store.upsert_many(items)
+    return path
+
+
+def brute_force(gallery, q, k):
+    q = q / np.linalg.norm(q)
+    _, ids, owner, matrix = gallery.store.snapshot()
+    scores = np.full(len(ids), -np.inf)
+    np.maximum.at(scores, owner, np.asarray(matrix) @ q)
+    top = np.argsort(-scores)[:k]
+    return [ids[i] for i in top], scores[top]
+
+
+def test_exact_search_matches_brute_force(gallery_path):
+    gallery = Gallery(gallery_path)
+    rng = np.random.default_rng(1)
+    for q in rng.standard_normal((20, 512)):
+        want_ids, want_scores = brute_force(gallery, q, 5)
+        hits = gallery.search(q, k=5)
+        assert [h[0] for h in hits] == want_ids
+        np.testing.assert_allclose([h[2] for h in hits], want_scores, atol=1e-5)
+
+
+def test_shortlist_is_opt_in(gallery_path):
+    assert Gallery(gallery_path).rerank_top == 0
+    shortlist = Gallery(gallery_path, rerank_top=16)
+    q = np.random.default_rng(3).standard_normal(512)
+    assert shortlist.search(q, k=1)[0][0] in [h[0] for h in Gallery(gallery_path).search(q, k=16)]
+
+
+def test_match_and_reload(gallery_path):
+    gallery = Gallery(gallery_path)
+    emb = np.random.default_rng(2).standard_normal(512)
+    gallery.store.upsert("new", {"name": "New"}, emb)
+    assert gallery.match(emb)[:2] == ("new", "New")
+    assert gallery.lookup("new")["name"] == "New"
+
+
+def test_get_gallery_cache_key(gallery_path):
+    exact = get_gallery(gallery_path, "exact")
+    assert get_gallery(gallery_path, "exact") is exact
+    assert get_gallery(gallery_path, "ivf", nprobe=4) is not exact
+    assert get_gallery(gallery_path, "ivf", nprobe=4).backend == "ivf"
+
+
+def test_ivf_recall_against_exact(tmp_path):
+    rng = np.random.default_rng(4)
+    n, k = IVF_MIN_SIZE // 2 + 100, 2          # > IVF_MIN_SIZE template rows
+    path = str(tmp_path / "large.json")
+    base = rng.standard_normal((n, 1, 512))
+    templates = base + 0.3 * rng.standard_normal((n, k, 512))
+    Gallery(path).store.upsert_many((str(i), {"name": f"E{i}"}, templates[i]) for i in range(n))
+
+    exact, ivf = Gallery(path), Gallery(path, backend="ivf", nprobe=8)
+    ivf.refresh()
+    assert len(ivf.matrix) >= IVF_MIN_SIZE
+    assert ivf._state.index._exact is None       # the IVF path, not the small-gallery fallback
+
+    who = rng.integers(0, n, 200)
+    queries = templates[who, rng.integers(0, k, 200)] + 0.3 * rng.standard_normal((200, 512))
+    want = [exact.match(q)[0] for q in queries]
+    got = [ivf.match(q)[0] for q in queries]
+    recall = np.mean([a == b for a, b in zip(got, want)])
+    assert recall >= 0.95, recall
+    assert [h[0] for h in ivf.search(queries[0], k=3)][0] == got[0]
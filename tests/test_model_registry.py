@@ -0,0 +1,37 @@
+import importlib
+import sys
+import types
+
+from src import model_registry
+
+
+def test_importing_models_package_loads_nothing(monkeypatch):
+    calls = []
+    fake_ultralytics = types.ModuleType("ultralytics")
+    fake_ultralytics.YOLO = lambda path: calls.append(path) or "yolo-model"
+    monkeypatch.setitem(sys.modules, "ultralytics", fake_ultralytics)
+    monkeypatch.delitem(sys.modules, "models", raising=False)
+    monkeypatch.delitem(sys.modules, "models.build", raising=False)
+
+    # must not touch torch / ultralytics / FaceNet
+    importlib.import_module("models")
+    importlib.import_module("models.build")
+    assert calls == []
+
+    assert model_registry._load_yolo_face() == "yolo-model"
+    assert calls == ["models/yolov8n-face-lindevs.pt"]      # one YOLO load, not two
+
+
+def test_get_loads_once_and_records_load_time(monkeypatch):
+    loads = []
+    monkeypatch.setattr(model_registry, "_instances", {})
+    monkeypatch.setattr(model_registry, "_stats", {})
+    model_registry.register("test_model", lambda: loads.append(1) or object())
+    try:
+        first = model_registry.get("test_model")
+        assert model_registry.get("test_model") is first
+        assert loads == [1]
+        assert model_registry.stats()["test_model"]["load_s"] >= 0
+    finally:
+        model_registry._loaders.pop("test_model", None)
+        model_registry._locks.pop("test_model", None)
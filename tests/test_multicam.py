@@ -0,0 +1,87 @@
+import threading
+
+import numpy as np
+
+from src import antispoof, realtime_attendance
+from src.realtime_attendance import AttendanceState, CooldownRegistry, FrameWork, finish_frame, recognize_pending
+from src.tracker import Track
+
+
+class _Writer:
+    def __init__(self):
+        self.logged = []
+
+    def submit(self, fn, *args):
+        self.logged.append(args[0])
+
+    def submit_droppable(self, fn, *args):
+        return True
+
+
+def _work(state, emp_id, now):
+    frame = np.zeros((64, 64, 3), dtype=np.uint8)
+    work = FrameWork(frame, state, now)
+    track = Track(1, (0, 0, 32, 32), now)
+    track.set_result(("real", 0.9), emp_id, "Alice", 0.8, now)
+    work.faces, work.boxes, work.tracks = [frame[:32, :32]], [(0, 0, 32, 32)], [track]
+    return work
+
+
+def test_concurrent_try_acquire_has_one_winner():
+    registry = CooldownRegistry(cooldown=5.0)
+    barrier = threading.Barrier(8)
+    wins = []
+
+    def claim():
+        barrier.wait()
+        wins.append(registry.try_acquire("E1", 100.0))
+
+    threads = [threading.Thread(target=claim) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert wins.count(True) == 1
+    assert not registry.ready("E1", 104.0)
+    assert registry.ready("E1", 105.0)
+
+
+def test_two_cameras_log_an_employee_once():
+    shared = CooldownRegistry()
+    writer = _Writer()
+    for cam in (AttendanceState(shared), AttendanceState(shared)):
+        finish_frame(_work(cam, "E1", 100.0), writer)
+    assert writer.logged == ["E1"]
+
+
+def test_recognition_uses_the_workers_private_antispoof(monkeypatch):
+    private = object()
+    seen = []
+
+    def check(faces, model=None):
+        seen.append(model)
+        return [("fake", 0.99)] * len(faces)
+
+    monkeypatch.setattr(realtime_attendance, "check_liveness_batch", check)
+    state = AttendanceState()
+    work = _work(state, None, 100.0)
+    work.refresh = [0]
+    recognize_pending([work], antispoof=private)
+    assert seen == [private]
+    assert work.tracks[0].liveness == ("fake", 0.99)
+
+
+def test_private_antispoof_model_skips_the_shared_lock():
+    class _Boxes:
+        conf = cls = np.array([0.0])
+
+        def __len__(self):
+            return 0
+
+    class _Model:
+        def predict(self, source, verbose=False):
+            return [type("R", (), {"names": {}, "boxes": _Boxes()})() for _ in source]
+
+    faces = [np.zeros((8, 8, 3), dtype=np.uint8)]
+    with antispoof._predict_lock:   # another thread is busy with the shared model
+        assert antispoof.check_liveness_batch(faces, model=_Model()) == [("unknown", 0.0)]
@@ -0,0 +1,110 @@
+import os
+
+import numpy as np
+
+from src import partitioned_log
+from src.partitioned_log import ACCESS_COLUMNS, ATTENDANCE_COLUMNS, PartitionedLog
+
+
+def _rows(days, employees):
+    rows = [(f"E{e:03d}", f"Name {e}", "IT", "Dev", day, "08:00:00", "17:00:00")
+            for day in days for e in employees]
+    return {col: [r[i] for r in rows] for i, col in enumerate(ATTENDANCE_COLUMNS)}
+
+
+def _keys(data):
+    return sorted(zip(data["employee_id"], data["date"]))
+
+
+def test_append_and_read(tmp_path):
+    log = PartitionedLog(str(tmp_path), ATTENDANCE_COLUMNS)
+    data = _rows(["2026-01-05", "2026-01-06"], [3, 1, 2])
+    assert log.append(data) == 6
+    assert log.partitions() == ["2026-01-05", "2026-01-06"]
+    assert (log.first_date(), log.last_date()) == ("2026-01-05", "2026-01-06")
+
+    assert _keys(log.read_columns()) == _keys(data)
+    one_day = log.read_columns(start="2026-01-06", end="2026-01-06")
+    assert set(one_day["date"]) == {"2026-01-06"}
+    one_emp = log.read_columns(employees=["E002"], columns=("employee_id", "date"))
+    assert _keys(one_emp) == [("E002", "2026-01-05"), ("E002", "2026-01-06")]
+    assert len(log.read_columns(employees=["nobody"])["date"]) == 0
+
+
+def test_compact_rolls_closed_months(tmp_path):
+    log = PartitionedLog(str(tmp_path), ATTENDANCE_COLUMNS)
+    data = _rows(["2026-01-05", "2026-01-06", "2026-02-02"], [2, 1])
+    log.append(data)
+    log.append(_rows(["2026-02-02"], [3]))
+
+    assert log.compact(today="2026-02-10") == 2
+    assert log.partitions() == ["2026-01", "2026-02-02"]
+    assert log.stats()["parts"] == 2
+    expected = _keys(data) + [("E003", "2026-02-02")]
+    assert _keys(log.read_columns()) == sorted(expected)
+    # a month partition is pruned inside by date
+    assert _keys(log.read_columns(start="2026-01-06", end="2026-01-31")) == [("E001", "2026-01-06"), ("E002", "2026-01-06")]
+    assert log.compact(today="2026-02-10") == 0
+
+
+def test_crash_between_merge_and_delete_does_not_duplicate(tmp_path):
+    log = PartitionedLog(str(tmp_path), ATTENDANCE_COLUMNS)
+    log.append(_rows(["2026-01-05"], [1, 2]))
+    log.append(_rows(["2026-01-05"], [3]))
+    parts = log._live_parts()
+    before = _keys(log.read_columns())
+
+    # merged part written, crash before the old parts were removed
+    merged = {col: np.concatenate([log._read_part(p, m, log.columns)[col] for _, p, m in parts])
+              for col in log.columns}
+    log._write_part("2026-01-05", merged, replaces=[f"2026-01-05/{os.path.basename(p)}" for _, p, _ in parts])
+    assert len(os.listdir(tmp_path / "2026-01-05")) == 3
+
+    assert _keys(log.read_columns()) == before
+    assert log.stats()["rows"] == 3
+
+    # the next compaction deletes the parts the crash left behind
+    log.compact(today="2026-01-06")
+    assert len(os.listdir(tmp_path / "2026-01-05")) == 1
+    assert _keys(log.read_columns()) == before
+
+
+def _write_segment(path, days):
+    lines = ["Date,Time,Employee ID,Name,Status,Liveness,Count"]
+    lines += [f"{day},08:00:00,E001,Alice,Granted,Real,1" for day in days]
+    path.write_text("\n".join(lines) + "\n")
+
+
+def test_ingest_skips_days_already_ingested_from_a_segment(tmp_path, monkeypatch):
+    csv_path = tmp_path / "access_logs.csv"
+    segment = tmp_path / "access_logs.2026-01-06.001.csv"
+    _write_segment(segment, ["2026-01-05", "2026-01-06"])
+    log = PartitionedLog(str(tmp_path / "parts"), ACCESS_COLUMNS)
+
+    # crash after the first day part was written, before the segment was removed
+    appended = []
+    real_write = log._write_part
+
+    def crash_after_one(*args, **kwargs):
+        if appended:
+            raise OSError("disk full")
+        appended.append(real_write(*args, **kwargs))
+
+    monkeypatch.setattr(log, "_write_part", crash_after_one)
+    try:
+        partitioned_log.ingest_access_log(str(csv_path), log)
+    except OSError:
+        pass
+    assert segment.exists()
+
+    monkeypatch.setattr(log, "_write_part", real_write)
+    assert partitioned_log.ingest_access_log(str(csv_path), log) == 1
+    assert not segment.exists()
+    assert sorted(log.read_columns()["date"]) == ["2026-01-05", "2026-01-06"]
+
+    # sources survive compaction; a new segment reusing the name is ingested
+    log.compact(today="2026-02-01")
+    _write_segment(segment, ["2026-01-06"])
+    os.utime(segment, ns=(1, 1))
+    assert partitioned_log.ingest_access_log(str(csv_path), log) == 1
+    assert len(log.read_columns()["date"]) == 3
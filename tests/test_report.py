@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src import report
+from src.attendance_store import AttendanceStore
+from src.partitioned_log import archive_attendance, attendance_log
+
+TODAY = "2026-03-11"
+
+
+@pytest.fixture
+def paths(tmp_path):
+    rng = np.random.default_rng(0)
+    store_path = str(tmp_path / "attendance.db")
+    store = AttendanceStore(store_path)
+    for day in pd.bdate_range("2026-01-05", TODAY):
+        for e in range(12):
+            if rng.random() < 0.85:
+                t_in = 8 * 3600 + int(rng.normal(1800, 900))
+                t_out = t_in + 8 * 3600 + int(rng.integers(0, 3600))
+                fmt = lambda s: f"{s // 3600:02d}:{s // 60 % 60:02d}:{s % 60:02d}"
+                store.record(f"E{e}", "", f"Dept {e % 3}", "", day.strftime("%Y-%m-%d"), fmt(t_in))
+                store.record(f"E{e}", "", f"Dept {e % 3}", "", day.strftime("%Y-%m-%d"), fmt(t_out))
+    store.close()
+    return {"store_path": store_path, "csv_path": str(tmp_path / "none.csv"),
+            "parts_root": str(tmp_path / "parts"), "cache_dir": str(tmp_path / "cache")}
+
+
+def _summary(name, paths, **kwargs):
+    out = report.period_summary(name, today=TODAY, **paths, **kwargs)
+    return out.sort_values(["period", "department"]).reset_index(drop=True)
+
+
+@pytest.mark.parametrize("name", list(report.PERIODS))
+def test_cached_summary_matches_full_rebuild(paths, name):
+    cold = _summary(name, paths)
+    warm = _summary(name, paths)           # closed periods from the cache
+    full = _summary(name, paths, rebuild=True)
+    assert len(full) and full["period"].nunique() > 1
+    pd.testing.assert_frame_equal(warm, full, check_dtype=False)
+    pd.testing.assert_frame_equal(cold, full, check_dtype=False)
+
+
+def test_summary_over_archived_partitions(paths):
+    before = _summary("weekly", paths, rebuild=True)
+    log = attendance_log(paths["parts_root"])
+    assert archive_attendance(paths["store_path"], log, before="2026-03-01") > 0
+    log.compact(today=TODAY)
+    after = _summary("weekly", paths, rebuild=True)
+    pd.testing.assert_frame_equal(after, before, check_dtype=False)
+    # and the cache built before archiving still resumes correctly
+    pd.testing.assert_frame_equal(_summary("weekly", paths), before, check_dtype=False)
@@ -0,0 +1,47 @@
+import numpy as np
+
+from src.scheduler import DetectionScheduler
+
+
+def _still():
+    return np.full((360, 640, 3), 100, dtype=np.uint8)
+
+
+def _moved(seed):
+    return np.random.default_rng(seed).integers(0, 256, size=(360, 640, 3), dtype=np.uint8)
+
+
+def test_motion_runs_every_frame_and_holds():
+    sched = DetectionScheduler(motion_hold=1.0)
+    assert sched.should_detect(_moved(0), now=0.0)       # first frame always counts as motion
+    assert sched.should_detect(_moved(1), now=0.1)
+    assert sched.mode == "motion"
+    assert sched.should_detect(_moved(1), now=0.9)       # still, but inside the hold
+    assert sched.mode == "motion"
+
+
+def test_stable_scene_with_tracks_detects_every_nth_frame():
+    sched = DetectionScheduler(every_n=5, motion_hold=0.0, max_gap=10.0)
+    sched.should_detect(_still(), now=0.0)
+    runs = [sched.should_detect(_still(), now=1.0 + i * 0.01, has_tracks=True) for i in range(10)]
+    assert sched.mode == "stable"
+    assert runs == [False, False, False, False, True] * 2
+
+
+def test_stable_scene_never_skips_longer_than_max_gap():
+    sched = DetectionScheduler(every_n=100, motion_hold=0.0, max_gap=0.5)
+    sched.should_detect(_still(), now=0.0)
+    assert not sched.should_detect(_still(), now=0.3, has_tracks=True)
+    assert sched.should_detect(_still(), now=0.6, has_tracks=True)
+
+
+def test_idle_scene_detects_on_interval():
+    sched = DetectionScheduler(idle_interval=2.0, motion_hold=0.0)
+    sched.should_detect(_still(), now=0.0)
+    runs = [sched.should_detect(_still(), now=t) for t in (0.5, 1.0, 1.9, 2.1, 3.0)]
+    assert sched.mode == "idle"
+    assert runs == [False, False, False, True, False]
+
+    stats = sched.stats()
+    assert (stats["frames"], stats["detected"], stats["idle"]) == (6, 2, 5)
+    assert stats["duty_cycle"] == 2 / 6
@@ -0,0 +1,68 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+from src.snapshot_store import SnapshotStore
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
+
+
+def _store(root, **kwargs):
+    kwargs.setdefault("flush_interval", 60)
+    return SnapshotStore(str(root), **kwargs)
+
+
+def test_near_duplicates_are_skipped(tmp_path, rng):
+    store = _store(tmp_path)
+    t = time.time() - 3 * 3600
+    face = rng.integers(0, 255, (120, 100, 3), dtype=np.uint8)
+    assert store.add("7", face, now=t)
+    assert not store.add("7", np.clip(face.astype(int) + 2, 0, 255).astype(np.uint8), now=t + 1)
+    assert store.add("8", face, now=t + 2)                  # other employee
+    assert store.add("7", face, now=t + 2 * 3600)       # outside the dedupe window
+    store.flush()
+
+    assert [s["employee_id"] for s in store.find()] == ["7", "8", "7"]
+    assert store.stats()["duplicates"] == 1
+    store.close()
+
+
+def test_downscaled_and_indexed(tmp_path, rng):
+    store = _store(tmp_path, max_side=64)
+    store.add("7", rng.integers(0, 255, (256, 128, 3), dtype=np.uint8), kind="access")
+    store.flush()
+    (snap,) = store.find("7", kind="access")
+    assert (snap["width"], snap["height"]) == (32, 64)
+    assert os.path.getsize(snap["path"]) == snap["bytes"]
+    store.close()
+
+
+def test_quotas_keep_newest_per_employee(tmp_path, rng):
+    store = _store(tmp_path, dedupe_distance=-1, max_employee_mb=0.05, max_total_mb=0.1)
+    t = time.time() - 3600
+    for i in range(12):
+        store.add("A", rng.integers(0, 255, (100, 100, 3), dtype=np.uint8), now=t + i)
+    store.flush()
+    a = store.find("A")
+    assert 1 < len(a) < 12
+    assert sum(s["bytes"] for s in a) <= 0.05 * 2**20
+    assert a[0]["path"].endswith(".jpg") and store.stats()["deleted"] == 12 - len(a)
+
+    # one oversized snapshot: over both quotas, but an employee's newest is kept
+    store.add("B", rng.integers(0, 255, (640, 640, 3), dtype=np.uint8), now=t + 60)
+    store.flush()
+    assert len(store.find("B")) == 1
+    assert [s["path"] for s in store.find("A")] == [a[0]["path"]]
+
+    # a second store on the same index sees the same usage
+    other = _store(tmp_path)
+    assert other.stats()["total_mb"] == store.stats()["total_mb"]
+    files = [f for _, _, fs in os.walk(tmp_path) for f in fs if f.endswith(".jpg")]
+    assert len(files) == 2
+    other.close()
+    store.close()
@@ -0,0 +1,45 @@
+import numpy as np
+
+from src.tracker import FaceTracker, Track, iou_matrix
+
+
+def test_iou_matrix():
+    a = [(0, 0, 10, 10), (20, 20, 30, 30)]
+    b = [(0, 0, 10, 10), (5, 0, 15, 10)]
+    iou = iou_matrix(a, b)
+    assert iou.shape == (2, 2)
+    np.testing.assert_allclose(iou[0], [1.0, 50 / 150], rtol=1e-6)
+    assert not iou[1].any()
+    assert iou_matrix([], b).shape == (0, 2)
+
+
+def test_tracks_follow_moving_boxes():
+    tracker = FaceTracker()
+    first = tracker.update([(0, 0, 100, 100), (200, 0, 300, 100)], now=0.0)
+    second = tracker.update([(205, 2, 305, 102), (3, 1, 103, 101)], now=0.1)
+    assert [t.id for t in first] == [1, 2]
+    assert [t.id for t in second] == [2, 1]         # same order as the detections
+    assert second[1].box == (3, 1, 103, 101)
+
+    third = tracker.update([(500, 500, 600, 600)], now=0.2)
+    assert third[0].id == 3                          # no overlap -> new track
+
+
+def test_unseen_tracks_expire():
+    tracker = FaceTracker(max_missed_time=1.0)
+    tracker.update([(0, 0, 10, 10)], now=0.0)
+    tracker.update([], now=0.9)
+    assert len(tracker.tracks) == 1
+    tracker.update([], now=1.1)
+    assert tracker.tracks == []
+
+
+def test_refresh_on_interval_or_box_change():
+    track = Track(1, (0, 0, 100, 100), now=0.0)
+    assert track.needs_refresh(0.0)                  # never checked
+    track.set_result(("real", 0.9), "E1", "Alice", 0.8, now=0.0)
+    assert not track.needs_refresh(1.0, interval=2.0)
+    assert track.needs_refresh(2.0, interval=2.0)
+
+    track.box = (60, 0, 160, 100)                    # IoU 0.25 vs the checked box
+    assert track.needs_refresh(1.0, interval=2.0, refresh_iou=0.5)